@@ -0,0 +1,238 @@
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import cubo as cb
+import pareto
+
+# ============================
+# Afinidad cliente × familia
+# ============================
+# Matriz dispersa (CSR) con una fila por cliente y una columna por familia de
+# producto, con las ventas y el número de transacciones de cada par. Solo se
+# guardan los pares que existen, así que la memoria crece con los pares
+# cliente-familia y no con clientes × familias.
+#
+# - Co-compra de familias: presencia^T · presencia da, para cada par de
+#   familias, cuántos clientes compran ambas. De ahí salen confianza, lift y
+#   similitud coseno; por familia se conservan solo las k más afines.
+# - Venta cruzada: las familias que un cliente no compra, puntuadas por su
+#   similitud con las que sí compra (fila del cliente · similitud de familias).
+# - Clientes parecidos: coseno entre filas de ventas, calculado solo para los
+#   clientes que se consultan (matriz dispersa por unas pocas columnas densas)
+#   y podado a los k más parecidos; nunca se arma la matriz clientes × clientes.
+#   Contra muchas semillas se recorre por bloques de clientes y de cada bloque
+#   solo se guarda la semilla más parecida, así que lo denso queda en
+#   BLOQUE_CLIENTES × semillas y no en clientes × semillas.
+
+CLIENTE = "Número de cliente"
+FAMILIA = "Familia - Clave"
+TOP_K = 10
+K_FAMILIAS = 50  # familias afines que se guardan por familia
+SEMILLAS_MAXIMAS = 200  # clientes A que se usan para buscar parecidos
+BLOQUE_CLIENTES = 4096  # filas de la similitud densa contra las semillas que hay a la vez
+
+
+def top_k(matriz, k):
+    # Las k entradas más grandes de cada fila de una CSR (sin ciclos de Python por fila)
+    matriz = matriz.tocsr()
+    filas = np.repeat(np.arange(matriz.shape[0]), np.diff(matriz.indptr))
+    orden = np.lexsort((-matriz.data, filas))
+    rango = np.arange(len(orden)) - matriz.indptr[filas[orden]]
+    conservar = orden[rango < k]
+    return sparse.csr_matrix(
+        (matriz.data[conservar], (filas[conservar], matriz.indices[conservar])), shape=matriz.shape
+    )
+
+
+def _sin_diagonal(matriz):
+    matriz = (matriz - sparse.diags(matriz.diagonal())).tocsr()
+    matriz.eliminate_zeros()
+    return matriz
+
+
+def _normalizar_filas(matriz):
+    normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1)).ravel())
+    inversas = np.divide(1.0, normas, out=np.zeros_like(normas), where=normas > 0)
+    return sparse.diags(inversas) @ matriz
+
+
+def _nbytes(matriz):
+    return matriz.data.nbytes + matriz.indices.nbytes + matriz.indptr.nbytes
+
+
+def _pares(cubo):
+    # Posición de cliente y familia de cada fila del cubo, con los miembros ordenados
+    fila, clientes = pd.factorize(cubo[CLIENTE], sort=True)
+    columna, familias = pd.factorize(cubo[FAMILIA], sort=True)
+    return fila, columna, clientes, familias
+
+
+def _perfiles(ventas):
+    # Coseno entre clientes sobre ventas positivas (las devoluciones no acercan a nadie)
+    return _normalizar_filas(ventas.maximum(0)).tocsr()
+
+
+def _mas_parecidos(perfiles, clientes, ventas_cliente, semillas, k):
+    # Clientes fuera de `semillas` más parecidos a alguno de ellos, con el más cercano
+    semillas = np.asarray(semillas)
+    if not len(clientes) or not len(semillas):
+        return pd.DataFrame(columns=["Cliente", "Similitud", "Parecido a", "Ventas"])
+    posiciones = np.minimum(np.searchsorted(clientes, semillas), len(clientes) - 1)
+    posiciones = posiciones[clientes[posiciones] == semillas]
+    if not len(posiciones):
+        return pd.DataFrame(columns=["Cliente", "Similitud", "Parecido a", "Ventas"])
+    # Por bloques de clientes: similitud contra las semillas y, por cliente, la más parecida
+    columnas = perfiles[posiciones].toarray().T
+    semilla = np.zeros(len(clientes), dtype=np.int64)
+    maxima = np.zeros(len(clientes))
+    for inicio in range(0, len(clientes), BLOQUE_CLIENTES):
+        bloque = perfiles[inicio:inicio + BLOQUE_CLIENTES] @ columnas
+        semilla[inicio:inicio + len(bloque)] = bloque.argmax(axis=1)
+        maxima[inicio:inicio + len(bloque)] = bloque.max(axis=1)
+    maxima[posiciones] = 0
+    candidatos = np.flatnonzero(maxima > 0)
+    orden = candidatos[np.argsort(-maxima[candidatos], kind="stable")[:k]]
+    return pd.DataFrame({
+        "Cliente": clientes[orden],
+        "Similitud": maxima[orden],
+        "Parecido a": clientes[posiciones[semilla[orden]]],
+        "Ventas": ventas_cliente[orden],
+    })
+
+
+class Afinidad:
+
+    def __init__(self, cubo, k_familias=K_FAMILIAS):
+        inicio = time.perf_counter()
+        fila, columna, self.clientes, self.familias = _pares(cubo)
+        forma = (len(self.clientes), len(self.familias))
+        # El constructor suma los pares repetidos (el cubo tiene una fila por mes, vendedor, ...)
+        self.ventas = sparse.csr_matrix((cubo[cb.VENTAS].to_numpy(), (fila, columna)), shape=forma)
+        self.conteo = sparse.csr_matrix((cubo[cb.FILAS].to_numpy().astype(np.int64), (fila, columna)), shape=forma)
+        self.presencia = self.conteo.copy()
+        self.presencia.data = (self.presencia.data > 0).astype(np.float64)
+        self.presencia.eliminate_zeros()
+
+        coocurrencia = (self.presencia.T @ self.presencia).tocsr()
+        self.clientes_familia = coocurrencia.diagonal()
+        self.coocurrencia = top_k(_sin_diagonal(coocurrencia), k_familias)
+        raiz = np.sqrt(self.clientes_familia)
+        inversas = np.divide(1.0, raiz, out=np.zeros_like(raiz), where=raiz > 0)
+        self.similitud_familias = (sparse.diags(inversas) @ self.coocurrencia @ sparse.diags(inversas)).tocsr()
+        self.perfiles = _perfiles(self.ventas)
+        self.ventas_cliente = np.asarray(self.ventas.sum(axis=1)).ravel()
+        self.segundos_construccion = time.perf_counter() - inicio
+
+    @property
+    def nbytes(self):
+        matrices = [self.ventas, self.conteo, self.presencia, self.coocurrencia, self.similitud_familias, self.perfiles]
+        return sum(_nbytes(m) for m in matrices) + self.clientes_familia.nbytes + self.ventas_cliente.nbytes
+
+    def _posicion(self, miembros, valor):
+        posicion = np.searchsorted(miembros, valor)
+        if posicion >= len(miembros) or miembros[posicion] != valor:
+            raise KeyError(f"No existe: {valor}")
+        return int(posicion)
+
+    def familias_afines(self, familia, k=TOP_K):
+        # Familias que más se compran junto con `familia`
+        i = self._posicion(self.familias, familia)
+        fila = self.coocurrencia.getrow(i)
+        orden = np.argsort(-fila.data, kind="stable")[:k]
+        otras = fila.indices[orden]
+        comunes = fila.data[orden]
+        n = len(self.clientes)
+        return pd.DataFrame({
+            "Familia": self.familias[otras],
+            "Clientes en común": comunes.astype(np.int64),
+            "Confianza (%)": comunes / self.clientes_familia[i] * 100,
+            "Lift": comunes * n / (self.clientes_familia[i] * self.clientes_familia[otras]),
+            "Similitud": self.similitud_familias[i, otras].toarray().ravel(),
+        })
+
+    def recomendar(self, cliente, k=TOP_K):
+        # Familias que el cliente no compra, ordenadas por afinidad con las que sí compra
+        i = self._posicion(self.clientes, cliente)
+        compradas = self.presencia.getrow(i)
+        puntaje = (compradas @ self.similitud_familias).toarray().ravel()
+        puntaje[compradas.indices] = 0
+        candidatas = np.flatnonzero(puntaje > 0)
+        orden = candidatas[np.argsort(-puntaje[candidatas], kind="stable")[:k]]
+        return pd.DataFrame({
+            "Familia": self.familias[orden],
+            "Puntaje": puntaje[orden],
+            "Clientes que la compran": self.clientes_familia[orden].astype(np.int64),
+        })
+
+    def _similitud(self, posiciones):
+        # Coseno de todos los clientes contra unos pocos: perfiles (disperso) · columnas densas
+        return self.perfiles @ self.perfiles[posiciones].toarray().T
+
+    def similares(self, cliente, k=TOP_K):
+        # Clientes con el perfil de compra por familia más parecido (coseno)
+        i = self._posicion(self.clientes, cliente)
+        similitud = self._similitud([i]).ravel()
+        similitud[i] = 0
+        candidatos = np.flatnonzero(similitud > 0)
+        orden = candidatos[np.argsort(-similitud[candidatos], kind="stable")[:k]]
+        return pd.DataFrame({
+            "Cliente": self.clientes[orden],
+            "Similitud": similitud[orden],
+            "Ventas": self.ventas_cliente[orden],
+        })
+
+    def parecidos_a(self, semillas, k=TOP_K):
+        # Clientes fuera de `semillas` más parecidos a alguno de ellos, con el más cercano
+        return _mas_parecidos(self.perfiles, self.clientes, self.ventas_cliente, semillas, k)
+
+
+def construir_afinidad(cubo, anio=None):
+    # Tiene la forma de CuboIncremental.consultar: una por versión del dataset y filtros
+    return Afinidad(cubo)
+
+
+def clientes_clase_a(cubo, anio=None, maximo=SEMILLAS_MAXIMAS):
+    # Los clientes A del Pareto de ventas, de mayor a menor (a lo más `maximo`)
+    tabla = pareto.pareto(cb.ventas_por(cubo, CLIENTE))
+    return tabla.loc[tabla["Clasificación"] == "A", CLIENTE].head(maximo).to_numpy()
+
+
+def parecidos_clase_a(cubo, anio=None, k=TOP_K):
+    # Tiene la forma de CuboIncremental.consultar: queda en la caché compartida y
+    # no se recalcula en cada rerun. Solo arma la matriz de ventas, sin la co-compra
+    fila, columna, clientes, familias = _pares(cubo)
+    ventas = sparse.csr_matrix((cubo[cb.VENTAS].to_numpy(), (fila, columna)), shape=(len(clientes), len(familias)))
+    ventas_cliente = np.asarray(ventas.sum(axis=1)).ravel()
+    return _mas_parecidos(_perfiles(ventas), clientes, ventas_cliente, clientes_clase_a(cubo), k)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import generador
+
+    parser = argparse.ArgumentParser(description="Construcción y consultas de la matriz cliente × familia")
+    parser.add_argument("--escala", type=float, default=100, help="Múltiplo de las filas de BD.csv")
+    args = parser.parse_args()
+
+    cubo_base = cb.construir_cubo(generador.generar(args.escala)[cb.COLUMNAS_ORIGEN])
+    afinidad = Afinidad(cubo_base)
+    clientes, familias = len(afinidad.clientes), len(afinidad.familias)
+    print(
+        f"{clientes:,} clientes × {familias:,} familias, {afinidad.ventas.nnz:,} pares, "
+        f"construida en {afinidad.segundos_construccion:.2f} s; matriz de ventas {_nbytes(afinidad.ventas) / 1e6:.1f} MB "
+        f"(densa: {clientes * familias * 8 / 1e6:,.1f} MB), todo el análisis {afinidad.nbytes / 1e6:.1f} MB"
+    )
+    semillas = clientes_clase_a(cubo_base)
+    for nombre, consulta in [
+        ("familias afines", lambda: afinidad.familias_afines(afinidad.familias[0])),
+        ("venta cruzada", lambda: afinidad.recomendar(afinidad.clientes[0])),
+        ("clientes similares", lambda: afinidad.similares(afinidad.clientes[0])),
+        (f"parecidos a {len(semillas)} clientes A", lambda: afinidad.parecidos_a(semillas)),
+    ]:
+        inicio = time.perf_counter()
+        consulta()
+        print(f"{nombre}: {(time.perf_counter() - inicio) * 1000:.2f} ms")
@@ -0,0 +1,88 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# ============================
+# Almacén columnar (Arrow IPC)
+# ============================
+# El CSV se convierte una sola vez a un archivo Arrow IPC sin comprimir.
+# Al leerlo con memory map solo se tocan las columnas solicitadas y los
+# textos repetidos (Tipo, Familia, Trimestre) quedan como diccionarios.
+
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(__file__), "data")
+RUTA_CSV = os.path.join(DIRECTORIO_DATOS, "BD.csv")
+RUTA_ALMACEN = os.path.join(DIRECTORIO_DATOS, "BD.arrow")
+
+COLUMNAS_CATEGORICAS = ["Tipo", "Familia", "Trimestre"]
+COLUMNAS_ENTERAS = [
+    "Número de Vendedor",
+    "Número de cliente",
+    "Departamento - Clave",
+    "Familia - Clave",
+    "Año",
+    "Mes",
+    "Num Trimestre",
+]
+
+
+def preparar_columnas(df, conteo=None):
+    # Tipos compactos: enteros int32 para llaves y fechas, categorías para textos.
+    # Las filas sin fecha o sin alguna llave no caben en int32: se descartan y se
+    # cuentan en conteo["descartadas"], como en motores.lotes_origen
+    conteo = {} if conteo is None else conteo
+    conteo.setdefault("descartadas", 0)
+    completas = df.dropna(subset=["Fecha"] + [c for c in COLUMNAS_ENTERAS if c in df])
+    conteo["descartadas"] += len(df) - len(completas)
+    df = completas
+    df["Fecha"] = pd.to_datetime(df["Fecha"])
+    df["Num Trimestre"] = (df["Fecha"].dt.month - 1) // 3 + 1
+    df["Trimestre"] = df["Fecha"].dt.to_period("Q").astype(str)
+    for columna in COLUMNAS_ENTERAS:
+        if columna in df:
+            df[columna] = df[columna].astype("int32")
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df:
+            df[columna] = df[columna].astype("category")
+    return df
+
+
+def leer_csv(ruta_csv=RUTA_CSV, conteo=None):
+    return preparar_columnas(pd.read_csv(ruta_csv), conteo)
+
+
+def escribir_almacen(df, ruta_almacen=RUTA_ALMACEN):
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    # Sin compresión para poder mapear el archivo en memoria sin decodificar
+    feather.write_feather(tabla, ruta_almacen, compression="uncompressed")
+
+
+def almacen_vigente(ruta_csv=RUTA_CSV, ruta_almacen=RUTA_ALMACEN):
+    if not os.path.exists(ruta_almacen):
+        return False
+    if not os.path.exists(ruta_csv):
+        return True
+    return os.path.getmtime(ruta_almacen) >= os.path.getmtime(ruta_csv)
+
+
+def construir_almacen(ruta_csv=RUTA_CSV, ruta_almacen=RUTA_ALMACEN):
+    escribir_almacen(leer_csv(ruta_csv), ruta_almacen)
+    return ruta_almacen
+
+
+def cargar(columnas=None, ruta_csv=RUTA_CSV, ruta_almacen=RUTA_ALMACEN):
+    # Se reconstruye el almacén solo si no existe o si el CSV es más reciente
+    if not almacen_vigente(ruta_csv, ruta_almacen):
+        construir_almacen(ruta_csv, ruta_almacen)
+    columnas = list(columnas) if columnas is not None else None
+    tabla = feather.read_table(ruta_almacen, columns=columnas, memory_map=True)
+    return tabla.to_pandas()
+
+
+if __name__ == "__main__":
+    import sys
+
+    origen = sys.argv[1] if len(sys.argv) > 1 else RUTA_CSV
+    destino = sys.argv[2] if len(sys.argv) > 2 else RUTA_ALMACEN
+    construir_almacen(origen, destino)
+    print(f"Almacén generado en {destino}")
@@ -0,0 +1,99 @@
+import pandas as pd
+
+import cubo as cb
+import distintos
+import pareto
+import rentabilidad
+
+# ============================
+# Métricas del dashboard sin Streamlit
+# ============================
+# Las mismas cifras que muestran las secciones (resúmenes ABC, top de clientes,
+# meses extremos, rentabilidad trimestral y por cliente) como funciones puras
+# sobre el cubo. Tienen la forma de CuboIncremental.consultar (cubo, anio,
+# parámetros) para compartir la caché; las usan el dashboard y el servicio HTTP.
+
+NOMBRES_CONTEO = {
+    "departamento": "Numero_Departamentos",
+    "cliente": "Numero_Clientes",
+    "familia": "Numero_Familias",
+    "vendedor": "Numero_Vendedores",
+}
+
+COLUMNAS_ALCANCE = {
+    "vendedor": "Número de Vendedor",
+    "departamento": "Departamento - Clave",
+    "familia": "Familia - Clave",
+    "anio": "Año",
+    "mes": "Mes",
+}
+
+
+def resumen_abc(cubo, anio=None, dimension="departamento"):
+    tabla = pareto.pareto(cb.ventas_por(cubo, pareto.DIMENSIONES[dimension], anio))
+    return pareto.resumen(tabla, NOMBRES_CONTEO[dimension])
+
+
+def top_clientes(cubo, anio=None, n=5):
+    # Los n clientes con más ventas y su participación en el total
+    ventas = cb.ventas_por(cubo, "Número de cliente", anio)
+    total = ventas.sum()
+    top = ventas.head(n)
+    return pd.DataFrame({
+        "Cliente": top.index,
+        "Ventas": top.values,
+        "Participación (%)": top.values / total * 100 if total else 0.0,
+    })
+
+
+def vendedor_con_mas_clientes(cubo, anio=None):
+    # Conteo distinto por bitmaps de clientes (sin nunique sobre las filas del cubo)
+    return mas_clientes(distintos.conteo_clientes(cubo, anio), anio)
+
+
+def mas_clientes(conteo, anio=None):
+    # Desde un ConteoDistinto ya construido (el de la caché): solo une bitmaps
+    clientes = conteo.contar([distintos.VENDEDOR], anio)
+    if clientes.empty:
+        return None
+    return clientes.idxmax(), clientes.max()
+
+
+def clientes_distintos(cubo, anio=None, por="vendedor", desde=None, hasta=None):
+    # Clientes distintos por cualquier combinación de vendedor, departamento, familia, año y mes
+    nombres = [nombre for nombre in por.split(",") if nombre]
+    columnas = [COLUMNAS_ALCANCE[nombre] for nombre in nombres]
+    dimensiones = [c for c in columnas if c not in ("Año", "Mes")]
+    conteo = distintos.conteo_clientes(cubo, anio, dimensiones=dimensiones)
+    resultado = conteo.contar(columnas, anio, desde, hasta)
+    if not columnas:
+        return resultado
+    return resultado.reset_index()
+
+
+def mes_extremo(cubo, anio=None, extremo="max"):
+    # (año, mes, ventas) del mes con más o menos ventas
+    if extremo not in ("max", "min"):
+        raise ValueError(f"extremo debe ser max o min, no {extremo!r}")
+    mensual = cb.ventas_mensuales(cubo, anio)
+    if mensual.empty:
+        return None
+    ventas = mensual["Ventas Netas (USD)"]
+    fila = mensual.loc[ventas.idxmax() if extremo == "max" else ventas.idxmin()]
+    return fila["Año"], fila["Mes"], fila["Ventas Netas (USD)"]
+
+
+def peor_trimestre(cubo, anio=None):
+    trimestres = cb.rentabilidad_trimestral(cubo, anio)
+    if trimestres.empty:
+        return None
+    return trimestres["Rentabilidad (%)"].idxmin(), trimestres["Rentabilidad (%)"].min()
+
+
+def cliente_menos_rentable(cubo, anio=None):
+    return rentabilidad.Rentabilidad(cubo).peor_cliente(anio)
+
+
+def rentabilidad_clientes(cubo, anio=None):
+    # Tabla plana por (cliente, año) con cuartil de rentabilidad
+    return rentabilidad.Rentabilidad(cubo).rentabilidad_clientes(anio).reset_index()
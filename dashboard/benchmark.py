@@ -0,0 +1,546 @@
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import afinidad
+import almacen
+import analitica
+import cubo as cb
+import distintos
+import generador
+import motores
+import paralelo
+import pareto
+import pronostico
+import rentabilidad
+import tiempo
+
+# ============================
+# Benchmarks de carga
+# ============================
+# Cada modo corre en un proceso nuevo para medir el arranque en frío:
+# tiempo de carga, memoria residente máxima y tiempo hasta el primer panel
+# (Pareto por departamento, que es lo primero que se pinta en el dashboard).
+
+
+def _rss_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir_carga(modo, ruta_csv, ruta_almacen):
+    inicio = time.perf_counter()
+    if modo == "csv":
+        df = almacen.leer_csv(ruta_csv)
+    else:
+        df = almacen.cargar(
+            ["Año", "Departamento - Clave", "Ventas Netas (USD)"],
+            ruta_csv=ruta_csv, ruta_almacen=ruta_almacen,
+        )
+    carga = time.perf_counter() - inicio
+    ventas = df.groupby("Departamento - Clave")["Ventas Netas (USD)"].sum().sort_values(ascending=False)
+    primer_panel = time.perf_counter() - inicio
+    return {
+        "modo": modo,
+        "filas": len(df),
+        "carga_s": round(carga, 4),
+        "primer_panel_s": round(primer_panel, 4),
+        "rss_max_mb": round(_rss_mb(), 1),
+        "departamentos": len(ventas),
+    }
+
+
+def comparar_carga(ruta_csv, ruta_almacen):
+    if not almacen.almacen_vigente(ruta_csv, ruta_almacen):
+        almacen.construir_almacen(ruta_csv, ruta_almacen)
+    resultados = []
+    for modo in ["csv", "almacen"]:
+        salida = subprocess.run(
+            [sys.executable, __file__, "carga", "--modo", modo, "--csv", ruta_csv, "--almacen", ruta_almacen],
+            capture_output=True, text=True, check=True,
+        )
+        resultados.append(json.loads(salida.stdout))
+    return resultados
+
+
+# ============================
+# Benchmarks de Pareto ABC
+# ============================
+# Compara la clasificación con .apply (una llamada de Python por miembro)
+# contra np.searchsorted, y el Pareto año por año contra el lote de años.
+
+
+def _cronometrar(funcion, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def comparar_pareto(miembros=100_000, anios=10, repeticiones=5, semilla=0):
+    rng = np.random.default_rng(semilla)
+    # Ventas con sesgo de Pareto, como en los datos reales
+    ventas = pd.Series(rng.pareto(1.2, miembros) + 1, name="Ventas")
+    ventas = ventas.sort_values(ascending=False)
+    porcentaje = ventas.cumsum() / ventas.sum()
+
+    def con_apply():
+        return porcentaje.apply(lambda x: "A" if x <= 0.8 else ("B" if x <= 0.95 else "C"))
+
+    def con_searchsorted():
+        return pareto.clasificar(porcentaje.values)
+
+    assert (con_apply().values == con_searchsorted()).all()
+
+    por_anio = pd.DataFrame({
+        "Año": np.repeat(np.arange(2000, 2000 + anios), miembros),
+        "Número de cliente": np.tile(np.arange(miembros), anios),
+        pareto.VENTAS: rng.pareto(1.2, miembros * anios) + 1,
+    })
+
+    def anio_por_anio():
+        return [pareto.pareto_dimension(por_anio[por_anio["Año"] == a], "cliente") for a in por_anio["Año"].unique()]
+
+    def en_lote():
+        return pareto.pareto_por_anios(por_anio, "cliente")
+
+    t_apply = _cronometrar(con_apply, repeticiones)
+    t_vector = _cronometrar(con_searchsorted, repeticiones)
+    t_anios = _cronometrar(anio_por_anio, repeticiones)
+    t_lote = _cronometrar(en_lote, repeticiones)
+    return [
+        {"prueba": "clasificar", "miembros": miembros, "apply_s": round(t_apply, 4),
+         "searchsorted_s": round(t_vector, 5), "aceleracion": round(t_apply / t_vector, 1)},
+        {"prueba": "pareto_por_anios", "miembros": miembros, "anios": anios, "por_anio_s": round(t_anios, 4),
+         "lote_s": round(t_lote, 4), "aceleracion": round(t_anios / t_lote, 1)},
+    ]
+
+
+# ============================
+# Benchmarks de reruns por interacción
+# ============================
+# Antes, cada cambio de un widget volvía a ejecutar toda la página. Con las
+# secciones como fragmentos solo se ejecuta la sección dueña del widget. AppTest
+# no puede disparar el rerun de un solo fragmento (run() vuelve a ejecutar todo
+# el script), así que se reporta el rerun completo (costo anterior) y, dentro de
+# él, el tiempo de la sección dueña: una estimación del rerun del fragmento.
+
+SECCION_POR_WIDGET = {
+    "abc_depto": "pareto_departamentos",
+    "abc_cliente_pareto": "pareto_clientes",
+    "abc_clientes": "top5_clientes",
+    "vendedor": "vendedor_con_mas_clientes",
+    "mes_max": "mes_con_mas_ventas",
+    "mes_min": "mes_con_menos_ventas",
+    "graf_bar": "ventas_mensuales_destacadas",
+    "anio_rent": "rentabilidad_mes_anio",
+    "mes_rent": "rentabilidad_mes_anio",
+    "trimestre": "trimestre_menor_rentabilidad",
+    "cliente_menos_rentable": "cliente_menos_rentable",
+}
+
+
+def medir_reruns():
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"), default_timeout=600)
+    app.session_state.logged_in = True
+    app.session_state.username = "admin"
+    # Secciones debajo del pliegue abiertas para medir la página completa
+    app.session_state.exp_tendencia = True
+    app.session_state.exp_cliente_menos_rentable = True
+    inicio = time.perf_counter()
+    app.run()
+    resultados = [{"widget": "(carga inicial)", "pagina_completa_s": round(time.perf_counter() - inicio, 4)}]
+    for selector in app.selectbox:
+        if selector.key not in SECCION_POR_WIDGET or len(selector.options) < 2:
+            continue
+        selector.select_index(len(selector.options) - 1)
+        inicio = time.perf_counter()
+        app.run()
+        completo = time.perf_counter() - inicio
+        seccion = SECCION_POR_WIDGET[selector.key]
+        # Tiempo de la sección medido por el decorador @seccion durante el rerun completo
+        en_seccion = app.session_state["tiempos_seccion"][seccion]
+        resultados.append({
+            "widget": selector.key,
+            "seccion": seccion,
+            "pagina_completa_s": round(completo, 4),
+            "seccion_en_rerun_s": round(en_seccion, 4),
+        })
+    return resultados
+
+
+# ============================
+# Benchmarks por panel con datos sintéticos
+# ============================
+# Cada cálculo del dashboard se mide sin Streamlit sobre datos generados a
+# varias escalas de BD.csv: mejor tiempo de varias repeticiones y pico de
+# memoria (tracemalloc) de una ejecución. Los resultados se agregan a un
+# archivo JSON lines para comparar una corrida contra la anterior.
+
+RUTA_RESULTADOS = os.path.join(almacen.DIRECTORIO_DATOS, "benchmarks.jsonl")
+ESCALAS = (10, 100, 1000)
+TOLERANCIA = 0.2  # una corrida más lenta que la anterior por más de 20% es regresión
+RUIDO_S = 0.002  # diferencias menores a esto se consideran ruido del reloj
+
+
+def _paneles(df):
+    # Mismo orden que en el dashboard; todos salen del cubo menos su construcción
+    cubo = cb.construir_cubo(df[cb.COLUMNAS_ORIGEN])
+    anio = int(cubo["Año"].max())
+    conteo = distintos.conteo_clientes(cubo)
+    vendedor = int(cubo["Número de Vendedor"].iloc[0])
+    indice = tiempo.indice_mensual(cubo)
+    analisis = afinidad.construir_afinidad(cubo)
+    cliente = analisis.clientes[0]
+    return {
+        "cubo": lambda: cb.construir_cubo(df[cb.COLUMNAS_ORIGEN]),
+        "pareto_departamentos": lambda: pareto.pareto(cb.ventas_por(cubo, "Departamento - Clave")),
+        "pareto_clientes": lambda: pareto.pareto(cb.ventas_por(cubo, "Número de cliente")),
+        "top5_clientes": lambda: cb.ventas_por(cubo, "Número de cliente", anio).head(5),
+        "vendedor_clientes": lambda: analitica.vendedor_con_mas_clientes(cubo, anio),
+        "clientes_por_mes": lambda: conteo.contar(["Año", "Mes"], anio, miembros={distintos.VENDEDOR: [vendedor]}),
+        "afinidad": lambda: afinidad.construir_afinidad(cubo),
+        "venta_cruzada": lambda: (analisis.recomendar(cliente), analisis.similares(cliente)),
+        "parecidos_clientes_a": lambda: afinidad.parecidos_clase_a(cubo),
+        "indice_tiempo": lambda: tiempo.indice_mensual(cubo),
+        "crecimiento_anual": lambda: indice.crecimiento_anual(),
+        "tendencia_mensual": lambda: pronostico.tendencia_lineal(cb.serie_mensual(cubo)["Ventas Netas (USD)"]),
+        "estacionalidad": lambda: cb.serie_mensual(cubo).groupby("Mes")["Ventas Netas (USD)"].mean(),
+        "rango_fechas": lambda: indice.comparar(f"{anio}-01", f"{anio}-06-30", "Cliente", "anio"),
+        "ventanas_moviles": lambda: indice.moviles(dimension="Cliente", miembro=cliente),
+        "rentabilidad_trimestral": lambda: cb.rentabilidad_trimestral(cubo, anio),
+        "rentabilidad_clientes": lambda: rentabilidad.construir(cubo),
+        "pronostico_familias": lambda: pronostico.ajustar(cubo, dimension="Familia"),
+    }
+
+
+def _pico_memoria_mb(funcion):
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _commit():
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return salida.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def medir_paneles(escalas=ESCALAS, repeticiones=3, semilla=0):
+    corrida = {"corrida": datetime.datetime.now().isoformat(timespec="seconds"), "commit": _commit()}
+    resultados = []
+    for escala in escalas:
+        inicio = time.perf_counter()
+        df = generador.generar(escala, semilla)
+        generacion = time.perf_counter() - inicio
+        for panel, funcion in _paneles(df).items():
+            resultados.append({
+                **corrida,
+                "escala": escala,
+                "filas": len(df),
+                "panel": panel,
+                "segundos": round(_cronometrar(funcion, repeticiones), 5),
+                "pico_mb": round(_pico_memoria_mb(funcion), 2),
+            })
+        resultados.append({**corrida, "escala": escala, "filas": len(df), "panel": "(generación)",
+                           "segundos": round(generacion, 3), "pico_mb": None})
+        del df
+    return resultados
+
+
+def guardar_resultados(resultados, ruta=RUTA_RESULTADOS):
+    with open(ruta, "a", encoding="utf-8") as archivo:
+        for fila in resultados:
+            archivo.write(json.dumps(fila, ensure_ascii=False) + "\n")
+
+
+def comparar_corridas(ruta=RUTA_RESULTADOS, tolerancia=TOLERANCIA):
+    # Última corrida contra la anterior, por escala y panel
+    resultados = pd.read_json(ruta, lines=True)
+    corridas = sorted(resultados["corrida"].unique())
+    if len(corridas) < 2:
+        return pd.DataFrame()
+    anterior = resultados[resultados["corrida"] == corridas[-2]].set_index(["escala", "panel"])
+    actual = resultados[resultados["corrida"] == corridas[-1]].set_index(["escala", "panel"])
+    tabla = anterior[["segundos", "pico_mb"]].join(actual[["segundos", "pico_mb"]], lsuffix="_antes", rsuffix="_ahora", how="inner")
+    tabla["cambio_%"] = ((tabla["segundos_ahora"] / tabla["segundos_antes"]) - 1) * 100
+    tabla["regresion"] = (tabla["cambio_%"] > tolerancia * 100) & (tabla["segundos_ahora"] - tabla["segundos_antes"] > RUIDO_S)
+    return tabla.reset_index()
+
+
+# ============================
+# Construcción del cubo en paralelo
+# ============================
+# Un solo groupby contra los meses repartidos en 1, 2, 4, ... procesos. Cada
+# resultado se compara celda por celda con el secuencial antes de reportarlo.
+# Fuera del servidor de Streamlit se puede medir también con fork y con tantos
+# procesos como núcleos, sin el tope que usa el dashboard.
+
+
+def medir_paralelo(escala=300, anios=5, trabajadores=None, repeticiones=3, ejecutor="procesos", inicio=paralelo.INICIO):
+    df = generador.generar(escala, anios=anios)
+    nucleos = os.cpu_count() or 1
+    trabajadores = trabajadores or sorted({1, 2, 4, 8, 16, 32, nucleos} & set(range(1, nucleos + 1)))
+    esperado = cb.construir_cubo(df[cb.COLUMNAS_ORIGEN])
+    secuencial = _cronometrar(lambda: cb.construir_cubo(df[cb.COLUMNAS_ORIGEN]), repeticiones)
+    resultados = []
+    for n in trabajadores:
+        # FILAS_MINIMAS se ignora aquí para medir también con pocas filas
+        minimo, paralelo.FILAS_MINIMAS = paralelo.FILAS_MINIMAS, 0
+        try:
+            cubo = paralelo.construir_cubo(df, n, ejecutor, inicio)
+            pd.testing.assert_frame_equal(esperado, cubo, check_exact=True)
+            segundos = _cronometrar(lambda: paralelo.construir_cubo(df, n, ejecutor, inicio), repeticiones)
+        finally:
+            paralelo.FILAS_MINIMAS = minimo
+        resultados.append({
+            "filas": len(df), "meses": anios * 12, "trabajadores": n, "ejecutor": ejecutor, "inicio": inicio,
+            "secuencial_s": round(secuencial, 4), "paralelo_s": round(segundos, 4),
+            "aceleracion": round(secuencial / segundos, 2), "identico": True,
+        })
+    return resultados
+
+
+# ============================
+# Carga concurrente sobre el servicio HTTP
+# ============================
+# Varias conexiones keep-alive piden una mezcla de rutas (parte repetida, parte
+# con filtros distintos que no están en caché) y se reportan peticiones por
+# segundo y percentiles de latencia.
+
+CONSULTAS_SERVICIO = [
+    "/abc?dimension=departamento", "/abc?dimension=cliente&anio=2015", "/abc?dimension=familia&anio=2016",
+    "/top-clientes?n=5", "/top-clientes?n=10&anio=2016", "/vendedor-mas-clientes?anio=2015",
+    "/mes-extremo?extremo=max", "/mes-extremo?extremo=min&anio=2016",
+    "/rentabilidad/trimestral?anio=2015", "/rentabilidad/peor-trimestre?anio=2016",
+    "/rentabilidad/cliente-menos-rentable?anio=2015", "/rentabilidad/clientes?anio=2016&formato=arrow",
+]
+
+
+async def _pedir(lector, escritor, host, ruta):
+    escritor.write(f"GET {ruta} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await escritor.drain()
+    estado = await lector.readline()
+    largo = 0
+    while True:
+        encabezado = await lector.readline()
+        if encabezado in (b"\r\n", b""):
+            break
+        nombre, _, valor = encabezado.decode("latin-1").partition(":")
+        if nombre.lower() == "content-length":
+            largo = int(valor)
+    await lector.readexactly(largo)
+    return int(estado.split()[1])
+
+
+async def _generar_carga(host, puerto, conexiones, peticiones, proporcion_nuevas, semilla):
+    rng = np.random.default_rng(semilla)
+    # Las consultas "nuevas" llevan un filtro de vendedor y cliente al azar, así que casi nunca están en caché
+    rutas = [
+        f"/top-clientes?vendedor={rng.integers(1, 9)}&cliente={','.join(map(str, rng.integers(1, 90, 3)))}"
+        if rng.random() < proporcion_nuevas else CONSULTAS_SERVICIO[rng.integers(len(CONSULTAS_SERVICIO))]
+        for _ in range(peticiones)
+    ]
+    latencias = []
+    errores = 0
+    siguiente = iter(rutas)
+
+    async def conexion():
+        nonlocal errores
+        lector, escritor = await asyncio.open_connection(host, puerto)
+        try:
+            for ruta in siguiente:
+                inicio = time.perf_counter()
+                if await _pedir(lector, escritor, host, ruta) != 200:
+                    errores += 1
+                latencias.append(time.perf_counter() - inicio)
+        finally:
+            escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(conexion() for _ in range(conexiones)))
+    total = time.perf_counter() - inicio
+    latencias = np.array(latencias) * 1000
+    return {
+        "conexiones": conexiones,
+        "peticiones": len(latencias),
+        "errores": errores,
+        "proporcion_nuevas": proporcion_nuevas,
+        "segundos": round(total, 3),
+        "peticiones_s": round(len(latencias) / total, 1),
+        "p50_ms": round(float(np.percentile(latencias, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencias, 99)), 2),
+        "max_ms": round(float(latencias.max()), 2),
+    }
+
+
+def medir_servicio(host, puerto, conexiones=(1, 8, 32), peticiones=2000, proporcion_nuevas=0.1, iniciar=False):
+    proceso = None
+    if iniciar:
+        proceso = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "servicio.py"),
+             "--host", host, "--puerto", str(puerto)],
+            stdout=subprocess.PIPE, text=True,
+        )
+        proceso.stdout.readline()  # espera el aviso de que ya escucha
+    try:
+        return [
+            asyncio.run(_generar_carga(host, puerto, n, peticiones, proporcion_nuevas, semilla))
+            for semilla, n in enumerate(conexiones)
+        ]
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+
+# ============================
+# Motores fuera de memoria
+# ============================
+# El mismo archivo sintético se importa a SQLite y DuckDB y se construye el cubo
+# con cada motor en un proceso nuevo, para que la memoria residente máxima de
+# uno no se mezcle con la de otro. Con pandas las filas se cargan completas y el
+# panel se agrega en Python; con los motores SQL el panel se resuelve dentro del
+# motor y solo llega a Python el resultado agregado.
+
+MOTORES = ["pandas", "sqlite", "duckdb"]
+FILAS_MOTORES = 100_000_000
+
+
+def _motor(nombre, origen, directorio):
+    if nombre == "pandas":
+        return motores.MotorPandas(ruta_csv="", ruta_almacen=origen)
+    clase = motores.MotorSQLite if nombre == "sqlite" else motores.MotorDuckDB
+    return clase(os.path.join(directorio, f"benchmark.{nombre}"), origen)
+
+
+def medir_motor(nombre, origen, directorio):
+    motor = _motor(nombre, origen, directorio)
+    inicio = time.perf_counter()
+    if nombre == "pandas":
+        cubo = motor.cubo()
+        panel = cubo.groupby(["Año", motores.VENDEDOR], observed=True)[cb.VENTAS].sum()
+    else:
+        panel = motor.agregado([motores.VENDEDOR])
+    segundos = time.perf_counter() - inicio
+    return {
+        "motor": nombre,
+        "filas_panel": len(panel),
+        "panel_s": round(segundos, 3),
+        "rss_max_mb": round(_rss_mb(), 1),
+    }
+
+
+def comparar_motores(filas=FILAS_MOTORES, nombres=MOTORES, directorio=almacen.DIRECTORIO_DATOS):
+    origen = os.path.join(directorio, f"benchmark_{filas}.arrow")
+    if not os.path.exists(origen):
+        generador.escribir(origen, filas=filas)
+    resultados = []
+    for nombre in nombres:
+        importacion = None
+        if nombre != "pandas":
+            # La importación se mide aparte: se hace una vez y el archivo queda para los siguientes arranques
+            inicio = time.perf_counter()
+            _motor(nombre, origen, directorio).importar(motores.lotes_origen(origen))
+            importacion = round(time.perf_counter() - inicio, 1)
+        salida = subprocess.run(
+            [sys.executable, __file__, "motores", "--motor", nombre, "--origen", origen, "--directorio", directorio],
+            capture_output=True, text=True, check=True,
+        )
+        resultados.append({"filas": filas, **json.loads(salida.stdout), "importacion_s": importacion})
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks del dashboard")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    carga = sub.add_parser("carga", help="CSV contra almacén columnar")
+    carga.add_argument("--modo", choices=["csv", "almacen"])
+    carga.add_argument("--csv", default=almacen.RUTA_CSV)
+    carga.add_argument("--almacen", default=almacen.RUTA_ALMACEN)
+    abc = sub.add_parser("pareto", help="Clasificación ABC con apply contra searchsorted")
+    abc.add_argument("--miembros", type=int, default=100_000)
+    abc.add_argument("--anios", type=int, default=10)
+    sub.add_parser("reruns", help="Rerun de página completa contra rerun de la sección")
+    paneles = sub.add_parser("paneles", help="Tiempo y memoria de cada panel con datos sintéticos")
+    paneles.add_argument("--escalas", type=float, nargs="+", default=list(ESCALAS), help="Múltiplos de BD.csv")
+    paneles.add_argument("--repeticiones", type=int, default=3)
+    paneles.add_argument("--resultados", default=RUTA_RESULTADOS)
+    paneles.add_argument("--comparar", action="store_true", help="Solo comparar las dos últimas corridas guardadas")
+    par = sub.add_parser("paralelo", help="Cubo secuencial contra cubo por meses en varios procesos")
+    par.add_argument("--escala", type=float, default=300)
+    par.add_argument("--anios", type=int, default=5)
+    par.add_argument("--trabajadores", type=int, nargs="+")
+    par.add_argument("--ejecutor", choices=["procesos", "hilos"], default="procesos")
+    par.add_argument("--inicio", choices=multiprocessing.get_all_start_methods(), default=paralelo.INICIO)
+    servicio = sub.add_parser("servicio", help="Throughput y latencia p99 del servicio HTTP")
+    servicio.add_argument("--host", default="127.0.0.1")
+    servicio.add_argument("--puerto", type=int, default=8502)
+    servicio.add_argument("--conexiones", type=int, nargs="+", default=[1, 8, 32])
+    servicio.add_argument("--peticiones", type=int, default=2000)
+    servicio.add_argument("--nuevas", type=float, default=0.1, help="Proporción de consultas que no están en caché")
+    servicio.add_argument("--iniciar", action="store_true", help="Levantar servicio.py en un subproceso")
+    mot = sub.add_parser("motores", help="Cubo con pandas, SQLite y DuckDB: tiempo y memoria máxima")
+    mot.add_argument("--filas", type=int, default=FILAS_MOTORES)
+    mot.add_argument("--motores", nargs="+", choices=MOTORES, default=MOTORES)
+    mot.add_argument("--motor", choices=MOTORES, help="Medir un solo motor sobre --origen (uso interno)")
+    mot.add_argument("--origen")
+    mot.add_argument("--directorio", default=almacen.DIRECTORIO_DATOS)
+    args = parser.parse_args()
+
+    if args.comando == "carga":
+        if args.modo:
+            print(json.dumps(medir_carga(args.modo, args.csv, args.almacen)))
+        else:
+            for fila in comparar_carga(os.path.abspath(args.csv), os.path.abspath(args.almacen)):
+                print(json.dumps(fila, ensure_ascii=False))
+    elif args.comando == "pareto":
+        for fila in comparar_pareto(args.miembros, args.anios):
+            print(json.dumps(fila, ensure_ascii=False))
+    elif args.comando == "reruns":
+        for fila in medir_reruns():
+            print(json.dumps(fila, ensure_ascii=False))
+    elif args.comando == "paneles":
+        if not args.comparar:
+            resultados = medir_paneles(args.escalas, args.repeticiones)
+            guardar_resultados(resultados, args.resultados)
+            for fila in resultados:
+                print(json.dumps(fila, ensure_ascii=False))
+        comparacion = comparar_corridas(args.resultados)
+        if not comparacion.empty:
+            print(comparacion.to_string(index=False))
+            if comparacion["regresion"].any():
+                sys.exit(1)
+    elif args.comando == "paralelo":
+        for fila in medir_paralelo(args.escala, args.anios, args.trabajadores, ejecutor=args.ejecutor, inicio=args.inicio):
+            print(json.dumps(fila, ensure_ascii=False))
+    elif args.comando == "servicio":
+        for fila in medir_servicio(args.host, args.puerto, args.conexiones, args.peticiones, args.nuevas, args.iniciar):
+            print(json.dumps(fila, ensure_ascii=False))
+    elif args.comando == "motores":
+        if args.motor:
+            print(json.dumps(medir_motor(args.motor, args.origen, args.directorio)))
+        else:
+            for fila in comparar_motores(args.filas, args.motores, args.directorio):
+                print(json.dumps(fila, ensure_ascii=False))
@@ -0,0 +1,91 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# ============================
+# Caché compartida del proceso
+# ============================
+# Una sola instancia por proceso de Streamlit (vía st.cache_resource) guarda los
+# resultados derivados para todas las sesiones. La clave incluye la versión del
+# dataset, el panel y los filtros; los resultados se entregan sin copiar, así
+# que quien los reciba no debe modificarlos. Cuando se pasa del presupuesto de
+# bytes se desalojan primero los menos usados recientemente.
+
+PRESUPUESTO_MB = float(os.environ.get("LCG_CACHE_MB", 256))
+_FALTA = object()
+
+
+def nombre_funcion(funcion):
+    # Para la clave: dos consultas con el mismo __name__ en módulos distintos no chocan
+    return f"{funcion.__module__}.{funcion.__qualname__}"
+
+
+def tamano_bytes(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series, pd.Index)):
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum()) if isinstance(uso, pd.Series) else int(uso)
+    if hasattr(valor, "nbytes"):
+        # Arreglos de NumPy y estructuras propias que reportan su tamaño
+        return int(valor.nbytes)
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(tamano_bytes(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano_bytes(k) + tamano_bytes(v) for k, v in valor.items())
+    return sys.getsizeof(valor)
+
+
+class CacheCompartido:
+
+    def __init__(self, presupuesto_bytes=PRESUPUESTO_MB * 1024 * 1024):
+        self.presupuesto_bytes = presupuesto_bytes
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+
+    def buscar(self, clave, predeterminado=None):
+        with self._candado:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave][0]
+            self.fallos += 1
+            return predeterminado
+
+    def obtener(self, clave, calcular):
+        valor = self.buscar(clave, _FALTA)
+        if valor is _FALTA:
+            # Se calcula fuera del candado para no bloquear a las demás sesiones
+            valor = calcular()
+            self.guardar(clave, valor)
+        return valor
+
+    def guardar(self, clave, valor):
+        tamano = tamano_bytes(valor)
+        with self._candado:
+            if clave in self._entradas:
+                self.bytes_usados -= self._entradas.pop(clave)[1]
+            if tamano > self.presupuesto_bytes:
+                return
+            self._entradas[clave] = (valor, tamano)
+            self.bytes_usados += tamano
+            while self.bytes_usados > self.presupuesto_bytes:
+                _, (_, liberado) = self._entradas.popitem(last=False)
+                self.bytes_usados -= liberado
+                self.desalojos += 1
+
+    def estadisticas(self):
+        with self._candado:
+            return {
+                "entradas": len(self._entradas),
+                "bytes_usados": self.bytes_usados,
+                "presupuesto_bytes": int(self.presupuesto_bytes),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+            }
@@ -0,0 +1,85 @@
+import pandas as pd
+
+# ============================
+# Cubo de agregados
+# ============================
+# Se suman las transacciones una sola vez por año × mes × departamento ×
+# cliente × vendedor × familia. Todos los paneles filtrados por año se
+# responden desde aquí, así que el costo de cada rerun depende del tamaño
+# del cubo y no del número de transacciones.
+
+VENTAS = "Ventas Netas (USD)"
+COSTO = "Costo (USD)"
+FILAS = "Filas"
+DIMENSIONES = [
+    "Año",
+    "Mes",
+    "Departamento - Clave",
+    "Número de cliente",
+    "Número de Vendedor",
+    "Familia - Clave",
+]
+COLUMNAS_ORIGEN = DIMENSIONES + [VENTAS, COSTO]
+
+
+def construir_cubo(df):
+    cubo = df.groupby(DIMENSIONES, observed=True, dropna=False).agg(
+        **{VENTAS: (VENTAS, "sum"), COSTO: (COSTO, "sum"), FILAS: (VENTAS, "size")}
+    ).reset_index()
+    cubo[FILAS] = cubo[FILAS].astype("int32")
+    return cubo
+
+
+def combinar_cubos(cubos):
+    # Las sumas y los conteos son aditivos, así que dos cubos se combinan reagrupando
+    return pd.concat(cubos, ignore_index=True).groupby(DIMENSIONES, observed=True, dropna=False).agg(
+        {VENTAS: "sum", COSTO: "sum", FILAS: "sum"}
+    ).reset_index()
+
+
+def filtrar_anio(cubo, anio):
+    # Acepta las opciones de los selectbox: "Sin agrupar", "2015" o 2015
+    if anio is None or anio == "Sin agrupar":
+        return cubo
+    return cubo[cubo["Año"] == int(anio)]
+
+
+def ventas_por(cubo, dimension, anio=None):
+    datos = filtrar_anio(cubo, anio)
+    return datos.groupby(dimension)[VENTAS].sum().sort_values(ascending=False)
+
+
+def _con_mes_str(mensual):
+    mensual["Mes_str"] = mensual["Año"].astype(str) + "-" + mensual["Mes"].astype(str).str.zfill(2)
+    return mensual
+
+
+def ventas_mensuales(cubo, anio=None):
+    datos = filtrar_anio(cubo, anio)
+    return _con_mes_str(datos.groupby(["Año", "Mes"])[VENTAS].sum().reset_index())
+
+
+def serie_mensual(cubo, anio=None):
+    # Ventas mensuales como serie de tiempo ordenada, con el índice del mes
+    serie = ventas_mensuales(cubo, anio)
+    serie["Fecha"] = pd.to_datetime(serie["Mes_str"] + "-01")
+    serie = serie.sort_values("Fecha", ignore_index=True)
+    serie["Mes_ordinal"] = range(len(serie))
+    return serie
+
+
+def rentabilidad_mes(cubo, anio, mes):
+    datos = cubo[(cubo["Año"] == anio) & (cubo["Mes"] == mes)]
+    ventas = datos[VENTAS].sum()
+    costo = datos[COSTO].sum()
+    return ((ventas - costo) / costo) * 100 if costo > 0 else None
+
+
+def rentabilidad_trimestral(cubo, anio=None):
+    datos = filtrar_anio(cubo, anio)
+    trimestres = datos.groupby(["Año", (datos["Mes"] - 1) // 3 + 1]).agg({VENTAS: "sum", COSTO: "sum"})
+    trimestres.index = [f"{a}Q{q}" for a, q in trimestres.index]
+    trimestres.index.name = "Trimestre"
+    trimestres = trimestres[trimestres[COSTO] > 0]
+    trimestres["Rentabilidad (%)"] = ((trimestres[VENTAS] - trimestres[COSTO]) / trimestres[COSTO]) * 100
+    return trimestres
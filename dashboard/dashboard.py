@@ -1,104 +1,113 @@
 import streamlit as st # type: ignore
 import pandas as pd
 import os
-from sklearn.linear_model import LinearRegression
-import numpy as np
+import time
+import contextlib
+import functools
 import plotly.express as px
-
-
-def run_dashboard():
-    
-    # ======================
-    # Logo y título
-    # ======================
-    
-    current_dir = os.path.dirname(__file__)
-    image_path = os.path.join(current_dir, "images/LCG_logo.png")
-    st.image(image_path, width=1500) 
-
-    st.markdown(
-        """
-        <h1 style='text-align: center; color: #16a085; font-family: 'Montserrat', sans-serif; font-weight: bold;'>
-        LCG Business Case Dashboard
-        </h1>
-        """,
-    unsafe_allow_html=True) 
-
-    # ============================
-    # Cargar dataset
-    # ============================
-
-    # Cargar datos
-    @st.cache_data
-
-    def load_data():
-        current_dir = os.path.dirname(__file__)
-        file_path = os.path.join(current_dir, "data/BD.csv")
-        df = pd.read_csv(file_path)
-        df["Fecha"] = pd.to_datetime(df["Fecha"])
-        df["Trimestre"] = df["Fecha"].dt.to_period("Q").astype(str)
-        return df
-
-    df = load_data()
-
-    st.title("Análisis de datos de ventas")
-
-    # Función auxiliar para filtrar por año
-    def filtrar_por_anio(df, anio_input):
-        if anio_input == "2015":
-            return df[df["Año"] == 2015]
-        elif anio_input == "2016":
-            return df[df["Año"] == 2016]
-        else:
-            return df
-
+import plotly.graph_objects as go
+import afinidad
+import analitica
+import cubo as cb
+import distintos
+import graficas
+from cache import CacheCompartido
+import instrumentos
+import motores
+import pronostico
+import rentabilidad
+import tiempo
+
+
+# ============================
+# Cargar dataset
+# ============================
+
+# Caché de resultados derivados compartida por todas las sesiones del proceso
+@st.cache_resource
+def cache_compartido():
+    return CacheCompartido()
+
+
+# Cubo de agregados: se construye una vez por proceso y los paneles se responden desde él.
+# Los meses nuevos que llegan como particiones se suman sin recargar todo el histórico.
+# El motor (LCG_MOTOR) decide si el cubo vive en memoria (pandas) o dentro de
+# SQLite/DuckDB, donde cada consulta es un GROUP BY filtrado; el DataFrame de
+# transacciones no se guarda entre sesiones.
+@st.cache_resource
+def load_cubo():
+    return motores.cargar_datos(cache=cache_compartido())
+
+
+# ============================
+# Secciones
+# ============================
+# Cada sección es un fragmento con entradas explícitas: al cambiar uno de sus
+# widgets solo se vuelve a ejecutar esa sección y no toda la página. El tiempo
+# de la última ejecución de cada sección queda en st.session_state["tiempos_seccion"].
+# Con la instrumentación activa (solo admin) además se registran CPU, memoria,
+# filas recorridas, aciertos de caché y bytes y tiempo de envío de las gráficas
+# en st.session_state["instrumentacion"].
+
+def instrumentacion_activa():
+    return st.session_state.get("username") == "admin" and st.session_state.get("instrumentacion_activa", False)
+
+
+def medicion(nombre):
+    # Sin instrumentación activa es un contexto vacío
+    if not instrumentacion_activa():
+        return contextlib.nullcontext()
+    registros = st.session_state.setdefault("instrumentacion", [])
+    return instrumentos.medir(nombre, registros, st.session_state.get("ejecucion"), memoria=True)
+
+
+def seccion(funcion):
+    @st.fragment
+    @functools.wraps(funcion)
+    def fragmento(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            with medicion(funcion.__name__):
+                return funcion(*args, **kwargs)
+        finally:
+            st.session_state.setdefault("tiempos_seccion", {})[funcion.__name__] = time.perf_counter() - inicio
+    return fragmento
+
+
+def mostrar_grafica(datos, filtros, panel, figura, anio=None, **parametros):
+    # figura() solo se llama si no está en la caché; se registra el peso del JSON y lo que tarda en enviarse
+    grafica = graficas.memorizar(datos, filtros, panel, figura, anio, **parametros)
+    inicio = time.perf_counter()
+    st.plotly_chart(grafica.figura)
+    instrumentos.contar(graficas=1, payload_bytes=grafica.bytes, grafica_ms=(time.perf_counter() - inicio) * 1000)
+
+
+@seccion
+def pareto_departamentos(datos, filtros):
+    consultar = datos.consultador(filtros)
     st.header("Pareto ABC por Departamentos")
     anio1 = st.selectbox("Selecciona el año para análisis ABC por departamento:", ["Sin agrupar", "2015", "2016"], key="abc_depto")
-    df1 = filtrar_por_anio(df, anio1)
-    ventas_departamento = df1.groupby("Departamento - Clave")["Ventas Netas (USD)"].sum().sort_values(ascending=False)
-    ventas_total = ventas_departamento.sum()
-    ventas_acumuladas = ventas_departamento.cumsum()
-    porcentaje_acumulado = ventas_acumuladas / ventas_total
-
-    clasificacion = porcentaje_acumulado.apply(lambda x: "A" if x <= 0.8 else ("B" if x <= 0.95 else "C"))
-    ventas_departamento_df = pd.DataFrame({
-        "Departamento": ventas_departamento.index,
-        "Ventas": ventas_departamento.values,
-        "Clasificación": clasificacion.values
-    })
-
-    resumen_clasificacion = ventas_departamento_df.groupby("Clasificación").agg(
-        Monto_Ventas=("Ventas", "sum"),
-        Numero_Departamentos=("Departamento", "count")
-    ).reindex(["A", "B", "C"])  # Para mostrar en orden A, B, C
+    resumen_clasificacion = consultar(analitica.resumen_abc, anio1, dimension="departamento")
     st.subheader("Resumen por clasificación (A, B, C)")
     st.write(resumen_clasificacion)
 
+
+@seccion
+def pareto_clientes(datos, filtros):
+    consultar = datos.consultador(filtros)
     st.header("Pareto ABC por Clientes")
     anio_clientes = st.selectbox("Selecciona el año para análisis ABC por cliente:", ["Sin agrupar", "2015", "2016"], key="abc_cliente_pareto")
-    df_clientes = filtrar_por_anio(df, anio_clientes)
-    ventas_clientes_abc = df_clientes.groupby("Número de cliente")["Ventas Netas (USD)"].sum().sort_values(ascending=False)
-    ventas_total_clientes = ventas_clientes_abc.sum()
-    ventas_acumuladas_clientes = ventas_clientes_abc.cumsum()
-    porcentaje_acumulado_clientes = ventas_acumuladas_clientes / ventas_total_clientes
-
-    clasificacion_clientes = porcentaje_acumulado_clientes.apply(lambda x: "A" if x <= 0.8 else ("B" if x <= 0.95 else "C"))
-    ventas_clientes_df = pd.DataFrame({
-        "Cliente": ventas_clientes_abc.index,
-        "Ventas": ventas_clientes_abc.values,
-        "Clasificación": clasificacion_clientes.values
-    })
-
-    resumen_clasificacion_clientes = ventas_clientes_df.groupby("Clasificación").agg(
-        Monto_Ventas=("Ventas", "sum"),
-        Numero_Clientes=("Cliente", "count")
-    ).reindex(["A", "B", "C"])
+    resumen_clasificacion_clientes = consultar(analitica.resumen_abc, anio_clientes, dimension="cliente")
     st.subheader("Resumen por clasificación de clientes (A, B, C)")
     st.write(resumen_clasificacion_clientes)
+
+
+@seccion
+def top5_clientes(datos, filtros):
+    consultar = datos.consultador(filtros)
     st.subheader("Top 5 clientes que más compran")
     anio2 = st.selectbox("Selecciona el año:", ["Sin agrupar", "2015", "2016"], key="abc_clientes")
-    df2 = filtrar_por_anio(df, anio2)
-    ventas_clientes = df2.groupby("Número de cliente")["Ventas Netas (USD)"].sum().sort_values(ascending=False)
+    ventas_clientes = consultar(cb.ventas_por, anio2, dimension="Número de cliente")
     clientes_top5 = ventas_clientes.head(5)
     st.write("Aquí se muestran los clientes con más participación en el total de ventas por no. de cliente.")
     col1, col2 = st.columns(2)
@@ -107,81 +116,129 @@ def run_dashboard():
         st.write(clientes_top5)
 
     with col2:
-        custom_colors = ['#17a589', '#34495e', "#117a65", '#229954', "#d9e0e5", '#515a5a',]
-        total_ventas = ventas_clientes.sum()
-        top5_sum = clientes_top5.sum()
-        otros = total_ventas - top5_sum
-        pie_data = pd.DataFrame({
-            "Cliente": list(clientes_top5.index) + ["Otros"],
-            "Ventas": list(clientes_top5.values) + [otros]
-        })
-        fig = px.pie(pie_data, names="Cliente", values="Ventas", hole=0.3, color_discrete_sequence=custom_colors)
-        fig.update_layout(showlegend=True, height=350, width=350)
-        st.plotly_chart(fig)
-
+        def figura():
+            custom_colors = ['#17a589', '#34495e', "#117a65", '#229954', "#d9e0e5", '#515a5a',]
+            total_ventas = ventas_clientes.sum()
+            top5_sum = clientes_top5.sum()
+            otros = total_ventas - top5_sum
+            pie_data = pd.DataFrame({
+                "Cliente": list(clientes_top5.index) + ["Otros"],
+                "Ventas": list(clientes_top5.values) + [otros]
+            })
+            fig = px.pie(pie_data, names="Cliente", values="Ventas", hole=0.3, color_discrete_sequence=custom_colors)
+            fig.update_layout(showlegend=True, height=350, width=350)
+            return fig
+        mostrar_grafica(datos, filtros, "top5_clientes", figura, anio2)
+
+
+@seccion
+def vendedor_con_mas_clientes(datos, filtros):
+    consultar = datos.consultador(filtros)
     # Vendedor que le vende a más clientes
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Vendedor con más clientes atendidos")
         anio3 = st.selectbox("Selecciona el año:", ["2015", "2016"], key="vendedor")
-        df3 = filtrar_por_anio(df, anio3)
-        vendedor_clientes = df3.groupby("Número de Vendedor")["Número de cliente"].nunique()
-        vendedor_mas_clientes = vendedor_clientes.idxmax()
-        numero_clientes = vendedor_clientes.max()
-        st.write(f"Vendedor con más clientes: {int(vendedor_mas_clientes)}. \n \n Número de clientes: {numero_clientes}")
+        # Bitmaps de clientes por vendedor × mes, construidos una vez por versión y filtros
+        conteo = consultar(distintos.conteo_clientes)
+        mejor_vendedor = analitica.mas_clientes(conteo, anio3)
+        vendedor_mas_clientes = None
+        if mejor_vendedor is not None:
+            vendedor_mas_clientes, numero_clientes = mejor_vendedor
+            st.write(f"Vendedor con más clientes: {int(vendedor_mas_clientes)}. \n \n Número de clientes: {numero_clientes}")
+        else:
+            st.write("No hay datos para mostrar.")
 
     with col2:
-        if "vendedor_mas_clientes" in locals():
-            df_vendedor = df3[df3["Número de Vendedor"] == vendedor_mas_clientes]
-            clientes_por_mes = df_vendedor.groupby(["Año", "Mes"])["Número de cliente"].nunique().reset_index()
-            meses_dict = {1: " Enero" , 2: " Febrero" , 3: " Marzo" , 4: " Abril" , 5: " Mayo" , 6: " Junio" , 7: " Julio" , 8: " Agosto" , 9: " Septiembre" , 10: " Octubre" , 11: " Noviembre" , 12: " Diciembre" }
-            clientes_por_mes["Mes "] = clientes_por_mes["Mes"].map(meses_dict)
-            fig = px.bar(
-                clientes_por_mes,
-                x="Mes ",
-                y="Número de cliente",
-                labels={"Mes ": "Mes ", "Número de cliente": "Clientes únicos "},
-                title="Clientes únicos atendidos por mes",
-                color_discrete_sequence=["#16a085"]
-            )
-            fig.update_layout(xaxis_tickangle=-45, height=350, width=700)
-            st.plotly_chart(fig)
+        if vendedor_mas_clientes is not None:
+            def figura():
+                clientes_por_mes = conteo.contar(
+                    ["Año", "Mes"], anio3, miembros={distintos.VENDEDOR: [vendedor_mas_clientes]}
+                ).reset_index()
+                meses_dict = {1: " Enero" , 2: " Febrero" , 3: " Marzo" , 4: " Abril" , 5: " Mayo" , 6: " Junio" , 7: " Julio" , 8: " Agosto" , 9: " Septiembre" , 10: " Octubre" , 11: " Noviembre" , 12: " Diciembre" }
+                clientes_por_mes["Mes "] = clientes_por_mes["Mes"].map(meses_dict)
+                fig = px.bar(
+                    clientes_por_mes,
+                    x="Mes ",
+                    y="Número de cliente",
+                    labels={"Mes ": "Mes ", "Número de cliente": "Clientes únicos "},
+                    title="Clientes únicos atendidos por mes",
+                    color_discrete_sequence=["#16a085"]
+                )
+                fig.update_layout(xaxis_tickangle=-45, height=350, width=700)
+                return fig
+            mostrar_grafica(datos, filtros, "clientes_por_mes", figura, anio3, vendedor=int(vendedor_mas_clientes))
         else:
             st.write("No hay datos para mostrar la gráfica.")
 
-    st.header("Análisis de tendencia de ventas")
-    ventas_por_mes = df.groupby(["Año", "Mes"])["Ventas Netas (USD)"].sum().reset_index()
-    ventas_por_mes["Mes_str"] = ventas_por_mes["Año"].astype(str) + "-" + ventas_por_mes["Mes"].astype(str).str.zfill(2)
 
-    col1, col2 = st.columns(2)
+@seccion
+def venta_cruzada(datos, filtros):
+    consultar = datos.consultador(filtros)
+    expansor = st.expander("Venta cruzada y afinidad de familias", key="exp_afinidad", on_change="rerun")
+    if not expansor.open:
+        return
+    with expansor:
+        # Matriz dispersa cliente × familia, una por versión del dataset y filtros
+        analisis = consultar(afinidad.construir_afinidad)
+        if not len(analisis.clientes):
+            st.write("No hay datos para mostrar.")
+            return
+
+        st.subheader("Familias que se compran juntas")
+        familia = st.selectbox("Familia:", list(analisis.familias), key="afin_familia")
+        st.dataframe(
+            analisis.familias_afines(familia), hide_index=True,
+            column_config={"Confianza (%)": st.column_config.NumberColumn(format="%.2f%%")}
+        )
+
+        st.subheader("Venta cruzada por cliente")
+        cliente = st.selectbox("Cliente:", list(analisis.clientes), key="afin_cliente")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("Familias que no compra y compran clientes afines")
+            st.dataframe(analisis.recomendar(cliente), hide_index=True)
+        with col2:
+            st.write("Clientes con compras parecidas")
+            st.dataframe(analisis.similares(cliente), hide_index=True)
+
+        st.subheader("Clientes parecidos a los clientes A")
+        st.dataframe(consultar(afinidad.parecidos_clase_a), hide_index=True)
+
 
+@seccion
+def mes_con_mas_ventas(datos, filtros):
+    consultar = datos.consultador(filtros)
     opciones_anio = ["Sin agrupar", 2015, 2016]
-    with col1:
-        st.subheader("Mes con más ventas")
-        anio_max = st.selectbox("Selecciona el año:", opciones_anio, key="mes_max")
-        if anio_max == "Sin agrupar":
-            data = ventas_por_mes
-        else:
-            data = ventas_por_mes[ventas_por_mes["Año"] == anio_max]
-        if not data.empty:
-            mes_max = data.loc[data["Ventas Netas (USD)"].idxmax()]
-            st.write(f"Mes número {mes_max['Mes']} con ${mes_max['Ventas Netas (USD)']:,.2f}")
-        else:
-            st.write("No hay datos para mostrar.")
+    st.subheader("Mes con más ventas")
+    anio_max = st.selectbox("Selecciona el año:", opciones_anio, key="mes_max")
+    mes_max = consultar(analitica.mes_extremo, anio_max, extremo="max")
+    if mes_max is not None:
+        _, mes, ventas = mes_max
+        st.write(f"Mes número {mes} con ${ventas:,.2f}")
+    else:
+        st.write("No hay datos para mostrar.")
+
+
+@seccion
+def mes_con_menos_ventas(datos, filtros):
+    consultar = datos.consultador(filtros)
+    opciones_anio = ["Sin agrupar", 2015, 2016]
+    st.subheader("Mes con menos ventas")
+    anio_min = st.selectbox("Selecciona el año:", opciones_anio, key="mes_min")
+    mes_min = consultar(analitica.mes_extremo, anio_min, extremo="min")
+    if mes_min is not None:
+        _, mes, ventas = mes_min
+        st.write(f"Mes número {mes} con ${ventas:,.2f}")
+    else:
+        st.write("No hay datos para mostrar.")
 
-    with col2:
-        st.subheader("Mes con menos ventas")
-        anio_min = st.selectbox("Selecciona el año:", opciones_anio, key="mes_min")
-        if anio_min == "Sin agrupar":
-            data = ventas_por_mes
-        else:
-            data = ventas_por_mes[ventas_por_mes["Año"] == anio_min]
-        if not data.empty:
-            mes_min = data.loc[data["Ventas Netas (USD)"].idxmin()]
-            st.write(f"Mes número {mes_min['Mes']} con ${mes_min['Ventas Netas (USD)']:,.2f}")
-        else:
-            st.write("No hay datos para mostrar.")
 
+@seccion
+def ventas_mensuales_destacadas(datos, filtros):
+    consultar = datos.consultador(filtros)
+    ventas_por_mes = consultar(cb.ventas_mensuales)
+    opciones_anio = ["Sin agrupar", 2015, 2016]
     # Gráfica de barras coloreando el mes con más ventas y el mes con menos ventas
     st.subheader("Ventas mensuales destacando máximos y mínimos")
     # Selección de año para la gráfica
@@ -192,282 +249,500 @@ def run_dashboard():
         data_graf = ventas_por_mes[ventas_por_mes["Año"] == anio_graf].copy()
 
     if not data_graf.empty:
-        idx_max = data_graf["Ventas Netas (USD)"].idxmax()
-        idx_min = data_graf["Ventas Netas (USD)"].idxmin()
-        # Color por barra
-        colors = []
-        for idx, row in data_graf.iterrows(): # row me sirve para iterar sobre las filas y poner colores diferentes
-            if idx == idx_max:
-                colors.append("#16a085")  # Verde para máximo
-            elif idx == idx_min:
-                colors.append("red")      # Rojo para mínimo
-            else:
-                colors.append("gray")     # Gris para el resto
-
-        fig_bar = px.bar(
-            data_graf,
-            x="Mes_str",
-            y="Ventas Netas (USD)",
-            title="Ventas mensuales",
-        )
-        # Asignar colores manualmente
-        fig_bar.update_traces(marker_color=colors)
-        fig_bar.update_layout(
-            xaxis_title="Mes",
-            yaxis_title="Ventas Netas (USD)",
-            showlegend=False,
-            height=400,
-            width=800
-        )
-        st.plotly_chart(fig_bar)
+        def figura():
+            fig_bar = px.bar(
+                data_graf,
+                x="Mes_str",
+                y="Ventas Netas (USD)",
+                title="Ventas mensuales",
+            )
+            # Color por barra: máximo en verde, mínimo en rojo y el resto en gris
+            fig_bar.update_traces(marker_color=graficas.colores_extremos(data_graf["Ventas Netas (USD)"]))
+            fig_bar.update_layout(
+                xaxis_title="Mes",
+                yaxis_title="Ventas Netas (USD)",
+                showlegend=False,
+                height=400,
+                width=800
+            )
+            return fig_bar
+        mostrar_grafica(datos, filtros, "ventas_mensuales", figura, anio_graf)
     else:
         st.write("No hay datos para mostrar la gráfica.")
 
-    st.subheader("Porcentaje de crecimiento en ventas anual")
-    ventas_anuales = df.groupby("Año")["Ventas Netas (USD)"].sum()
-    if 2015 in ventas_anuales and 2016 in ventas_anuales:
-        crecimiento = ((ventas_anuales[2016] - ventas_anuales[2015]) / ventas_anuales[2015]) * 100
-        st.write(f"Crecimiento de 2015 a 2016: {crecimiento:.2f}%")
-    # Serie de tiempo: Ventas mensuales
-    ventas_ts = ventas_por_mes.copy()
-    ventas_ts["Fecha"] = pd.to_datetime(ventas_ts["Año"].astype(str) + "-" + ventas_ts["Mes"].astype(str).str.zfill(2) + "-01")
-    ventas_ts = ventas_ts.sort_values("Fecha")
-
-    # Identificación de tendencia (regresión lineal simple)
-    ventas_ts["Mes_ordinal"] = np.arange(len(ventas_ts))
-    X = ventas_ts[["Mes_ordinal"]]
-    y = ventas_ts["Ventas Netas (USD)"]
-    model = LinearRegression()
-    model.fit(X, y)
-    ventas_ts["Tendencia"] = model.predict(X)
-
-    fig_trend = px.line(
-        ventas_ts,
-        x="Fecha",
-        y=["Ventas Netas (USD)", "Tendencia"],
-        labels={"value": "USD", "variable": "Serie"},
-        title="Tendencia de ventas mensuales", 
-        line_shape="spline", 
-        markers=False
-    )
-    fig_trend.update_traces(
-        line=dict(color="#16a085"), 
-        selector=dict(name="Ventas Netas (USD)")
-    )
-    fig_trend.update_traces(
-        line=dict(color="#d9e0e5"), 
-        selector=dict(name="Tendencia")
-    )
-    fig_trend.update_layout(showlegend=False)
-    st.plotly_chart(fig_trend)
-
-    # Estacionalidad: Promedio por mes del año
-    st.subheader("Estacionalidad: Promedio de ventas por mes")
-    ventas_estacionalidad = ventas_ts.groupby(ventas_ts["Fecha"].dt.month)["Ventas Netas (USD)"].mean()
-    meses_dict = {1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio", 7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"}
-    ventas_estacionalidad.index = ventas_estacionalidad.index.map(meses_dict)
-
-    # Colorear barras: máximo en verde, mínimo en rojo, resto en gris
-    idx_max = ventas_estacionalidad.values.argmax()
-    idx_min = ventas_estacionalidad.values.argmin()
-    colors = []
-    for i in range(len(ventas_estacionalidad)):
-        if i == idx_max:
-            colors.append("#16a085")  # Verde para máximo
-        elif i == idx_min:
-            colors.append("red")      # Rojo para mínimo
-        else:
-            colors.append("gray")     # Gris para el resto
-
-    fig_est = px.bar(
-        x=ventas_estacionalidad.index,
-        y=ventas_estacionalidad.values,
-        labels={"x": "Mes", "y": "Ventas promedio (USD)"},
-        title="Estacionalidad: Ventas promedio por mes"
-    )
-    fig_est.update_traces(marker_color=colors)
-
-    # Línea punteada con el promedio de todos los meses
-    promedio_total = ventas_estacionalidad.mean()
-    fig_est.add_hline(
-        y=promedio_total,
-        line_dash="dot",
-        line_color="#d9e0e5",
-        annotation_text=f"Promedio: ${promedio_total:,.2f}",
-        annotation_position="top left",
-        annotation_font_color="#d9e0e5"
-    )
-
-    st.plotly_chart(fig_est)
-
-    # Análisis de crecimiento: tasa de crecimiento mensual promedio
-    st.subheader("Crecimiento mensual promedio")
-    ventas_ts["Crecimiento (%)"] = ventas_ts["Ventas Netas (USD)"].pct_change() * 100
-    crecimiento_mensual_prom = ventas_ts["Crecimiento (%)"].mean()
-    st.write(f"Crecimiento mensual promedio: {crecimiento_mensual_prom:.2f}%")
-
-    # Colorear barras
-    colors = []
-    for val in ventas_ts["Crecimiento (%)"]:
-        if pd.isna(val):
-            colors.append("gray")
-        elif val <= -50:
-            colors.append("red")
-        elif val >= 50:
-            colors.append("#16a085")
-        else:
-            colors.append("gray")
 
-    fig_crec = px.bar(
-        ventas_ts,
-        x="Fecha",
-        y="Crecimiento (%)",
-        title="Tasa de crecimiento mensual (%)"
-    )
-    fig_crec.update_traces(marker_color=colors)
-    st.plotly_chart(fig_crec)
+@seccion
+def tendencia_y_estacionalidad(datos, filtros):
+    consultar = datos.consultador(filtros)
+    # Debajo del pliegue: solo se calcula cuando el usuario abre la sección
+    expansor = st.expander("Crecimiento, tendencia y estacionalidad", key="exp_tendencia", on_change="rerun")
+    if not expansor.open:
+        return
+    with expansor:
+        st.subheader("Porcentaje de crecimiento en ventas anual")
+        # Cada año contra el anterior, desde el índice de tiempo con solo el total
+        for (anterior, anio), crecimiento in consultar(tiempo.indice_mensual, dimensiones=()).crecimiento_anual().items():
+            st.write(f"Crecimiento de {anterior} a {anio}: {crecimiento:.2f}%")
+        # Serie de tiempo: Ventas mensuales
+        # Copia local: la serie en caché es compartida y aquí se le agregan columnas
+        ventas_ts = consultar(cb.serie_mensual).copy()
+        if ventas_ts.empty:
+            st.write("No hay datos para mostrar.")
+            return
+
+        # Identificación de tendencia (regresión lineal simple)
+        ventas_ts["Tendencia"] = pronostico.tendencia_lineal(ventas_ts["Ventas Netas (USD)"])
+
+        def figura_tendencia():
+            fig_trend = px.line(
+                graficas.reducir(ventas_ts, "Fecha", ["Ventas Netas (USD)", "Tendencia"]),
+                x="Fecha",
+                y=["Ventas Netas (USD)", "Tendencia"],
+                labels={"value": "USD", "variable": "Serie"},
+                title="Tendencia de ventas mensuales", 
+                line_shape="spline", 
+                markers=False
+            )
+            fig_trend.update_traces(
+                line=dict(color="#16a085"), 
+                selector=dict(name="Ventas Netas (USD)")
+            )
+            fig_trend.update_traces(
+                line=dict(color="#d9e0e5"), 
+                selector=dict(name="Tendencia")
+            )
+            fig_trend.update_layout(showlegend=False)
+            return graficas.webgl(fig_trend)
+        mostrar_grafica(datos, filtros, "tendencia", figura_tendencia)
+
+        # Estacionalidad: Promedio por mes del año
+        st.subheader("Estacionalidad: Promedio de ventas por mes")
+        ventas_estacionalidad = ventas_ts.groupby(ventas_ts["Fecha"].dt.month)["Ventas Netas (USD)"].mean()
+        meses_dict = {1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio", 7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"}
+        ventas_estacionalidad.index = ventas_estacionalidad.index.map(meses_dict)
+
+        def figura_estacionalidad():
+            fig_est = px.bar(
+                x=ventas_estacionalidad.index,
+                y=ventas_estacionalidad.values,
+                labels={"x": "Mes", "y": "Ventas promedio (USD)"},
+                title="Estacionalidad: Ventas promedio por mes"
+            )
+            # Colorear barras: máximo en verde, mínimo en rojo, resto en gris
+            fig_est.update_traces(marker_color=graficas.colores_extremos(ventas_estacionalidad.values))
+
+            # Línea punteada con el promedio de todos los meses
+            promedio_total = ventas_estacionalidad.mean()
+            fig_est.add_hline(
+                y=promedio_total,
+                line_dash="dot",
+                line_color="#d9e0e5",
+                annotation_text=f"Promedio: ${promedio_total:,.2f}",
+                annotation_position="top left",
+                annotation_font_color="#d9e0e5"
+            )
+            return fig_est
+        mostrar_grafica(datos, filtros, "estacionalidad", figura_estacionalidad)
+
+        # Análisis de crecimiento: tasa de crecimiento mensual promedio
+        st.subheader("Crecimiento mensual promedio")
+        ventas_ts["Crecimiento (%)"] = ventas_ts["Ventas Netas (USD)"].pct_change() * 100
+        crecimiento_mensual_prom = ventas_ts["Crecimiento (%)"].mean()
+        st.write(f"Crecimiento mensual promedio: {crecimiento_mensual_prom:.2f}%")
+
+        def figura_crecimiento():
+            fig_crec = px.bar(
+                ventas_ts,
+                x="Fecha",
+                y="Crecimiento (%)",
+                title="Tasa de crecimiento mensual (%)"
+            )
+            # Colorear barras: caídas de 50% o más en rojo, alzas de 50% o más en verde
+            fig_crec.update_traces(marker_color=graficas.colores_umbral(ventas_ts["Crecimiento (%)"], -50, 50))
+            return fig_crec
+        mostrar_grafica(datos, filtros, "crecimiento_mensual", figura_crecimiento)
+
+
+@seccion
+def comparativo_por_fechas(datos, filtros):
+    consultar = datos.consultador(filtros)
+    expansor = st.expander("Comparativo por rango de fechas y ventanas móviles", key="exp_rangos", on_change="rerun")
+    if not expansor.open:
+        return
+    with expansor:
+        # Un índice por versión del dataset, filtros y desglose; cada cambio de rango son
+        # dos lecturas por miembro. El eje de meses sale del índice de totales
+        totales = consultar(tiempo.indice_mensual, dimensiones=())
+        if totales.n == 0:
+            st.write("No hay datos para mostrar.")
+            return
+        # El cubo es mensual: el rango se elige por meses completos, no por días
+        meses = list(totales.fechas().date)
+        inicio_anio = max(meses[0], meses[-1].replace(month=1))
+
+        st.subheader("Ventas en un rango de meses")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            primero, ultimo = st.select_slider(
+                "Rango de meses:", meses, (inicio_anio, meses[-1]), format_func=lambda mes: f"{mes:%Y-%m}",
+                key="rango_meses"
+            )
+        with col2:
+            dimension = st.selectbox("Desglose:", ["Total"] + list(tiempo.DIMENSIONES), key="rango_dimension")
+        with col3:
+            referencia = st.radio(
+                "Comparar contra:", tiempo.REFERENCIAS, key="rango_referencia",
+                format_func={"anio": "Mismo rango del año anterior", "periodo": "Periodo anterior"}.get
+            )
+        desde, hasta = pd.Timestamp(primero), pd.Timestamp(ultimo) + pd.offsets.MonthEnd(0)
+        dimension = None if dimension == "Total" else dimension
+        indice = totales if dimension is None else consultar(tiempo.indice_mensual, dimensiones=(dimension,))
+
+        comparativo = indice.comparar(desde, hasta, dimension, referencia)
+        total = comparativo[["Actual", "Anterior"]].sum()
+        previo_desde, previo_hasta = indice.anterior(desde, hasta, referencia)
+        variacion = (total["Actual"] - total["Anterior"]) / total["Anterior"] * 100 if total["Anterior"] else None
+        st.metric(
+            f"Ventas de {desde:%Y-%m} a {hasta:%Y-%m}", f"${total['Actual']:,.2f}",
+            f"{variacion:.2f}% vs. {previo_desde:%Y-%m} a {previo_hasta:%Y-%m}" if variacion is not None else None
+        )
+        if dimension is not None:
+            st.dataframe(
+                comparativo[comparativo[["Actual", "Anterior"]].any(axis=1)].sort_values("Actual", ascending=False),
+                column_config={"Variación (%)": st.column_config.NumberColumn(format="%.2f%%")}
+            )
+
+        st.subheader("Ventanas móviles")
+        miembro = None
+        if dimension is not None:
+            miembro = st.selectbox("Serie:", list(indice.miembros[dimension]), key="rango_miembro")
+
+        def figura():
+            moviles = indice.moviles(dimension=dimension, miembro=miembro)
+            moviles = moviles[(moviles.index >= desde) & (moviles.index <= hasta)]
+            fig = px.line(
+                graficas.reducir(moviles, None, list(moviles.columns)),
+                labels={"index": "Mes", "value": "Ventas Netas (USD)", "variable": "Ventana"},
+                title="Ventas acumuladas de los últimos 3, 6 y 12 meses"
+            )
+            return graficas.webgl(fig)
+        mostrar_grafica(
+            datos, filtros, "ventanas_moviles", figura,
+            desde=str(desde), hasta=str(hasta), dimension=dimension, miembro=miembro
+        )
 
 
-    st.header("Análisis de rentabilidad del portafolio")
+@seccion
+def pronostico_ventas(datos, filtros):
+    consultar = datos.consultador(filtros)
+    # Debajo del pliegue: los modelos de cada dimensión se ajustan una vez por versión del dataset
+    expansor = st.expander("Pronóstico de ventas por departamento, familia, cliente o vendedor", key="exp_pronostico", on_change="rerun")
+    if not expansor.open:
+        return
+    with expansor:
+        st.subheader("Pronóstico de ventas")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            dimension = st.selectbox("Dimensión:", ["Total"] + list(pronostico.DIMENSIONES), key="pron_dimension")
+        dimension = None if dimension == "Total" else dimension
+        modelo = consultar(pronostico.ajustar, dimension=dimension)
+        if len(modelo.periodos) < 3:
+            st.write("No hay datos suficientes para el pronóstico.")
+            return
+        with col2:
+            miembro = st.selectbox("Serie:", list(modelo.miembros), key="pron_miembro")
+        with col3:
+            horizonte = st.slider("Meses a pronosticar:", 1, 12, pronostico.HORIZONTE, key="pron_horizonte")
+
+        def figura():
+            serie = modelo.serie(miembro, horizonte)
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=pd.concat([serie["Fecha"], serie["Fecha"][::-1]]),
+                y=pd.concat([serie["Superior"], serie["Inferior"][::-1]]),
+                fill="toself", fillcolor="rgba(22, 160, 133, 0.2)", line=dict(width=0),
+                name=f"Intervalo {int(pronostico.NIVEL * 100)}%", hoverinfo="skip"
+            ))
+            fig.add_trace(go.Scatter(x=serie["Fecha"], y=serie["Ventas Netas (USD)"], name="Ventas", line=dict(color="#16a085")))
+            fig.add_trace(go.Scatter(x=serie["Fecha"], y=serie["Ajuste"], name="Ajuste", line=dict(color="#d9e0e5")))
+            fig.add_trace(go.Scatter(x=serie["Fecha"], y=serie["Pronóstico"], name="Pronóstico", line=dict(color="#16a085", dash="dot")))
+            fig.update_layout(title="Ventas, ajuste y pronóstico", xaxis_title="Mes", yaxis_title="Ventas Netas (USD)", height=400, width=800)
+            return graficas.webgl(fig)
+        mostrar_grafica(datos, filtros, "pronostico", figura, dimension=dimension, miembro=miembro, horizonte=horizonte)
+
+        # Backtest de origen móvil: se ajusta sin los últimos meses y se compara contra lo real
+        errores = consultar(pronostico.evaluar, dimension=dimension)
+        error_serie = errores.loc[miembro, "WAPE (%)"]
+        st.write(
+            f"Error del backtest (WAPE) para esta serie: {error_serie:.2f}%. "
+            f"Mediana de todas las series de la dimensión: {errores['WAPE (%)'].median():.2f}%"
+        )
+        st.caption(
+            f"{len(modelo.miembros):,} series ajustadas en {modelo.segundos_ajuste * 1000:.1f} ms "
+            f"({modelo.series_por_segundo:,.0f} series/s)"
+        )
 
+
+@seccion
+def rentabilidad_mes_anio(datos, filtros):
+    consultar = datos.consultador(filtros)
+    # Años y meses disponibles con los filtros actuales
+    periodos = consultar(cb.ventas_mensuales)
     st.subheader("Rentabilidad por mes y año")
-    anio_rent = st.selectbox("Selecciona el año:", sorted(df["Año"].unique()), key="anio_rent")
+    if periodos.empty:
+        st.write("Datos insuficientes")
+        return
+    anio_rent = st.selectbox("Selecciona el año:", sorted(periodos["Año"].unique()), key="anio_rent")
     meses_dict = {1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio", 7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"}
-    meses_disp = sorted(df[df["Año"] == anio_rent]["Mes"].unique())
+    meses_disp = sorted(periodos[periodos["Año"] == anio_rent]["Mes"].unique())
     mes_rent = st.selectbox("Selecciona el mes:", [meses_dict[m] for m in meses_disp], key="mes_rent")
     mes_num = [k for k, v in meses_dict.items() if v == mes_rent][0]
-    df_mes = df[(df["Año"] == anio_rent) & (df["Mes"] == mes_num)]
-    ventas = df_mes["Ventas Netas (USD)"].sum()
-    costo = df_mes["Costo (USD)"].sum()
-    rentabilidad = ((ventas - costo) / costo) * 100 if costo > 0 else None
+    rentabilidad = consultar(cb.rentabilidad_mes, anio_rent, mes=mes_num)
     st.write(f"Rentabilidad en {mes_rent} {anio_rent}: {rentabilidad:.2f}%" if rentabilidad is not None else "Datos insuficientes")
 
+
+@seccion
+def trimestre_menor_rentabilidad(datos, filtros):
+    consultar = datos.consultador(filtros)
     st.subheader("Trimestre con menor rentabilidad")
     anio4 = st.selectbox("Selecciona el año:", ["2015", "2016"], key="trimestre")
-    df4 = filtrar_por_anio(df, anio4)
-    rent_trimestre = df4.groupby("Trimestre").agg({"Ventas Netas (USD)": "sum", "Costo (USD)": "sum"})
-    rent_trimestre = rent_trimestre[rent_trimestre["Costo (USD)"] > 0]
-    rent_trimestre["Rentabilidad (%)"] = ((rent_trimestre["Ventas Netas (USD)"] - rent_trimestre["Costo (USD)"]) / rent_trimestre["Costo (USD)"]) * 100
-    if not rent_trimestre.empty:
-        peor_trim = rent_trimestre["Rentabilidad (%)"].idxmin()
-        peor_valor = rent_trimestre["Rentabilidad (%)"].min()
+    rent_trimestre = consultar(cb.rentabilidad_trimestral, anio4)
+    peor = consultar(analitica.peor_trimestre, anio4)
+    if peor is not None:
+        peor_trim, peor_valor = peor
         st.write(f"Trimestre más bajo: {peor_trim} con rentabilidad de {peor_valor:.2f}%")
-        fig_trim = px.bar(
-            rent_trimestre.reset_index(),
-            x="Trimestre",
-            y="Rentabilidad (%)",
-            title="Rentabilidad por trimestre",
-            color_discrete_sequence=["#16a085"]
-        )
-        st.plotly_chart(fig_trim)
+        def figura():
+            return px.bar(
+                rent_trimestre.reset_index(),
+                x="Trimestre",
+                y="Rentabilidad (%)",
+                title="Rentabilidad por trimestre",
+                color_discrete_sequence=["#16a085"]
+            )
+        mostrar_grafica(datos, filtros, "rentabilidad_trimestral", figura, anio4)
     else:
         st.write("Datos insuficientes para calcular rentabilidad por trimestre")
 
-    st.subheader("Cliente menos rentable")
-    opciones_cliente = [2015, 2016]
-    anio_cliente = st.selectbox("Selecciona el año:", opciones_cliente, key="cliente_menos_rentable")
-    if anio_cliente == "Sin agrupar":
-        df_cliente = df.copy()
-    else:
-        df_cliente = df[df["Año"] == anio_cliente]
-
-    rent_clientes = df_cliente.groupby(["Número de cliente", "Año"]).agg({"Ventas Netas (USD)": "sum", "Costo (USD)": "sum"})
-    rent_clientes = rent_clientes[rent_clientes["Costo (USD)"] > 0]
-    rent_clientes["Rentabilidad"] = ((rent_clientes["Ventas Netas (USD)"] - rent_clientes["Costo (USD)"]) / rent_clientes["Costo (USD)"]) * 100
-    if not rent_clientes.empty:
-        idx_peor = rent_clientes["Rentabilidad"].idxmin()
-        peor_cliente = idx_peor[0]
-        peor_anio = idx_peor[1]
-        peor_valor = rent_clientes.loc[idx_peor, "Rentabilidad"]
-        st.write(f"Cliente: {peor_cliente}, Rentabilidad: {peor_valor:.2f}%")
-
-        df_graf = df_cliente #df[df["Año"] == peor_anio]
-        ventas_totales_mes = df_graf.groupby(["Año", "Mes"])["Ventas Netas (USD)"].sum().reset_index()
-        ventas_cliente_mes = df_graf[df_graf["Número de cliente"] == peor_cliente].groupby(["Año", "Mes"])["Ventas Netas (USD)"].sum().reset_index()
-        ventas_totales_mes["Mes_str"] = ventas_totales_mes["Año"].astype(str) + "-" + ventas_totales_mes["Mes"].astype(str).str.zfill(2)
-        ventas_cliente_mes = ventas_totales_mes.merge(
-            ventas_cliente_mes, on=["Año", "Mes"], how="left", suffixes=("", "_cliente")
-        )
-        ventas_cliente_mes["Ventas Netas (USD)_cliente"] = ventas_cliente_mes["Ventas Netas (USD)_cliente"].fillna(0)
-
-        import plotly.graph_objects as go
-        fig = go.Figure()
-        # Barras de fondo: ventas totales
-        fig.add_trace(go.Bar(
-            x=ventas_cliente_mes["Mes_str"],
-            y=ventas_cliente_mes["Ventas Netas (USD)"],
-            name="Ventas totales",
-            marker_color="gray"
-        ))
-        # Barras superpuestas: ventas del cliente menos rentable
-        fig.add_trace(go.Bar(
-            x=ventas_cliente_mes["Mes_str"],
-            y=ventas_cliente_mes["Ventas Netas (USD)_cliente"],
-            name=f"Ventas cliente {peor_cliente}",
-            marker_color="red"
-        ))
-        fig.update_layout(
-            barmode="overlay",
-            title=f"Ventas mensuales del cliente menos rentable ({peor_cliente}) vs ventas totales",
-            xaxis_title="Mes",
-            yaxis_title="Ventas Netas (USD)",
-            height=400,
-            width=800, 
-            showlegend=False
-        )
-        fig.update_traces(opacity=0.85)
-        st.plotly_chart(fig)
-    else:
-        st.write("No hay datos suficientes para calcular rentabilidad por cliente")
-
-    # Gráfica: ventas del cliente menos rentable vs ventas totales (excluyendo clientes en cuartiles 2, 3 y 4 de rentabilidad)
-
-    if not rent_clientes.empty:
-            # Calcular cuartiles de rentabilidad
-        rentabilidades = rent_clientes["Rentabilidad"].sort_values()
-        q1 = rentabilidades.quantile(0.25)
-        # Filtrar clientes en el primer cuartil (los menos rentables)
-        clientes_q1 = rent_clientes[rent_clientes["Rentabilidad"] <= q1].index.get_level_values(0).unique()
-        # Filtrar datos solo para clientes en el primer cuartil
-        df_q1 = df_cliente[df_cliente["Número de cliente"].isin(clientes_q1)]
-
-            # Ventas totales por mes (solo clientes Q1)
-        ventas_totales_mes_q1 = df_q1.groupby(["Año", "Mes"])["Ventas Netas (USD)"].sum().reset_index()
-            # Ventas del cliente menos rentable por mes
-        ventas_cliente_mes_q1 = df_q1[df_q1["Número de cliente"] == peor_cliente].groupby(["Año", "Mes"])["Ventas Netas (USD)"].sum().reset_index()
-        ventas_totales_mes_q1["Mes_str"] = ventas_totales_mes_q1["Año"].astype(str) + "-" + ventas_totales_mes_q1["Mes"].astype(str).str.zfill(2)
-        ventas_cliente_mes_q1 = ventas_totales_mes_q1.merge(
-            ventas_cliente_mes_q1, on=["Año", "Mes"], how="left", suffixes=("", "_cliente")
-        )
-        ventas_cliente_mes_q1["Ventas Netas (USD)_cliente"] = ventas_cliente_mes_q1["Ventas Netas (USD)_cliente"].fillna(0)
-
-        import plotly.graph_objects as go
-        fig_q1 = go.Figure()
-            # Barras de fondo: ventas totales Q1
-        fig_q1.add_trace(go.Bar(
-            x=ventas_cliente_mes_q1["Mes_str"],
-            y=ventas_cliente_mes_q1["Ventas Netas (USD)"],
-            name="Ventas totales Q1",
-            marker_color="gray"
-        ))
-            # Barras superpuestas: ventas del cliente menos rentable
-        fig_q1.add_trace(go.Bar(
-            x=ventas_cliente_mes_q1["Mes_str"],
-            y=ventas_cliente_mes_q1["Ventas Netas (USD)_cliente"],
-            name=f"Ventas cliente {peor_cliente}",
-            marker_color="red"
-        ))
-        st.write("Para una comparación visual más sencilla, se muestra a continuación la comparación del aporta a las ventas del cliente menos rentable. En este caso, solo comparando con el 25% de los clientes con menor aportación.")
-        fig_q1.update_layout(
-            barmode="overlay",
-            title=f"Ventas mensuales cliente menos rentable (no. {int(peor_cliente)}) vs otros clientes poco rentables",
-            xaxis_title="Mes",
-            yaxis_title="Ventas Netas (USD)",
-            height=400,
-            width=800,
-            showlegend=False
-        )
-        fig_q1.update_traces(opacity=0.85)
-        st.plotly_chart(fig_q1)
-    else:
-        st.write("No hay datos suficientes para calcular la gráfica de cuartiles de rentabilidad.")
+
+@seccion
+def cliente_menos_rentable(datos, filtros):
+    consultar = datos.consultador(filtros)
+    # Debajo del pliegue: solo se calcula cuando el usuario abre la sección
+    expansor = st.expander("Cliente menos rentable", key="exp_cliente_menos_rentable", on_change="rerun")
+    if not expansor.open:
+        return
+    with expansor:
+        st.subheader("Cliente menos rentable")
+        opciones_cliente = [2015, 2016]
+        anio_cliente = st.selectbox("Selecciona el año:", opciones_cliente, key="cliente_menos_rentable")
+        # Márgenes, cuartiles y series mensuales de todos los clientes, calculados una vez por versión
+        analisis = consultar(rentabilidad.construir)
+        peor = analisis.peor_cliente(anio_cliente)
+        if peor is not None:
+            peor_cliente, peor_anio, peor_valor = peor
+            st.write(f"Cliente: {peor_cliente}, Rentabilidad: {peor_valor:.2f}%")
+
+            # Selector de cliente: cada detalle es una consulta O(meses) sobre la estructura ya calculada
+            rent_clientes = analisis.rentabilidad_clientes(anio_cliente).sort_values("Rentabilidad")
+            clientes_ordenados = list(rent_clientes.index.get_level_values(0))
+            cliente_sel = st.selectbox(
+                "Cliente a comparar (ordenados de menor a mayor rentabilidad):",
+                clientes_ordenados, index=0, key="cliente_drilldown"
+            )
+            if cliente_sel == peor_cliente:
+                descripcion = f"del cliente menos rentable ({peor_cliente})"
+            else:
+                descripcion = f"del cliente {cliente_sel}"
+
+            def figura():
+                ventas_cliente_mes = analisis.comparativo(cliente_sel, anio_cliente)
+                fig = go.Figure()
+                # Barras de fondo: ventas totales
+                fig.add_trace(go.Bar(
+                    x=ventas_cliente_mes["Mes_str"],
+                    y=ventas_cliente_mes["Ventas Netas (USD)"],
+                    name="Ventas totales",
+                    marker_color="gray"
+                ))
+                # Barras superpuestas: ventas del cliente seleccionado
+                fig.add_trace(go.Bar(
+                    x=ventas_cliente_mes["Mes_str"],
+                    y=ventas_cliente_mes["Ventas Netas (USD)_cliente"],
+                    name=f"Ventas cliente {cliente_sel}",
+                    marker_color="red"
+                ))
+                fig.update_layout(
+                    barmode="overlay",
+                    title=f"Ventas mensuales {descripcion} vs ventas totales",
+                    xaxis_title="Mes",
+                    yaxis_title="Ventas Netas (USD)",
+                    height=400,
+                    width=800, 
+                    showlegend=False
+                )
+                fig.update_traces(opacity=0.85)
+                return fig
+            mostrar_grafica(datos, filtros, "cliente_vs_total", figura, anio_cliente, cliente=cliente_sel)
+        else:
+            st.write("No hay datos suficientes para calcular rentabilidad por cliente")
+
+        # Gráfica: ventas del cliente vs ventas totales (excluyendo clientes en cuartiles 2, 3 y 4 de rentabilidad)
+
+        if peor is not None:
+            st.write("Para una comparación visual más sencilla, se muestra a continuación la comparación del aporta a las ventas del cliente menos rentable. En este caso, solo comparando con el 25% de los clientes con menor aportación.")
+            if cliente_sel == peor_cliente:
+                titulo_q1 = f"Ventas mensuales cliente menos rentable (no. {int(peor_cliente)}) vs otros clientes poco rentables"
+            else:
+                titulo_q1 = f"Ventas mensuales cliente no. {int(cliente_sel)} vs clientes poco rentables"
+
+            def figura_q1():
+                # Ventas totales por mes de los clientes del primer cuartil (los menos rentables) vs el cliente
+                ventas_cliente_mes_q1 = analisis.comparativo(cliente_sel, anio_cliente, cuartil=1)
+                fig_q1 = go.Figure()
+                # Barras de fondo: ventas totales Q1
+                fig_q1.add_trace(go.Bar(
+                    x=ventas_cliente_mes_q1["Mes_str"],
+                    y=ventas_cliente_mes_q1["Ventas Netas (USD)"],
+                    name="Ventas totales Q1",
+                    marker_color="gray"
+                ))
+                # Barras superpuestas: ventas del cliente seleccionado
+                fig_q1.add_trace(go.Bar(
+                    x=ventas_cliente_mes_q1["Mes_str"],
+                    y=ventas_cliente_mes_q1["Ventas Netas (USD)_cliente"],
+                    name=f"Ventas cliente {cliente_sel}",
+                    marker_color="red"
+                ))
+                fig_q1.update_layout(
+                    barmode="overlay",
+                    title=titulo_q1,
+                    xaxis_title="Mes",
+                    yaxis_title="Ventas Netas (USD)",
+                    height=400,
+                    width=800,
+                    showlegend=False
+                )
+                fig_q1.update_traces(opacity=0.85)
+                return fig_q1
+            mostrar_grafica(datos, filtros, "cliente_vs_q1", figura_q1, anio_cliente, cliente=cliente_sel)
+        else:
+            st.write("No hay datos suficientes para calcular la gráfica de cuartiles de rentabilidad.")
+
+
+# ============================
+# Filtros de la barra lateral
+# ============================
+# Se aplican a todas las secciones. Una lista vacía significa "todos"; cada
+# combinación se resuelve con el índice de filtros del cubo (ver filtros.py).
+
+FILTROS_BARRA = {
+    "vendedor": "Vendedor",
+    "cliente": "Cliente",
+    "departamento": "Departamento",
+    "familia": "Familia",
+}
+
+
+def filtros_barra_lateral(datos):
+    st.sidebar.header("Filtros")
+    seleccion = {}
+    for nombre, etiqueta in FILTROS_BARRA.items():
+        opciones = datos.indice.miembros(nombre).tolist()
+        seleccion[nombre] = st.sidebar.multiselect(etiqueta, opciones, key=f"filtro_{nombre}")
+    return seleccion
+
+
+# ============================
+# Panel de instrumentación (admin)
+# ============================
+
+def opciones_instrumentacion():
+    # tracemalloc lo enciende y apaga cada medición (instrumentos.medir), no la sesión
+    st.sidebar.toggle("Instrumentación", key="instrumentacion_activa")
+
+
+def panel_instrumentacion(datos):
+    with st.expander("Instrumentación (admin)"):
+        registros = st.session_state.get("instrumentacion", [])
+        if not instrumentacion_activa():
+            st.write("Activa la instrumentación en la barra lateral para registrar cada sección.")
+        if registros:
+            tabla = pd.DataFrame(registros)
+            st.subheader("Última ejecución completa")
+            st.dataframe(tabla[tabla["ejecucion"] == tabla["ejecucion"].max()], hide_index=True)
+            st.subheader("Resumen por sección")
+            resumen = tabla.groupby("seccion").agg(
+                ejecuciones=("pared_ms", "size"),
+                pared_ms_prom=("pared_ms", "mean"),
+                pared_ms_max=("pared_ms", "max"),
+                cpu_ms_prom=("cpu_ms", "mean"),
+                pico_kb_max=("pico_kb", "max"),
+                filas=("filas", "sum"),
+                aciertos=("aciertos", "sum"),
+                fallos=("fallos", "sum"),
+                payload_kb_max=("payload_kb", "max"),
+                grafica_ms_prom=("grafica_ms", "mean"),
+            ).sort_values("pared_ms_prom", ascending=False)
+            st.dataframe(resumen)
+            st.download_button(
+                "Exportar JSON lines", instrumentos.a_jsonl(registros),
+                file_name="instrumentacion.jsonl", mime="application/jsonl"
+            )
+        st.subheader("Caché compartida")
+        st.write(datos.cache.estadisticas())
+
+
+def run_dashboard():
+    
+    # ======================
+    # Logo y título
+    # ======================
+    
+    current_dir = os.path.dirname(__file__)
+    image_path = os.path.join(current_dir, "images/LCG_logo.png")
+    st.image(image_path, width=1500) 
+
+    st.markdown(
+        """
+        <h1 style='text-align: center; color: #16a085; font-family: 'Montserrat', sans-serif; font-weight: bold;'>
+        LCG Business Case Dashboard
+        </h1>
+        """,
+    unsafe_allow_html=True) 
+
+    st.session_state["ejecucion"] = st.session_state.get("ejecucion", 0) + 1
+    es_admin = st.session_state.get("username") == "admin"
+    if es_admin:
+        opciones_instrumentacion()
+
+    with medicion("carga_datos"):
+        datos = load_cubo()
+        datos.actualizar()
+    filtros = filtros_barra_lateral(datos)
+
+    st.title("Análisis de datos de ventas")
+
+    pareto_departamentos(datos, filtros)
+    pareto_clientes(datos, filtros)
+    top5_clientes(datos, filtros)
+    vendedor_con_mas_clientes(datos, filtros)
+    venta_cruzada(datos, filtros)
+
+    st.header("Análisis de tendencia de ventas")
+    col1, col2 = st.columns(2)
+    with col1:
+        mes_con_mas_ventas(datos, filtros)
+    with col2:
+        mes_con_menos_ventas(datos, filtros)
+    ventas_mensuales_destacadas(datos, filtros)
+    tendencia_y_estacionalidad(datos, filtros)
+    comparativo_por_fechas(datos, filtros)
+    pronostico_ventas(datos, filtros)
+
+    st.header("Análisis de rentabilidad del portafolio")
+    rentabilidad_mes_anio(datos, filtros)
+    trimestre_menor_rentabilidad(datos, filtros)
+    cliente_menos_rentable(datos, filtros)
+
+    if es_admin:
+        panel_instrumentacion(datos)
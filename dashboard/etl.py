@@ -0,0 +1,198 @@
+import argparse
+import itertools
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+import almacen
+
+# ============================
+# ETL XLSB -> almacén por lotes
+# ============================
+# Versión en script del pipeline de code/business.ipynb. Las filas de la hoja
+# de ventas se leen en lotes de tamaño fijo; cada lote se limpia, se completa
+# la clave de departamento con el diccionario de la hoja 2, se convierte a USD
+# y se escribe de inmediato. La memoria máxima depende del tamaño del lote y no
+# del tamaño del libro.
+
+TIPO_CAMBIO = 7.5  # 1 USD = Q 7.5
+HOJA_DATOS = 3
+HOJA_DICCIONARIO = 2
+TAMANO_LOTE = 50_000
+COLUMNAS_SALIDA = [
+    "Fecha", "Número de Vendedor", "Número de cliente", "Tipo", "Departamento - Clave",
+    "Familia - Clave", "Familia", "Ventas Netas (Q)", "Costo", "Año", "Mes",
+    "Ventas Netas (USD)", "Costo (USD)",
+]
+
+
+def _abrir_libro(ruta_xlsb):
+    try:
+        import pyxlsb
+    except ImportError:
+        raise ImportError("Se necesita pyxlsb para leer archivos .xlsb: pip install pyxlsb")
+    return pyxlsb.open_workbook(ruta_xlsb)
+
+
+def _filas(ruta_xlsb, hoja):
+    # Generador de filas como listas de valores; pyxlsb lee la hoja en streaming
+    with _abrir_libro(ruta_xlsb) as libro:
+        with libro.get_sheet(hoja) as sheet:
+            for fila in sheet.rows():
+                yield [celda.v for celda in fila]
+
+
+def _encabezado(filas):
+    # Igual que en el notebook: la primera fila está vacía y la segunda es el encabezado
+    next(filas, None)
+    encabezado = next(filas, None)
+    if encabezado is None:
+        raise ValueError("La hoja no tiene encabezado")
+    return encabezado
+
+
+def leer_diccionario_departamentos(ruta_xlsb, hoja=HOJA_DICCIONARIO):
+    filas = _filas(ruta_xlsb, hoja)
+    encabezado = _encabezado(filas)
+    depa = pd.DataFrame(list(filas), columns=encabezado)
+    depa = depa[["Departamento - Clave", "Departamento"]].dropna(how="any")
+    return depa.drop_duplicates("Departamento").set_index("Departamento")["Departamento - Clave"]
+
+
+def limpiar_lote(lote, departamentos):
+    # Filas vacías y celdas con solo espacios cuentan como faltantes
+    texto = lote.select_dtypes(include=["object", "string"]).columns
+    for columna in texto:
+        vacios = lote[columna].astype("string").str.strip().eq("").fillna(False)
+        if vacios.any():
+            lote[columna] = lote[columna].mask(vacios)
+    lote = lote.dropna(axis=0, how="all")
+
+    lote["Fecha"] = pd.to_datetime(pd.to_numeric(lote["Fecha"]), unit="D", origin="1899-12-30")
+    lote["Año"] = lote["Fecha"].dt.year
+    lote["Mes"] = lote["Fecha"].dt.month
+
+    # Completar la clave con el diccionario cuando solo viene el nombre del departamento
+    if "Departamento" in lote:
+        mask = lote["Departamento"].notna() & lote["Departamento - Clave"].isna()
+        lote.loc[mask, "Departamento - Clave"] = lote.loc[mask, "Departamento"].map(departamentos)
+        lote = lote.drop(columns=["Departamento"])
+    lote["Departamento - Clave"] = pd.to_numeric(lote["Departamento - Clave"])
+
+    lote["Ventas Netas (USD)"] = lote["Ventas Netas (Q)"] / TIPO_CAMBIO
+    lote["Costo (USD)"] = lote["Costo"] / TIPO_CAMBIO
+    return lote[COLUMNAS_SALIDA]
+
+
+def leer_lotes(ruta_xlsb, departamentos, hoja=HOJA_DATOS, tamano_lote=TAMANO_LOTE):
+    filas = _filas(ruta_xlsb, hoja)
+    encabezado = _encabezado(filas)
+    # Las columnas sin nombre son las columnas vacías del libro
+    conservar = [i for i, nombre in enumerate(encabezado) if nombre not in (None, "")]
+    nombres = [encabezado[i] for i in conservar]
+    while True:
+        bloque = list(itertools.islice(filas, tamano_lote))
+        if not bloque:
+            break
+        lote = pd.DataFrame([[fila[i] for i in conservar] for fila in bloque], columns=nombres)
+        yield limpiar_lote(lote, departamentos)
+
+
+def _indices_int32(esquema):
+    for i, campo in enumerate(esquema):
+        if pa.types.is_dictionary(campo.type):
+            tipo = pa.dictionary(pa.int32(), campo.type.value_type, campo.type.ordered)
+            esquema = esquema.set(i, campo.with_type(tipo))
+    return esquema
+
+
+class EscritorArrow:
+    # Escribe lotes tipados en un archivo Arrow IPC. Las categorías se extienden
+    # de lote en lote para que Arrow guarde solo los valores nuevos (deltas). El
+    # esquema sale del primer lote pero con índices int32 en los diccionarios:
+    # pandas usa int8 mientras haya menos de 128 categorías y un lote posterior
+    # con más no cabría en el tipo fijado al abrir el archivo.
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.escritor = None
+        self.esquema = None
+        self.categorias = {}
+        self.conteo = {"descartadas": 0}
+
+    def _categorizar(self, lote):
+        for columna in almacen.COLUMNAS_CATEGORICAS:
+            if columna in lote:
+                conocidas = self.categorias.setdefault(columna, [])
+                vistas = set(conocidas)
+                conocidas.extend(v for v in pd.unique(lote[columna].dropna()) if v not in vistas)
+                lote[columna] = pd.Categorical(lote[columna], categories=conocidas)
+        return lote
+
+    def escribir(self, lote):
+        lote = self._categorizar(almacen.preparar_columnas(lote, self.conteo))
+        if self.escritor is None:
+            self.esquema = _indices_int32(pa.Schema.from_pandas(lote, preserve_index=False))
+            opciones = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self.escritor = pa.ipc.new_file(self.ruta, self.esquema, options=opciones)
+        self.escritor.write_batch(pa.RecordBatch.from_pandas(lote, schema=self.esquema, preserve_index=False))
+
+    def cerrar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+
+
+class EscritorCSV:
+    # Mismo formato que BD.csv para quien todavía consume el CSV
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.encabezado = True
+        # Las filas sin llave se quedan en el CSV; motores.lotes_origen las descarta al leer
+        self.conteo = {"descartadas": 0}
+
+    def escribir(self, lote):
+        lote.to_csv(self.ruta, mode="w" if self.encabezado else "a", header=self.encabezado, index=False)
+        self.encabezado = False
+
+    def cerrar(self):
+        pass
+
+
+def ejecutar(ruta_xlsb, salida=almacen.RUTA_ALMACEN, tamano_lote=TAMANO_LOTE,
+             hoja_datos=HOJA_DATOS, hoja_diccionario=HOJA_DICCIONARIO):
+    departamentos = leer_diccionario_departamentos(ruta_xlsb, hoja_diccionario)
+    # Se escribe a un temporal y se renombra al final para no dejar un almacén incompleto
+    temporal = salida + ".tmp"
+    escritor = EscritorCSV(temporal) if salida.endswith(".csv") else EscritorArrow(temporal)
+    inicio = time.perf_counter()
+    filas = lotes = 0
+    try:
+        for lote in leer_lotes(ruta_xlsb, departamentos, hoja_datos, tamano_lote):
+            escritor.escribir(lote)
+            filas += len(lote)
+            lotes += 1
+    finally:
+        escritor.cerrar()
+    os.replace(temporal, salida)
+    return {
+        "filas": filas, "lotes": lotes, "descartadas": escritor.conteo["descartadas"],
+        "segundos": round(time.perf_counter() - inicio, 2), "salida": salida,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte el libro XLSB de ventas al almacén del dashboard")
+    parser.add_argument("xlsb", help="Libro de origen, p. ej. 'BC LCG 2017 CN.xlsb'")
+    parser.add_argument("--salida", default=almacen.RUTA_ALMACEN, help="Archivo .arrow o .csv de salida")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por lote")
+    parser.add_argument("--hoja-datos", type=int, default=HOJA_DATOS)
+    parser.add_argument("--hoja-diccionario", type=int, default=HOJA_DICCIONARIO)
+    args = parser.parse_args()
+
+    resumen = ejecutar(args.xlsb, args.salida, args.lote, args.hoja_datos, args.hoja_diccionario)
+    print(f"{resumen['filas']:,} filas en {resumen['lotes']} lotes ({resumen['segundos']} s) -> {resumen['salida']}")
+    if resumen["descartadas"]:
+        print(f"{resumen['descartadas']:,} filas descartadas por llaves vacías")
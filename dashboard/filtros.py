@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+# ============================
+# Índice de filtros
+# ============================
+# Los datos se ordenan una sola vez por (Año, Mes, vendedor, cliente). Así
+# cada año, trimestre o mes es un rango contiguo de filas, y para vendedor,
+# cliente, departamento y familia se guarda un índice invertido (las filas de
+# cada miembro, ordenadas). Cualquier combinación de filtros se resuelve con
+# búsquedas binarias e intersecciones de listas de filas, sin máscaras de
+# todo el DataFrame.
+
+ORDEN = ["Año", "Mes", "Número de Vendedor", "Número de cliente"]
+DIMENSIONES = {
+    "vendedor": "Número de Vendedor",
+    "cliente": "Número de cliente",
+    "departamento": "Departamento - Clave",
+    "familia": "Familia - Clave",
+}
+
+
+def _como_lista(valor):
+    # Las colecciones van primero: comparar un arreglo contra "Sin agrupar" es elemento a elemento
+    if isinstance(valor, (list, tuple, set, np.ndarray, pd.Index)):
+        return list(valor) if len(valor) else None
+    if valor is None or valor == "Sin agrupar":
+        return None
+    return [valor]
+
+
+def normalizar(filtros):
+    # Forma hashable y estable de los filtros, sin los vacíos; sirve como parte de una clave de caché
+    if not filtros:
+        return ()
+    return tuple(sorted(
+        (nombre, tuple(sorted(valores)))
+        for nombre, valores in ((n, _como_lista(v)) for n, v in dict(filtros).items())
+        if valores is not None
+    ))
+
+
+class IndiceFiltros:
+
+    def __init__(self, df):
+        columnas = [c for c in ORDEN if c in df]
+        orden = np.lexsort([df[c].to_numpy() for c in reversed(columnas)])
+        self.datos = df.take(orden).reset_index(drop=True)
+
+        # Rangos contiguos por periodo (año * 12 + mes - 1)
+        periodo = self.datos["Año"].to_numpy().astype(np.int64) * 12 + self.datos["Mes"].to_numpy() - 1
+        self.periodos, inicios = np.unique(periodo, return_index=True)
+        self.inicios = inicios
+        self.fines = np.r_[inicios[1:], len(periodo)]
+
+        # Índices invertidos: filas de cada miembro en orden ascendente
+        self.invertidos = {}
+        for nombre, columna in DIMENSIONES.items():
+            if columna not in self.datos:
+                continue
+            codigos, valores = pd.factorize(self.datos[columna], sort=True)
+            filas = np.argsort(codigos, kind="stable")
+            punteros = np.r_[0, np.cumsum(np.bincount(codigos, minlength=len(valores)))]
+            self.invertidos[nombre] = (np.asarray(valores), punteros, filas)
+
+    def rangos(self, anio=None, mes=None, trimestre=None):
+        # Lista de rangos (inicio, fin) de las filas que cumplen los filtros de tiempo
+        anios, meses, trimestres = _como_lista(anio), _como_lista(mes), _como_lista(trimestre)
+        if anios is None and meses is None and trimestres is None:
+            return [(0, len(self.datos))]
+        elegidos = np.ones(len(self.periodos), dtype=bool)
+        if anios is not None:
+            elegidos &= np.isin(self.periodos // 12, [int(a) for a in anios])
+        if meses is not None:
+            elegidos &= np.isin(self.periodos % 12 + 1, [int(m) for m in meses])
+        if trimestres is not None:
+            elegidos &= np.isin((self.periodos % 12) // 3 + 1, [int(t) for t in trimestres])
+        posiciones = np.flatnonzero(elegidos)
+        if len(posiciones) == 0:
+            return []
+        # Los periodos consecutivos se funden en un solo rango
+        cortes = np.flatnonzero(np.diff(posiciones) != 1) + 1
+        return [
+            (self.inicios[grupo[0]], self.fines[grupo[-1]])
+            for grupo in np.split(posiciones, cortes)
+        ]
+
+    def _filas_miembros(self, nombre, valores, rangos):
+        miembros, punteros, filas = self.invertidos[nombre]
+        valores = np.unique(valores)
+        posiciones = np.searchsorted(miembros, valores)
+        partes = []
+        for valor, posicion in zip(valores, posiciones):
+            if posicion >= len(miembros) or miembros[posicion] != valor:
+                continue
+            propias = filas[punteros[posicion]:punteros[posicion + 1]]
+            for inicio, fin in rangos:
+                a, b = np.searchsorted(propias, [inicio, fin])
+                partes.append(propias[a:b])
+        if not partes:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(partes)) if len(partes) > 1 else partes[0]
+
+    def filas(self, anio=None, mes=None, trimestre=None, **dimensiones):
+        # Devuelve un slice si el resultado es un solo rango contiguo; si no, las posiciones de las filas
+        rangos = self.rangos(anio, mes, trimestre)
+        seleccion = None
+        for nombre, valores in dimensiones.items():
+            if nombre not in DIMENSIONES:
+                raise ValueError(f"Filtro desconocido: {nombre}")
+            valores = _como_lista(valores)
+            if valores is None:
+                continue
+            propias = self._filas_miembros(nombre, valores, rangos)
+            seleccion = propias if seleccion is None else np.intersect1d(seleccion, propias, assume_unique=True)
+        if seleccion is not None:
+            return seleccion
+        if len(rangos) == 1:
+            return slice(*rangos[0])
+        return np.concatenate([np.arange(inicio, fin) for inicio, fin in rangos]) if rangos else np.empty(0, dtype=np.int64)
+
+    def miembros(self, nombre):
+        # Valores distintos de una dimensión, ordenados (opciones para los controles)
+        return self.invertidos[nombre][0]
+
+    def seleccionar(self, **filtros):
+        filas = self.filas(**filtros)
+        if isinstance(filas, slice):
+            return self.datos.iloc[filas]
+        return self.datos.take(filas)
+
+    @property
+    def nbytes(self):
+        invertidos = sum(m.nbytes + p.nbytes + f.nbytes for m, p, f in self.invertidos.values())
+        return int(self.datos.memory_usage(deep=True).sum()) + invertidos
@@ -0,0 +1,153 @@
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import almacen
+import etl
+
+# ============================
+# Generador de datos sintéticos
+# ============================
+# Produce filas con el mismo esquema que BD.csv a cualquier escala para medir
+# el dashboard con volúmenes de producción. Clientes y familias siguen una ley
+# de potencias (pocos concentran la mayoría de las ventas, como en el Pareto
+# real), cada cliente tiene un vendedor principal, cada familia pertenece a un
+# departamento y las ventas tienen estacionalidad mensual y crecimiento anual.
+
+FILAS_BASE = 7392  # filas de BD.csv
+CLIENTES_BASE = 87
+VENDEDORES_BASE = 8
+DEPARTAMENTOS = 32
+FAMILIAS = 396
+SESGO = 1.1  # exponente de la ley de potencias; más alto = más concentrado
+# Peso relativo de cada mes (noviembre es el pico, diciembre el mes más bajo)
+ESTACIONALIDAD = np.array([0.9, 1.0, 0.9, 0.8, 0.9, 1.0, 0.9, 0.9, 1.0, 1.0, 1.5, 0.5])
+MARGEN_COSTO = (0.56, 0.1)  # costo / ventas: media y desviación
+CRECIMIENTO_ANUAL = 0.05
+
+
+def _pesos_potencia(n, sesgo, rng):
+    # Pesos Zipf en orden aleatorio para que la clave no indique el tamaño
+    pesos = np.arange(1, n + 1, dtype=float) ** -sesgo
+    return rng.permutation(pesos / pesos.sum())
+
+
+class Generador:
+
+    def __init__(self, clientes=CLIENTES_BASE, vendedores=VENDEDORES_BASE, departamentos=DEPARTAMENTOS,
+                 familias=FAMILIAS, anio_inicio=2015, anios=2, sesgo=SESGO, semilla=0):
+        self.rng = np.random.default_rng(semilla)
+        self.anio_inicio = anio_inicio
+        self.anios = anios
+        self.peso_cliente = _pesos_potencia(clientes, sesgo, self.rng)
+        self.peso_familia = _pesos_potencia(familias, sesgo, self.rng)
+        self.vendedor_cliente = self.rng.integers(1, vendedores + 1, clientes)
+        self.vendedores = vendedores
+        # Claves de departamento dispersas como las del libro original (0021, 0105, ...)
+        claves_depto = np.sort(self.rng.choice(np.arange(1, 10 * departamentos + 1), departamentos, replace=False))
+        self.departamento_familia = self.rng.choice(claves_depto, familias)
+        self.clave_familia = np.sort(self.rng.choice(np.arange(100, 100 + 5 * familias), familias, replace=False))
+        self.nombre_familia = np.array([f"FAMILIA {clave:04d}" for clave in self.clave_familia])
+        self.escala_cliente = self.rng.lognormal(10, 1, clientes)
+        # Peso de cada mes del periodo: estacionalidad por crecimiento anual
+        anio_mes = np.arange(anios * 12)
+        peso_mes = ESTACIONALIDAD[anio_mes % 12] * (1 + CRECIMIENTO_ANUAL) ** (anio_mes // 12)
+        self.peso_mes = peso_mes / peso_mes.sum()
+        self.fecha_mes = np.array([f"{anio_inicio + m // 12}-{m % 12 + 1:02d}-01" for m in anio_mes])
+
+    def lote(self, filas):
+        rng = self.rng
+        cliente = rng.choice(len(self.peso_cliente), filas, p=self.peso_cliente)
+        familia = rng.choice(len(self.peso_familia), filas, p=self.peso_familia)
+        mes = rng.choice(len(self.peso_mes), filas, p=self.peso_mes)
+        # El 80% de las compras las atiende el vendedor principal del cliente
+        vendedor = np.where(rng.random(filas) < 0.8, self.vendedor_cliente[cliente], rng.integers(1, self.vendedores + 1, filas))
+        anio = self.anio_inicio + mes // 12
+        numero_mes = mes % 12 + 1
+        ventas_q = np.round(self.escala_cliente[cliente] * rng.lognormal(0, 1, filas) * self.peso_mes[mes] * len(self.peso_mes), 2)
+        costo = np.round(ventas_q * np.clip(rng.normal(*MARGEN_COSTO, filas), 0.05, None), 2)
+        return pd.DataFrame({
+            "Fecha": self.fecha_mes[mes],
+            "Número de Vendedor": vendedor.astype(float),
+            "Número de cliente": (cliente + 1).astype(float),
+            "Tipo": "Real",
+            "Departamento - Clave": self.departamento_familia[familia],
+            "Familia - Clave": self.clave_familia[familia],
+            "Familia": self.nombre_familia[familia],
+            "Ventas Netas (Q)": ventas_q,
+            "Costo": costo,
+            "Año": anio,
+            "Mes": numero_mes,
+            "Ventas Netas (USD)": ventas_q / etl.TIPO_CAMBIO,
+            "Costo (USD)": costo / etl.TIPO_CAMBIO,
+        })
+
+    def lotes(self, filas, tamano_lote=etl.TAMANO_LOTE):
+        for inicio in range(0, filas, tamano_lote):
+            yield self.lote(min(tamano_lote, filas - inicio))
+
+
+def parametros_escala(escala):
+    # Cardinalidades por defecto para una escala dada: los clientes crecen con las
+    # filas y los vendedores más despacio, como en una fuerza de ventas real
+    return {
+        "filas": int(FILAS_BASE * escala),
+        "clientes": max(CLIENTES_BASE, int(CLIENTES_BASE * escala)),
+        "vendedores": max(VENDEDORES_BASE, int(VENDEDORES_BASE * math.sqrt(escala))),
+    }
+
+
+def generar(escala=1, semilla=0, **opciones):
+    # DataFrame completo con tipos de almacén (para benchmarks en memoria)
+    parametros = {**parametros_escala(escala), **opciones}
+    filas = parametros.pop("filas")
+    generador = Generador(semilla=semilla, **parametros)
+    return almacen.preparar_columnas(pd.concat(generador.lotes(filas), ignore_index=True))
+
+
+def escribir(ruta, escala=1, semilla=0, tamano_lote=etl.TAMANO_LOTE, **opciones):
+    # Escribe por lotes con los mismos escritores del ETL: la memoria no crece con la escala
+    parametros = {**parametros_escala(escala), **opciones}
+    filas = parametros.pop("filas")
+    generador = Generador(semilla=semilla, **parametros)
+    temporal = ruta + ".tmp"
+    escritor = etl.EscritorCSV(temporal) if ruta.endswith(".csv") else etl.EscritorArrow(temporal)
+    inicio = time.perf_counter()
+    try:
+        for lote in generador.lotes(filas, tamano_lote):
+            escritor.escribir(lote)
+    finally:
+        escritor.cerrar()
+    os.replace(temporal, ruta)
+    return {"filas": filas, "segundos": round(time.perf_counter() - inicio, 2), "salida": ruta, **parametros}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera ventas sintéticas con el esquema de BD.csv")
+    parser.add_argument("salida", help="Archivo .csv o .arrow de salida")
+    parser.add_argument("--escala", type=float, default=10, help="Múltiplo de las filas de BD.csv")
+    parser.add_argument("--filas", type=int, help="Filas exactas (ignora --escala para las filas)")
+    parser.add_argument("--clientes", type=int)
+    parser.add_argument("--vendedores", type=int)
+    parser.add_argument("--departamentos", type=int, default=DEPARTAMENTOS)
+    parser.add_argument("--familias", type=int, default=FAMILIAS)
+    parser.add_argument("--desde", type=int, default=2015, help="Primer año")
+    parser.add_argument("--anios", type=int, default=2)
+    parser.add_argument("--sesgo", type=float, default=SESGO)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    opciones = {
+        "departamentos": args.departamentos, "familias": args.familias,
+        "anio_inicio": args.desde, "anios": args.anios, "sesgo": args.sesgo,
+    }
+    for nombre in ["filas", "clientes", "vendedores"]:
+        if getattr(args, nombre) is not None:
+            opciones[nombre] = getattr(args, nombre)
+    resumen = escribir(args.salida, args.escala, args.semilla, **opciones)
+    print(f"{resumen['filas']:,} filas, {resumen['clientes']:,} clientes, {resumen['vendedores']} vendedores "
+          f"({resumen['segundos']} s) -> {resumen['salida']}")
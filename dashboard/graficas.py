@@ -0,0 +1,202 @@
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from filtros import normalizar
+
+# ============================
+# Capa de gráficas
+# ============================
+# Las figuras se guardan ya construidas en la caché compartida, con la versión
+# del dataset, el panel, los filtros y los parámetros en la clave: en un rerun
+# sin cambios no se vuelve a llamar a Plotly Express (decenas de ms por figura).
+# Se guarda el objeto Figure y no su JSON porque st.plotly_chart vuelve a
+# validar los dict completos y con un Figure solo lo serializa. Ante el
+# presupuesto de la caché cuenta lo que ocupa ese Figure en memoria (su grafo de
+# objetos), no el JSON, que es varias veces más chico.
+#
+# Para que lo que viaja al navegador no crezca con la granularidad, las series
+# largas se reducen en el servidor (LTTB para una sola serie, promedio por
+# cubetas para varias que comparten eje) y las trazas de líneas o puntos con
+# muchos puntos pasan a WebGL (Scattergl). Los colores por barra se calculan
+# con np.where sobre todo el arreglo y se entregan como lista (con un arreglo de
+# objetos Plotly cambia de codificador y el JSON de las fechas sale distinto).
+
+PUNTOS_MAXIMOS = 2_000  # puntos por serie que se envían al navegador
+PUNTOS_WEBGL = 1_000  # a partir de aquí las trazas scatter se dibujan con WebGL
+VERDE = "#16a085"
+ROJO = "red"
+GRIS = "gray"
+
+
+_SIN_RECORRER = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+
+def peso_objetos(raiz):
+    # Bytes del grafo de objetos: dicts, listas, arreglos y los objetos de Plotly que
+    # los envuelven, cada uno una vez; no entra en clases, módulos ni funciones
+    vistos = set()
+    pendientes = [raiz]
+    total = 0
+    while pendientes:
+        objeto = pendientes.pop()
+        if id(objeto) in vistos or isinstance(objeto, _SIN_RECORRER):
+            continue
+        vistos.add(id(objeto))
+        if isinstance(objeto, np.ndarray):
+            # Una vista no es dueña de sus datos: solo cuenta lo que referencia
+            total += sys.getsizeof(objeto) if objeto.base is None else objeto.nbytes
+            if objeto.dtype == object:
+                pendientes.extend(objeto.ravel().tolist())
+            continue
+        total += sys.getsizeof(objeto)
+        if isinstance(objeto, dict):
+            pendientes.extend(objeto.keys())
+            pendientes.extend(objeto.values())
+        elif isinstance(objeto, (list, tuple, set, frozenset)):
+            pendientes.extend(objeto)
+        elif hasattr(objeto, "__dict__"):
+            pendientes.append(objeto.__dict__)
+    return total
+
+
+class Grafica:
+
+    def __init__(self, figura):
+        inicio = time.perf_counter()
+        self.figura = figura
+        # Tamaño del JSON que recibe el navegador; se calcula una vez al construir
+        self.bytes = len(figura.to_json())
+        self.segundos_serializacion = time.perf_counter() - inicio
+        # Lo que ocupa en la caché es el Figure con sus trazas, varias veces el JSON
+        self.bytes_memoria = peso_objetos(figura)
+
+    @property
+    def nbytes(self):
+        return self.bytes_memoria
+
+
+def memorizar(datos, filtros, panel, construir, anio=None, **parametros):
+    # construir() solo se llama si la figura no está en la caché para esta versión y filtros
+    anio = None if anio is None or anio == "Sin agrupar" else int(anio)
+    clave = ("grafica", datos.version(anio), panel, anio, normalizar(filtros), tuple(sorted(parametros.items())))
+    return datos.cache.obtener(clave, lambda: Grafica(construir()))
+
+
+# ============================
+# Colores por barra
+# ============================
+
+def colores_extremos(valores, maximo=VERDE, minimo=ROJO, resto=GRIS):
+    # Máximo en verde, mínimo en rojo y el resto en gris (el primero si hay empates)
+    valores = np.asarray(valores, dtype=float)
+    colores = np.full(len(valores), resto, dtype=object)
+    if len(valores):
+        colores[np.nanargmin(valores)] = minimo
+        colores[np.nanargmax(valores)] = maximo
+    return colores.tolist()
+
+
+def colores_umbral(valores, bajo, alto, debajo=ROJO, encima=VERDE, resto=GRIS):
+    # Rojo si el valor es <= bajo, verde si es >= alto, gris en otro caso (NaN incluido)
+    valores = np.asarray(valores, dtype=float)
+    return np.where(valores <= bajo, debajo, np.where(valores >= alto, encima, resto)).tolist()
+
+
+# ============================
+# Reducción de series
+# ============================
+
+def _numerico(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def indices_lttb(x, y, umbral):
+    # Largest-Triangle-Three-Buckets: el primero, el último y en cada cubeta el punto
+    # que forma el triángulo más grande con el elegido antes y el promedio de la siguiente
+    n = len(y)
+    if umbral >= n or umbral < 3:
+        return np.arange(n)
+    x, y = _numerico(x), np.asarray(y, dtype=float)
+    bordes = np.linspace(1, n - 1, umbral - 1).astype(np.int64)
+    suma_x, suma_y = np.r_[0.0, np.cumsum(x)], np.r_[0.0, np.cumsum(y)]
+    elegidos = np.empty(umbral, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(umbral - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        if i + 2 < len(bordes):
+            a, b = bordes[i + 1], bordes[i + 2]
+            media_x, media_y = (suma_x[b] - suma_x[a]) / (b - a), (suma_y[b] - suma_y[a]) / (b - a)
+        else:
+            media_x, media_y = x[-1], y[-1]
+        area = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(area))
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def cubetas(tabla, columnas, maximo):
+    # Promedio de cada columna por cubetas contiguas; la fila conserva la etiqueta de la primera
+    inicios = np.linspace(0, len(tabla), maximo, endpoint=False).astype(np.int64)
+    tamanos = np.diff(np.r_[inicios, len(tabla)])
+    reducida = tabla.iloc[inicios].copy()
+    for columna in columnas:
+        valores = tabla[columna].to_numpy(dtype=float)
+        reducida[columna] = np.add.reduceat(valores, inicios) / tamanos
+    return reducida
+
+
+def reducir(tabla, x, columnas, maximo=PUNTOS_MAXIMOS):
+    # Series de tiempo largas a lo más `maximo` puntos; las cortas pasan sin cambios
+    if len(tabla) <= maximo:
+        return tabla
+    if isinstance(columnas, str) or len(columnas) == 1:
+        columna = columnas if isinstance(columnas, str) else columnas[0]
+        ejes = tabla.index if x is None else tabla[x]
+        return tabla.iloc[indices_lttb(ejes, tabla[columna], maximo)]
+    return cubetas(tabla, columnas, maximo)
+
+
+def webgl(figura, umbral=PUNTOS_WEBGL):
+    # Las trazas scatter con muchos puntos pasan a Scattergl (sin spline, que WebGL no dibuja)
+    trazas = []
+    for traza in figura.data:
+        if traza.type == "scatter" and traza.x is not None and len(traza.x) > umbral:
+            propiedades = traza.to_plotly_json()
+            propiedades.pop("type", None)
+            propiedades.get("line", {}).pop("shape", None)
+            traza = go.Scattergl(**propiedades)
+        trazas.append(traza)
+    figura.data = []
+    figura.add_traces(trazas)
+    return figura
+
+
+if __name__ == "__main__":
+    import plotly.express as px
+
+    # Bytes enviados al navegador y tiempo de serialización con y sin reducción
+    rng = np.random.default_rng(0)
+    for puntos in [1_000, 10_000, 100_000, 1_000_000]:
+        serie = pd.DataFrame({
+            "Fecha": pd.date_range("2000-01-01", periods=puntos, freq="min"),
+            "Ventas": np.cumsum(rng.normal(size=puntos)),
+        })
+        for modo, datos in [("completa", serie), ("reducida", reducir(serie, "Fecha", "Ventas"))]:
+            inicio = time.perf_counter()
+            grafica = Grafica(webgl(px.line(datos, x="Fecha", y="Ventas")))
+            print(
+                f"{puntos:>9,} puntos {modo:>8}: {len(datos):>9,} enviados, {grafica.bytes / 1024:>9,.1f} KB, "
+                f"{(time.perf_counter() - inicio) * 1000:>8.1f} ms, {grafica.figura.data[0].type}"
+            )
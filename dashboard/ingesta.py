@@ -0,0 +1,188 @@
+import functools
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow.feather as feather
+
+import almacen
+from cache import CacheCompartido, nombre_funcion
+import instrumentos
+import cubo as cb
+from filtros import IndiceFiltros, normalizar
+
+# ============================
+# Ingesta incremental por mes
+# ============================
+# Los meses nuevos se agregan como particiones Arrow (una por mes y lote) sin
+# regenerar BD.csv. El manifiesto lista los archivos de cada mes; el cubo solo
+# vuelve a sumar los meses que cambiaron y los resultados en caché de esos
+# años se descartan, así que refrescar cuesta según las filas nuevas.
+
+DIRECTORIO_PARTICIONES = os.path.join(almacen.DIRECTORIO_DATOS, "particiones")
+MANIFIESTO = "manifiesto.json"
+
+
+def _clave_mes(anio, mes):
+    return f"{int(anio):04d}-{int(mes):02d}"
+
+
+def leer_manifiesto(directorio=DIRECTORIO_PARTICIONES):
+    ruta = os.path.join(directorio, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {"lote": 0, "meses": {}}
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _escribir_manifiesto(manifiesto, directorio):
+    ruta = os.path.join(directorio, MANIFIESTO)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(manifiesto, archivo, indent=1)
+    # Reemplazo atómico para que el dashboard nunca lea un manifiesto a medias
+    os.replace(temporal, ruta)
+
+
+def ingerir(df_nuevo, directorio=DIRECTORIO_PARTICIONES, conteo=None):
+    # Escribe las filas nuevas separadas por (Año, Mes) y devuelve los meses afectados;
+    # las filas sin alguna llave se cuentan en conteo["descartadas"]
+    os.makedirs(directorio, exist_ok=True)
+    df_nuevo = almacen.preparar_columnas(df_nuevo.copy(), conteo)
+    manifiesto = leer_manifiesto(directorio)
+    manifiesto["lote"] += 1
+    afectados = []
+    for (anio, mes), particion in df_nuevo.groupby(["Año", "Mes"]):
+        clave = _clave_mes(anio, mes)
+        archivo = f"{clave}-{manifiesto['lote']:06d}.arrow"
+        almacen.escribir_almacen(particion.reset_index(drop=True), os.path.join(directorio, archivo))
+        manifiesto["meses"].setdefault(clave, []).append(archivo)
+        afectados.append(clave)
+    _escribir_manifiesto(manifiesto, directorio)
+    return afectados
+
+
+def ingerir_csv(ruta_csv, directorio=DIRECTORIO_PARTICIONES, conteo=None):
+    return ingerir(pd.read_csv(ruta_csv), directorio, conteo)
+
+
+def cargar_archivos(archivos, columnas=None, directorio=DIRECTORIO_PARTICIONES):
+    tablas = [
+        feather.read_table(os.path.join(directorio, archivo), columns=columnas, memory_map=True).to_pandas()
+        for archivo in archivos
+    ]
+    return pd.concat(tablas, ignore_index=True) if tablas else pd.DataFrame(columns=columnas)
+
+
+class CuboIncremental:
+    # Cubo base + particiones ya aplicadas, con versiones por mes para invalidar resultados
+
+    def __init__(self, cubo_base, directorio=DIRECTORIO_PARTICIONES, cache=None):
+        self.cubo = cubo_base
+        self.directorio = directorio
+        self.aplicados = set()
+        self.versiones = {}
+        self.cache = cache if cache is not None else CacheCompartido()
+        self._mtime = None
+        self._indice = None
+        self._candado = threading.Lock()
+        # Candado corto solo para las versiones: leerlas no espera a que termine un refresco
+        self._candado_versiones = threading.Lock()
+        self.actualizar()
+
+    def actualizar(self):
+        # Revisar el manifiesto es un stat; solo se leen archivos que no se han aplicado
+        ruta = os.path.join(self.directorio, MANIFIESTO)
+        mtime = os.path.getmtime(ruta) if os.path.exists(ruta) else None
+        if mtime == self._mtime:
+            return []
+        with self._candado:
+            manifiesto = leer_manifiesto(self.directorio)
+            nuevos = [
+                archivo
+                for archivos in manifiesto["meses"].values()
+                for archivo in archivos
+                if archivo not in self.aplicados
+            ]
+            afectados = []
+            if nuevos:
+                filas = cargar_archivos(nuevos, cb.COLUMNAS_ORIGEN, self.directorio)
+                afectados = self._combinar(cb.construir_cubo(filas))
+                self.aplicados.update(nuevos)
+            self._mtime = mtime
+            return afectados
+
+    def _combinar(self, cubo_nuevo):
+        # Sumas y conteos son aditivos: se vuelven a agrupar solo los meses afectados
+        meses = cubo_nuevo[["Año", "Mes"]].drop_duplicates()
+        llaves = pd.MultiIndex.from_frame(meses)
+        afectado = pd.MultiIndex.from_frame(self.cubo[["Año", "Mes"]]).isin(llaves)
+        combinado = cb.combinar_cubos([self.cubo[afectado], cubo_nuevo])
+        self.cubo = pd.concat([self.cubo[~afectado], combinado], ignore_index=True)
+        self._indice = None
+        with self._candado_versiones:
+            for anio, mes in meses.itertuples(index=False):
+                self.versiones[(anio, mes)] = self.versiones.get((anio, mes), 0) + 1
+        return [_clave_mes(anio, mes) for anio, mes in meses.itertuples(index=False)]
+
+    def version(self, anio=None, mes=None):
+        # Copia bajo candado: el hilo de refresco puede estar sumando meses nuevos
+        with self._candado_versiones:
+            versiones = dict(self.versiones)
+        if anio is None or anio == "Sin agrupar":
+            return sum(versiones.values())
+        if mes is None:
+            return sum(v for (a, _), v in versiones.items() if a == int(anio))
+        return versiones.get((int(anio), int(mes)), 0)
+
+    @property
+    def indice(self):
+        # Se reconstruye de forma perezosa solo cuando el cubo cambió
+        indice = self._indice
+        if indice is None:
+            indice = self._indice = IndiceFiltros(self.cubo)
+        return indice
+
+    def filas(self):
+        # Filas del cubo en memoria (para /salud del servicio)
+        return len(self.cubo)
+
+    def seleccionar(self, anio=None, filtros_activos=()):
+        # Sin filtros se usa el cubo completo; con filtros, rangos y listas de filas del índice
+        if anio is None and not filtros_activos:
+            return self.cubo
+        return self.indice.seleccionar(anio=anio, **dict(filtros_activos))
+
+    def consultar(self, funcion, anio=None, filtros=None, **parametros):
+        # La versión del año consultado va en la clave: al llegar filas nuevas de ese
+        # año la clave cambia y la entrada vieja termina desalojada por LRU
+        anio = None if anio is None or anio == "Sin agrupar" else int(anio)
+        activos = normalizar(filtros)
+        clave = (self.version(anio), nombre_funcion(funcion), anio, activos, tuple(sorted(parametros.items())))
+        instrumentos.contar(consultas=1)
+
+        def calcular():
+            cubo = self.seleccionar(anio, activos)
+            instrumentos.contar(fallos=1, filas=len(cubo))
+            return funcion(cubo, anio=anio, **parametros)
+
+        return self.cache.obtener(clave, calcular)
+
+    def consultador(self, filtros=None):
+        # consultar() con los filtros de la barra lateral ya aplicados
+        return functools.partial(self.consultar, filtros=filtros)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Uso: python ingesta.py nuevos.csv [directorio_particiones]")
+        sys.exit(1)
+    destino = sys.argv[2] if len(sys.argv) > 2 else DIRECTORIO_PARTICIONES
+    conteo = {}
+    meses = ingerir_csv(sys.argv[1], destino, conteo)
+    print(f"Meses agregados o actualizados: {', '.join(meses)}")
+    if conteo["descartadas"]:
+        print(f"{conteo['descartadas']:,} filas descartadas por llaves vacías")
@@ -0,0 +1,96 @@
+import contextlib
+import contextvars
+import datetime
+import json
+import threading
+import time
+import tracemalloc
+
+# ============================
+# Instrumentación de secciones
+# ============================
+# medir() envuelve un bloque y registra tiempo de pared, tiempo de CPU del hilo,
+# pico de memoria asignada, filas recorridas, aciertos de caché y el peso y
+# tiempo de envío de las gráficas. Las capas de abajo (la caché de consultas,
+# las gráficas) reportan con contar(), que no hace nada si no
+# hay una medición activa: con la instrumentación apagada el costo es leer una
+# ContextVar. El pico de memoria usa tracemalloc, que es global al proceso: cada
+# medición lo enciende al entrar y lo suelta al salir, así que queda apagado en
+# cuanto no hay ninguna sección midiéndose, aunque la sesión que lo pidió se
+# cierre con la instrumentación activa. Como el pico también es uno solo para
+# todo el proceso, las mediciones con memoria corren de una en una: si otra
+# sesión lo reiniciara a la mitad, borraría el pico de la que ya iba midiendo.
+
+MAXIMO_REGISTROS = 500
+
+_activa = contextvars.ContextVar("medicion_activa", default=None)
+_usuarios_memoria = 0
+_candado_memoria = threading.Lock()  # las sesiones corren en hilos distintos
+_candado_pico = threading.Lock()  # una medición con memoria a la vez
+
+
+def contar(**cantidades):
+    medicion = _activa.get()
+    if medicion is None:
+        return
+    for nombre, valor in cantidades.items():
+        medicion[nombre] = medicion.get(nombre, 0) + valor
+
+
+def activar_memoria():
+    global _usuarios_memoria
+    with _candado_memoria:
+        if _usuarios_memoria == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _usuarios_memoria += 1
+
+
+def desactivar_memoria():
+    global _usuarios_memoria
+    with _candado_memoria:
+        _usuarios_memoria = max(_usuarios_memoria - 1, 0)
+        if _usuarios_memoria == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+@contextlib.contextmanager
+def medir(nombre, registros, ejecucion=None, memoria=False):
+    medicion = {"consultas": 0, "fallos": 0, "filas": 0, "graficas": 0, "payload_bytes": 0, "grafica_ms": 0.0}
+    token = _activa.set(medicion)
+    if memoria:
+        _candado_pico.acquire()
+        activar_memoria()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    inicio_pared = time.perf_counter()
+    inicio_cpu = time.thread_time()
+    try:
+        yield medicion
+    finally:
+        pared = time.perf_counter() - inicio_pared
+        cpu = time.thread_time() - inicio_cpu
+        pico = tracemalloc.get_traced_memory()[1] - base if memoria else None
+        if memoria:
+            desactivar_memoria()
+            _candado_pico.release()
+        _activa.reset(token)
+        registros.append({
+            "fecha": datetime.datetime.now().isoformat(timespec="milliseconds"),
+            "ejecucion": ejecucion,
+            "seccion": nombre,
+            "pared_ms": round(pared * 1000, 3),
+            "cpu_ms": round(cpu * 1000, 3),
+            "pico_kb": round(pico / 1024, 1) if memoria else None,
+            "filas": medicion["filas"],
+            "consultas": medicion["consultas"],
+            "aciertos": medicion["consultas"] - medicion["fallos"],
+            "fallos": medicion["fallos"],
+            "graficas": medicion["graficas"],
+            "payload_kb": round(medicion["payload_bytes"] / 1024, 1),
+            "grafica_ms": round(medicion["grafica_ms"], 3),
+        })
+        del registros[:-MAXIMO_REGISTROS]
+
+
+def a_jsonl(registros):
+    return "".join(json.dumps(registro, ensure_ascii=False) + "\n" for registro in registros)
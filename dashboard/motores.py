@@ -0,0 +1,506 @@
+import functools
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+import afinidad
+import almacen
+import analitica
+import cubo as cb
+import distintos
+import ingesta
+import instrumentos
+import paralelo
+import pareto
+import pronostico
+import rentabilidad
+import tiempo
+from cache import CacheCompartido, nombre_funcion
+from filtros import normalizar
+
+# ============================
+# Motores de consulta
+# ============================
+# Todos los paneles se responden desde el cubo, así que lo único que recorre
+# las transacciones es su construcción. El motor decide dónde se hace:
+#   pandas  (por defecto) carga el almacén Arrow y agrupa en memoria;
+#   sqlite  importa las filas por lotes a un archivo y el GROUP BY corre en SQLite;
+#   duckdb  igual, con DuckDB (opcional, pip install duckdb), en paralelo y con
+#           derrame a disco cuando pasa de su límite de memoria.
+# Se elige con la variable de entorno LCG_MOTOR.
+#
+# Con sqlite/duckdb el cubo tampoco se carga en Python: se guarda como una tabla
+# más de la base (CuboSQL) y cada consulta del dashboard se responde con un
+# GROUP BY sobre esa tabla, filtrado en SQL por año y filtros de la barra
+# lateral y solo con las columnas que la función necesita (ventas por mes,
+# por cliente, por cliente × mes, ...). La función de siempre corre después
+# sobre ese agregado, que da las mismas cifras porque las sumas son aditivas.
+# En memoria quedan solo los resultados en caché, no el cubo.
+
+MOTOR = os.environ.get("LCG_MOTOR", "pandas")
+RUTA_SQLITE = os.path.join(almacen.DIRECTORIO_DATOS, "BD.sqlite")
+RUTA_DUCKDB = os.path.join(almacen.DIRECTORIO_DATOS, "BD.duckdb")
+MEMORIA_DUCKDB = os.environ.get("LCG_DUCKDB_MEMORIA", "1GB")
+TABLA = "ventas"
+TABLA_CUBO = "cubo"
+TABLA_PARTICIONES = "particiones"
+TAMANO_LOTE = 200_000
+ENTERAS = list(cb.DIMENSIONES)
+
+
+def _columna(nombre):
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+def sql_cubo(anio=None):
+    dimensiones = ", ".join(_columna(c) for c in cb.DIMENSIONES)
+    donde = f" WHERE {_columna('Año')} = {int(anio)}" if anio is not None else ""
+    return (
+        f"SELECT {dimensiones}, SUM({_columna(cb.VENTAS)}) AS {_columna(cb.VENTAS)}, "
+        f"SUM({_columna(cb.COSTO)}) AS {_columna(cb.COSTO)}, COUNT(*) AS {_columna(cb.FILAS)} "
+        f"FROM {TABLA}{donde} GROUP BY {dimensiones} ORDER BY {dimensiones}"
+    )
+
+
+def sql_agregado(columnas, donde=""):
+    # El cubo materializado agrupado por Año + `columnas` (sumas, no filas de transacciones)
+    grupo = ", ".join(_columna(c) for c in ["Año"] + list(columnas))
+    return (
+        f"SELECT {grupo}, SUM({_columna(cb.VENTAS)}) AS {_columna(cb.VENTAS)}, "
+        f"SUM({_columna(cb.COSTO)}) AS {_columna(cb.COSTO)}, SUM({_columna(cb.FILAS)}) AS {_columna(cb.FILAS)} "
+        f"FROM {TABLA_CUBO}{donde} GROUP BY {grupo} ORDER BY {grupo}"
+    )
+
+
+def sql_filtros(anio=None, filtros=()):
+    # WHERE con parámetros para el año y los filtros normalizados (filtros.normalizar)
+    condiciones, parametros = [], []
+    if anio is not None:
+        condiciones.append(f"{_columna('Año')} = ?")
+        parametros.append(int(anio))
+    for nombre, valores in filtros:
+        if nombre == "trimestre":
+            nombre, valores = "mes", [3 * (int(q) - 1) + m for q in valores for m in (1, 2, 3)]
+        columna = "Mes" if nombre == "mes" else FILTROS[nombre]
+        condiciones.append(f"{_columna(columna)} IN ({', '.join('?' * len(valores))})")
+        parametros.extend(int(v) for v in valores)
+    return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+
+def _tipar_cubo(cubo, tipo_filas="int32"):
+    # Mismos tipos que cubo.construir_cubo para que el resto del dashboard no note la diferencia
+    for columna in [c for c in ENTERAS if c in cubo]:
+        cubo[columna] = cubo[columna].astype("int32")
+    cubo[cb.FILAS] = cubo[cb.FILAS].astype(tipo_filas)
+    for columna in [cb.VENTAS, cb.COSTO]:
+        cubo[columna] = cubo[columna].astype("float64")
+    return cubo
+
+
+def lotes_origen(ruta, tamano_lote=TAMANO_LOTE, conteo=None):
+    # Filas del CSV o del almacén Arrow por lotes, solo con las columnas del cubo. Las
+    # filas del CSV sin alguna llave no entran al cubo; se cuentan en conteo["descartadas"]
+    conteo = {} if conteo is None else conteo
+    conteo.setdefault("descartadas", 0)
+    if ruta.endswith(".csv"):
+        for lote in pd.read_csv(ruta, usecols=cb.COLUMNAS_ORIGEN, chunksize=tamano_lote):
+            completas = lote.dropna(subset=ENTERAS)
+            conteo["descartadas"] += len(lote) - len(completas)
+            yield completas
+        return
+    with pa.memory_map(ruta) as fuente:
+        lector = pa.ipc.open_file(fuente)
+        for i in range(lector.num_record_batches):
+            lote = lector.get_batch(i).select(cb.COLUMNAS_ORIGEN).to_pandas()
+            for inicio in range(0, len(lote), tamano_lote):
+                yield lote.iloc[inicio:inicio + tamano_lote]
+
+
+def _vigente(ruta_base, ruta_origen):
+    if not os.path.exists(ruta_base):
+        return False
+    return not os.path.exists(ruta_origen) or os.path.getmtime(ruta_base) >= os.path.getmtime(ruta_origen)
+
+
+class MotorPandas:
+    nombre = "pandas"
+
+    def __init__(self, ruta_csv=almacen.RUTA_CSV, ruta_almacen=almacen.RUTA_ALMACEN):
+        self.ruta_csv = ruta_csv
+        self.ruta_almacen = ruta_almacen
+
+    def cubo(self, anio=None):
+        df = almacen.cargar(cb.COLUMNAS_ORIGEN, self.ruta_csv, self.ruta_almacen)
+        return paralelo.construir_cubo(cb.filtrar_anio(df, anio))
+
+
+class MotorSQLite:
+    nombre = "sqlite"
+
+    def __init__(self, ruta=RUTA_SQLITE, origen=None):
+        self.ruta = ruta
+        self.origen = origen
+        self.descartadas = 0
+        self._cubo_listo = False
+        # Conexiones de lectura, una por hilo; una reimportación las cierra todas
+        self._local = threading.local()
+        self._candado = threading.Lock()
+        self._abiertas = []
+        self._generacion = 0
+
+    def conectar(self, ruta=None):
+        # check_same_thread=False: una reimportación cierra las lecturas desde otro hilo
+        return sqlite3.connect(ruta or self.ruta, check_same_thread=False)
+
+    def lectura(self):
+        # La conexión de lectura de este hilo, reutilizada entre consultas
+        local = self._local
+        if getattr(local, "generacion", None) != self._generacion:
+            local.conexion = self.conectar()
+            local.generacion = self._generacion
+            with self._candado:
+                self._abiertas.append(local.conexion)
+        return local.conexion
+
+    def cerrar_lecturas(self):
+        with self._candado:
+            abiertas, self._abiertas = self._abiertas, []
+            self._generacion += 1
+        for conexion in abiertas:
+            conexion.close()
+
+    def crear(self, conexion):
+        columnas = [f"{_columna(c)} INTEGER NOT NULL" for c in ENTERAS]
+        columnas += [f"{_columna(c)} DOUBLE" for c in [cb.VENTAS, cb.COSTO]]
+        conexion.execute(f"DROP TABLE IF EXISTS {TABLA}")
+        conexion.execute(f"CREATE TABLE {TABLA} ({', '.join(columnas)})")
+
+    def agregar_lote(self, conexion, lote):
+        lote = lote[cb.COLUMNAS_ORIGEN].astype({c: "int64" for c in ENTERAS})
+        marcas = ", ".join("?" * len(cb.COLUMNAS_ORIGEN))
+        conexion.executemany(f"INSERT INTO {TABLA} VALUES ({marcas})", lote.itertuples(index=False, name=None))
+
+    def indexar(self, conexion):
+        conexion.execute(f"CREATE INDEX IF NOT EXISTS {TABLA}_periodo ON {TABLA} ({_columna('Año')}, {_columna('Mes')})")
+        conexion.execute(
+            f"CREATE INDEX IF NOT EXISTS {TABLA_CUBO}_periodo ON {TABLA_CUBO} ({_columna('Año')}, {_columna('Mes')})"
+        )
+
+    def materializar(self, conexion, donde="", parametros=()):
+        # El cubo como tabla de la base: (re)agrega las filas de `ventas` que cumplen `donde`
+        dimensiones = ", ".join(_columna(c) for c in cb.DIMENSIONES)
+        conexion.execute(
+            f"INSERT INTO {TABLA_CUBO} SELECT {dimensiones}, SUM({_columna(cb.VENTAS)}), SUM({_columna(cb.COSTO)}), "
+            f"COUNT(*) FROM {TABLA}{donde} GROUP BY {dimensiones}",
+            list(parametros),
+        )
+
+    def crear_cubo(self, conexion):
+        columnas = [f"{_columna(c)} INTEGER NOT NULL" for c in ENTERAS]
+        columnas += [f"{_columna(c)} DOUBLE" for c in [cb.VENTAS, cb.COSTO]] + [f"{_columna(cb.FILAS)} BIGINT"]
+        conexion.execute(f"DROP TABLE IF EXISTS {TABLA_CUBO}")
+        conexion.execute(f"CREATE TABLE {TABLA_CUBO} ({', '.join(columnas)})")
+        conexion.execute(f"DROP TABLE IF EXISTS {TABLA_PARTICIONES}")
+        conexion.execute(f"CREATE TABLE {TABLA_PARTICIONES} (archivo VARCHAR NOT NULL)")
+
+    def importar(self, lotes):
+        # Se escribe a un temporal y se renombra al final, como el almacén Arrow
+        temporal = self.ruta + ".tmp"
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        filas = 0
+        conexion = self.conectar(temporal)
+        try:
+            self.crear(conexion)
+            for lote in lotes:
+                self.agregar_lote(conexion, lote)
+                filas += len(lote)
+            self.crear_cubo(conexion)
+            self.materializar(conexion)
+            self.indexar(conexion)
+            conexion.commit()
+        finally:
+            conexion.close()
+        # Las lecturas abiertas apuntan al archivo anterior (DuckDB además lo guarda por ruta)
+        self.cerrar_lecturas()
+        os.replace(temporal, self.ruta)
+        return filas
+
+    def asegurar(self):
+        if self.origen is not None and not _vigente(self.ruta, self.origen):
+            conteo = {}
+            self.importar(lotes_origen(self.origen, conteo=conteo))
+            self.descartadas = conteo["descartadas"]
+        if not self._cubo_listo:
+            # Bases importadas antes de que existiera la tabla del cubo
+            conexion = self.conectar()
+            try:
+                if TABLA_CUBO not in self.tablas(conexion):
+                    self.crear_cubo(conexion)
+                    self.materializar(conexion)
+                    self.indexar(conexion)
+                    conexion.commit()
+            finally:
+                conexion.close()
+            self._cubo_listo = True
+
+    def tablas(self, conexion):
+        return {fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
+
+    def filas(self):
+        self.asegurar()
+        return self.lectura().execute(f"SELECT COUNT(*) FROM {TABLA}").fetchone()[0]
+
+    def leer(self, conexion, sql, parametros=()):
+        return pd.read_sql_query(sql, conexion, params=list(parametros))
+
+    def consultar(self, sql, parametros=()):
+        self.asegurar()
+        return self.leer(self.lectura(), sql, parametros)
+
+    def agregado(self, columnas, anio=None, filtros=()):
+        # Cubo filtrado en SQL y agrupado solo por Año + `columnas`
+        donde, parametros = sql_filtros(anio, filtros)
+        # En un agregado más grueso que el cubo la suma de filas puede pasar de int32
+        return _tipar_cubo(self.consultar(sql_agregado(columnas, donde), parametros), "int64")
+
+    def miembros(self, columna):
+        sql = f"SELECT DISTINCT {_columna(columna)} FROM {TABLA_CUBO} ORDER BY 1"
+        return self.consultar(sql)[columna].to_numpy()
+
+    def particiones_aplicadas(self):
+        return set(self.consultar(f"SELECT archivo FROM {TABLA_PARTICIONES}")["archivo"])
+
+    def aplicar_particion(self, archivos, filas):
+        # Filas nuevas de una ingesta: se insertan y se vuelven a agregar solo sus meses
+        self.asegurar()
+        meses = filas[["Año", "Mes"]].drop_duplicates()
+        donde = " WHERE " + " OR ".join(f"({_columna('Año')} = ? AND {_columna('Mes')} = ?)" for _ in range(len(meses)))
+        parametros = [int(v) for fila in meses.itertuples(index=False) for v in fila]
+        conexion = self.conectar()
+        try:
+            self.agregar_lote(conexion, filas)
+            conexion.execute(f"DELETE FROM {TABLA_CUBO}{donde}", parametros)
+            self.materializar(conexion, donde, parametros)
+            conexion.executemany(f"INSERT INTO {TABLA_PARTICIONES} VALUES (?)", [(a,) for a in archivos])
+            conexion.commit()
+        finally:
+            conexion.close()
+        return list(meses.itertuples(index=False, name=None))
+
+    def cubo(self, anio=None):
+        return _tipar_cubo(self.consultar(sql_cubo(anio)))
+
+
+class MotorDuckDB(MotorSQLite):
+    nombre = "duckdb"
+
+    def __init__(self, ruta=RUTA_DUCKDB, origen=None, memoria=MEMORIA_DUCKDB):
+        super().__init__(ruta, origen)
+        self.memoria = memoria
+
+    def conectar(self, ruta=None):
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("El motor duckdb necesita el paquete duckdb: pip install duckdb")
+        conexion = duckdb.connect(ruta or self.ruta)
+        conexion.execute(f"SET memory_limit = '{self.memoria}'")
+        conexion.execute(f"SET temp_directory = '{self.ruta}.temporal'")
+        return conexion
+
+    def agregar_lote(self, conexion, lote):
+        # DuckDB lee el DataFrame registrado sin copiarlo fila por fila
+        conexion.register("lote", lote[cb.COLUMNAS_ORIGEN].astype({c: "int64" for c in ENTERAS}))
+        conexion.execute(f"INSERT INTO {TABLA} SELECT * FROM lote")
+        conexion.unregister("lote")
+
+    def indexar(self, conexion):
+        # DuckDB poda por zonas (min/max por bloque); no necesita índice para filtrar por año
+        pass
+
+    def leer(self, conexion, sql, parametros=()):
+        return conexion.execute(sql, list(parametros)).df()
+
+    def tablas(self, conexion):
+        return {fila[0] for fila in conexion.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+
+
+# ============================
+# Consultas del dashboard dentro del motor
+# ============================
+
+FILTROS = {
+    "vendedor": "Número de Vendedor",
+    "cliente": "Número de cliente",
+    "departamento": "Departamento - Clave",
+    "familia": "Familia - Clave",
+}
+VENDEDOR = "Número de Vendedor"
+CLIENTE = "Número de cliente"
+FAMILIA = "Familia - Clave"
+
+# Columnas (además de Año) que cada función consultable necesita del cubo; las que
+# no están aquí reciben el cubo filtrado completo
+COLUMNAS_CONSULTA = {
+    cb.ventas_por: lambda dimension, **_: [dimension],
+    cb.ventas_mensuales: lambda **_: ["Mes"],
+    cb.serie_mensual: lambda **_: ["Mes"],
+    cb.rentabilidad_mes: lambda **_: ["Mes"],
+    cb.rentabilidad_trimestral: lambda **_: ["Mes"],
+    analitica.resumen_abc: lambda dimension="departamento", **_: [pareto.DIMENSIONES[dimension]],
+    analitica.top_clientes: lambda **_: [CLIENTE],
+    analitica.mes_extremo: lambda **_: ["Mes"],
+    analitica.peor_trimestre: lambda **_: ["Mes"],
+    analitica.vendedor_con_mas_clientes: lambda **_: ["Mes", VENDEDOR, CLIENTE],
+    analitica.clientes_distintos: lambda por="vendedor", **_: ["Mes", CLIENTE] + [
+        analitica.COLUMNAS_ALCANCE[n] for n in por.split(",") if n and n not in ("anio", "mes")
+    ],
+    analitica.cliente_menos_rentable: lambda **_: ["Mes", CLIENTE],
+    analitica.rentabilidad_clientes: lambda **_: ["Mes", CLIENTE],
+    distintos.conteo_clientes: lambda dimensiones=(VENDEDOR,), **_: ["Mes", CLIENTE] + list(dimensiones),
+    rentabilidad.construir: lambda **_: ["Mes", CLIENTE],
+    pronostico.ajustar: lambda dimension=None, **_: ["Mes"] + ([pronostico.DIMENSIONES[dimension]] if dimension else []),
+    pronostico.evaluar: lambda dimension=None, **_: ["Mes"] + ([pronostico.DIMENSIONES[dimension]] if dimension else []),
+    afinidad.construir_afinidad: lambda **_: [CLIENTE, FAMILIA],
+    afinidad.parecidos_clase_a: lambda **_: [CLIENTE, FAMILIA],
+    tiempo.indice_mensual: lambda dimensiones=tuple(tiempo.DIMENSIONES), **_: ["Mes"] + [
+        tiempo.DIMENSIONES[d] for d in dimensiones
+    ],
+}
+
+
+def columnas_consulta(funcion, parametros):
+    columnas = COLUMNAS_CONSULTA.get(funcion)
+    columnas = columnas(**parametros) if columnas is not None else [c for c in cb.DIMENSIONES if c != "Año"]
+    return list(dict.fromkeys(c for c in columnas if c != "Año"))
+
+
+class IndiceSQL:
+    # Lo que la barra lateral usa del índice de filtros: los miembros de cada dimensión
+
+    def __init__(self, motor):
+        self.motor = motor
+        self._miembros = {}
+
+    def miembros(self, nombre):
+        # Un DISTINCT por dimensión y por índice; cada refresco crea un índice nuevo
+        if nombre not in self._miembros:
+            self._miembros[nombre] = self.motor.miembros(FILTROS[nombre])
+        return self._miembros[nombre]
+
+
+class CuboSQL:
+    # Misma interfaz que ingesta.CuboIncremental, sin el cubo en memoria
+
+    def __init__(self, motor, directorio=ingesta.DIRECTORIO_PARTICIONES, cache=None):
+        self.motor = motor
+        self.directorio = directorio
+        self.versiones = {}
+        self.cache = cache if cache is not None else CacheCompartido()
+        self._mtime = None
+        self._candado = threading.Lock()
+        self._candado_versiones = threading.Lock()
+        self.motor.asegurar()
+        self.indice = IndiceSQL(motor)
+        self.actualizar()
+
+    def actualizar(self):
+        # Las particiones nuevas se insertan en la base; la tabla de particiones evita
+        # aplicarlas dos veces entre reinicios del proceso
+        ruta = os.path.join(self.directorio, ingesta.MANIFIESTO)
+        mtime = os.path.getmtime(ruta) if os.path.exists(ruta) else None
+        if mtime == self._mtime:
+            return []
+        with self._candado:
+            manifiesto = ingesta.leer_manifiesto(self.directorio)
+            aplicados = self.motor.particiones_aplicadas()
+            nuevos = [a for archivos in manifiesto["meses"].values() for a in archivos if a not in aplicados]
+            afectados = []
+            if nuevos:
+                filas = ingesta.cargar_archivos(nuevos, cb.COLUMNAS_ORIGEN, self.directorio)
+                meses = self.motor.aplicar_particion(nuevos, filas)
+                with self._candado_versiones:
+                    for anio, mes in meses:
+                        self.versiones[(anio, mes)] = self.versiones.get((anio, mes), 0) + 1
+                self.indice = IndiceSQL(self.motor)
+                afectados = [ingesta._clave_mes(anio, mes) for anio, mes in meses]
+            self._mtime = mtime
+            return afectados
+
+    def version(self, anio=None, mes=None):
+        with self._candado_versiones:
+            versiones = dict(self.versiones)
+        if anio is None or anio == "Sin agrupar":
+            return sum(versiones.values())
+        if mes is None:
+            return sum(v for (a, _), v in versiones.items() if a == int(anio))
+        return versiones.get((int(anio), int(mes)), 0)
+
+    def filas(self):
+        # Filas de la tabla de ventas en la base (no hay cubo en memoria)
+        return self.motor.filas()
+
+    def consultar(self, funcion, anio=None, filtros=None, **parametros):
+        # Misma clave de caché que CuboIncremental; en un fallo el GROUP BY corre en el motor
+        anio = None if anio is None or anio == "Sin agrupar" else int(anio)
+        activos = normalizar(filtros)
+        clave = (self.version(anio), nombre_funcion(funcion), anio, activos, tuple(sorted(parametros.items())))
+        instrumentos.contar(consultas=1)
+
+        def calcular():
+            agregado = self.motor.agregado(columnas_consulta(funcion, parametros), anio, activos)
+            instrumentos.contar(fallos=1, filas=len(agregado))
+            return funcion(agregado, anio=anio, **parametros)
+
+        return self.cache.obtener(clave, calcular)
+
+    def consultador(self, filtros=None):
+        return functools.partial(self.consultar, filtros=filtros)
+
+
+def cargar_datos(cache=None):
+    # Con pandas el cubo vive en memoria (CuboIncremental); con SQL se consulta en la base
+    motor = obtener()
+    if motor.nombre == "pandas":
+        return ingesta.CuboIncremental(motor.cubo(), cache=cache)
+    return CuboSQL(motor, cache=cache)
+
+
+def obtener(nombre=MOTOR, origen=None):
+    # El origen por defecto es el almacén Arrow (se regenera desde BD.csv si hace falta)
+    if nombre == "pandas":
+        return MotorPandas()
+    if origen is None:
+        if not almacen.almacen_vigente():
+            almacen.construir_almacen()
+        origen = almacen.RUTA_ALMACEN
+    if nombre == "sqlite":
+        return MotorSQLite(origen=origen)
+    if nombre == "duckdb":
+        return MotorDuckDB(origen=origen)
+    raise ValueError(f"Motor desconocido: {nombre} (pandas, sqlite o duckdb)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa las ventas a un motor SQL para consultas fuera de memoria")
+    parser.add_argument("motor", choices=["sqlite", "duckdb"])
+    parser.add_argument("--origen", default=almacen.RUTA_ALMACEN, help="Archivo .csv o .arrow")
+    parser.add_argument("--destino", help="Archivo de base de datos")
+    args = parser.parse_args()
+
+    clase = MotorSQLite if args.motor == "sqlite" else MotorDuckDB
+    motor = clase(args.destino) if args.destino else clase()
+    inicio = time.perf_counter()
+    conteo = {}
+    filas = motor.importar(lotes_origen(args.origen, conteo=conteo))
+    print(
+        f"{filas:,} filas importadas a {motor.ruta} ({time.perf_counter() - inicio:.1f} s), "
+        f"{conteo['descartadas']:,} descartadas por llaves vacías"
+    )
@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import cubo as cb
+
+# ============================
+# Ejecución en paralelo por (Año, Mes)
+# ============================
+# Las transacciones se separan por mes (orden estable, así cada grupo conserva
+# el orden original de sus filas) y cada trabajador agrega sus meses. Como
+# Año y Mes encabezan las llaves del cubo, los grupos de dos meses distintos
+# nunca se mezclan: concatenar los cubos parciales en orden de mes da
+# exactamente el mismo cubo que un solo groupby, suma por suma.
+#
+# El pool se arranca con forkserver (o spawn donde no existe) y no con fork: el
+# cubo se construye dentro del servidor de Streamlit, que tiene varios hilos, y
+# un fork de un proceso con hilos puede dejar en el hijo candados tomados por
+# hilos que ya no existen. Cada trabajador recibe solo su porción. Los scripts
+# fuera del servidor (benchmark.py) pueden pedir inicio="fork", con el que los
+# trabajadores heredan las columnas sin copiarlas ni serializarlas.
+#
+# El número de procesos tiene tope (LCG_TRABAJADORES, 4 por defecto) para que
+# un servidor con muchos núcleos no arranque un proceso por núcleo.
+
+TRABAJADORES = max(min(os.cpu_count() or 1, int(os.environ.get("LCG_TRABAJADORES", 4))), 1)
+INICIO = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+FILAS_MINIMAS = 1_000_000  # con menos filas arrancar el pool cuesta más de lo que ahorra
+
+_COLUMNAS = None  # columnas compartidas con hilos o hijos de fork, solo mientras corre el pool
+
+
+def particionar(df):
+    # Posiciones de las filas ordenadas por mes y los límites de cada mes
+    periodo = df["Año"].to_numpy().astype(np.int64) * 12 + df["Mes"].to_numpy() - 1
+    periodo -= periodo.min() if len(periodo) else 0
+    # Con pocos meses el código cabe en 16 bits y NumPy usa radix sort (lineal)
+    codigo = periodo.astype(np.uint16) if len(periodo) and periodo.max() < 2 ** 16 else periodo
+    orden = np.argsort(codigo, kind="stable")
+    limites = np.flatnonzero(np.diff(codigo[orden])) + 1
+    return orden, np.r_[0, limites, len(orden)]
+
+
+def _tareas(limites, trabajadores):
+    # Meses contiguos agrupados en tareas de tamaño parecido (varias por trabajador)
+    objetivo = limites[-1] / max(trabajadores * 4, 1)
+    tareas, inicio = [], 0
+    for i in range(1, len(limites)):
+        if limites[i] - limites[inicio] >= objetivo or i == len(limites) - 1:
+            tareas.append((inicio, i))
+            inicio = i
+    return tareas
+
+
+def _porcion(orden, limites, tarea, columnas=None):
+    # Las filas de los meses de una tarea, en su orden original
+    inicio, fin = tarea
+    filas = orden[limites[inicio]:limites[fin]]
+    columnas = _COLUMNAS if columnas is None else columnas
+    return pd.DataFrame({columna: valores[filas] for columna, valores in columnas.items()})
+
+
+def _cubo_tarea(orden, limites, tarea):
+    # Un groupby por mes: el cubo de varios meses juntos ordena igual que por separado
+    porcion = _porcion(orden, limites, tarea)
+    bordes = limites[tarea[0]:tarea[1] + 1] - limites[tarea[0]]
+    return [cb.construir_cubo(porcion.iloc[a:b]) for a, b in zip(bordes[:-1], bordes[1:])]
+
+
+def _cubo_porcion(porcion, bordes):
+    return [cb.construir_cubo(porcion.iloc[a:b]) for a, b in zip(bordes[:-1], bordes[1:])]
+
+
+def mapear(df, columnas, funcion_fork, funcion_porcion, trabajadores=TRABAJADORES, ejecutor="procesos", inicio=INICIO):
+    # Aplica la función a cada grupo de meses en el pool y devuelve los resultados en orden de mes
+    global _COLUMNAS
+    orden, limites = particionar(df)
+    tareas = _tareas(limites, trabajadores)
+    columnas_np = {columna: df[columna].to_numpy() for columna in columnas}
+    contexto = multiprocessing.get_context(inicio)
+    if ejecutor == "hilos" or trabajadores <= 1 or inicio == "fork":
+        # Hilos e hijos de fork leen las columnas del global; se suelta al terminar
+        # para que las transacciones no queden vivas junto al cubo
+        _COLUMNAS = columnas_np
+        try:
+            if ejecutor == "hilos" or trabajadores <= 1:
+                with ThreadPoolExecutor(max(trabajadores, 1)) as pool:
+                    return list(pool.map(lambda tarea: funcion_fork(orden, limites, tarea), tareas))
+            with ProcessPoolExecutor(trabajadores, mp_context=contexto) as pool:
+                futuros = [pool.submit(funcion_fork, orden, limites, tarea) for tarea in tareas]
+                return [futuro.result() for futuro in futuros]
+        finally:
+            _COLUMNAS = None
+    # Sin fork: cada trabajador recibe solo las filas de su tarea
+    with ProcessPoolExecutor(trabajadores, mp_context=contexto) as pool:
+        futuros = [
+            pool.submit(
+                funcion_porcion, _porcion(orden, limites, tarea, columnas_np),
+                limites[tarea[0]:tarea[1] + 1] - limites[tarea[0]]
+            )
+            for tarea in tareas
+        ]
+        return [futuro.result() for futuro in futuros]
+
+
+def construir_cubo(df, trabajadores=TRABAJADORES, ejecutor="procesos", inicio=INICIO):
+    # Mismo resultado que cubo.construir_cubo(df), con los meses repartidos entre procesos
+    if trabajadores <= 1 or len(df) < FILAS_MINIMAS:
+        return cb.construir_cubo(df)
+    parciales = mapear(df, cb.COLUMNAS_ORIGEN, _cubo_tarea, _cubo_porcion, trabajadores, ejecutor, inicio)
+    return pd.concat([cubo for lista in parciales for cubo in lista], ignore_index=True)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# ============================
+# Clasificación ABC (Pareto)
+# ============================
+# Un porcentaje acumulado x es "A" si x <= 0.8, "B" si x <= 0.95 y "C" en otro
+# caso. En lugar de llamar una función de Python por elemento, se busca la
+# posición de cada x dentro de los umbrales con np.searchsorted.
+
+VENTAS = "Ventas Netas (USD)"
+UMBRALES = (0.8, 0.95)
+CLASES = ("A", "B", "C")
+DIMENSIONES = {
+    "departamento": "Departamento - Clave",
+    "cliente": "Número de cliente",
+    "familia": "Familia - Clave",
+    "vendedor": "Número de Vendedor",
+}
+
+
+def posiciones_abc(porcentaje_acumulado, umbrales=UMBRALES):
+    # side="left" deja los valores iguales al umbral en la clase de ese umbral
+    return np.searchsorted(np.asarray(umbrales), np.asarray(porcentaje_acumulado), side="left")
+
+
+def clasificar(porcentaje_acumulado, umbrales=UMBRALES, clases=CLASES):
+    if len(clases) != len(umbrales) + 1:
+        raise ValueError("Se necesita una clase más que umbrales")
+    return np.asarray(clases)[posiciones_abc(porcentaje_acumulado, umbrales)]
+
+
+def pareto(ventas, umbrales=UMBRALES, clases=CLASES):
+    # ventas: Serie con las ventas por miembro de la dimensión (índice = miembro)
+    ventas = ventas.sort_values(ascending=False, kind="stable")
+    porcentaje_acumulado = ventas.cumsum() / ventas.sum()
+    return pd.DataFrame({
+        ventas.index.name or "Miembro": ventas.index,
+        "Ventas": ventas.values,
+        "Porcentaje Acumulado": porcentaje_acumulado.values,
+        "Clasificación": clasificar(porcentaje_acumulado.values, umbrales, clases),
+    })
+
+
+def pareto_dimension(df, dimension, umbrales=UMBRALES, clases=CLASES, valor=VENTAS):
+    columna = DIMENSIONES.get(dimension, dimension)
+    return pareto(df.groupby(columna)[valor].sum(), umbrales, clases)
+
+
+def pareto_por_anios(df, dimension, anios=None, umbrales=UMBRALES, clases=CLASES, valor=VENTAS):
+    # Clasifica todos los años de una vez: un groupby y, por año, un argsort y un
+    # cumsum sobre bloques contiguos. Sirve para análisis por lotes (benchmark.py);
+    # los paneles del dashboard clasifican un año a la vez con pareto()
+    columna = DIMENSIONES.get(dimension, dimension)
+    if anios is not None:
+        df = df[df["Año"].isin([int(a) for a in anios])]
+    if len(clases) != len(umbrales) + 1:
+        raise ValueError("Se necesita una clase más que umbrales")
+    agrupado = df.groupby(["Año", columna])[valor].sum()
+    anio = agrupado.index.get_level_values(0).to_numpy()
+    miembro = agrupado.index.get_level_values(1).to_numpy()
+    ventas = agrupado.to_numpy()
+    # El groupby deja los años contiguos; cada bloque se ordena por ventas descendentes
+    inicios = np.flatnonzero(np.r_[True, anio[1:] != anio[:-1]])
+    fines = np.r_[inicios[1:], len(ventas)]
+    orden = np.empty(len(ventas), dtype=np.int64)
+    porcentaje = np.empty(len(ventas))
+    for inicio, fin in zip(inicios, fines):
+        bloque = inicio + np.argsort(-ventas[inicio:fin], kind="stable")
+        orden[inicio:fin] = bloque
+        porcentaje[inicio:fin] = np.cumsum(ventas[bloque]) / ventas[bloque].sum()
+    return pd.DataFrame({
+        "Año": anio,
+        columna: miembro[orden],
+        "Ventas": ventas[orden],
+        "Porcentaje Acumulado": porcentaje,
+        "Clasificación": pd.Categorical.from_codes(posiciones_abc(porcentaje, umbrales), list(clases)),
+    })
+
+
+def resumen(tabla, nombre_conteo, clases=CLASES):
+    miembro = tabla.columns[0]
+    return tabla.groupby("Clasificación").agg(
+        Monto_Ventas=("Ventas", "sum"),
+        **{nombre_conteo: (miembro, "count")}
+    ).reindex(list(clases))
@@ -0,0 +1,171 @@
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# Pronóstico de ventas por series
+# ============================
+# Cada miembro de una dimensión (departamento, familia, cliente o vendedor) es
+# una serie mensual. Todas comparten el mismo eje de meses y por lo tanto la
+# misma matriz de diseño (constante, tendencia y un indicador por mes), así que
+# se ajustan juntas con un solo mínimos cuadrados de varios lados derechos. Los
+# intervalos salen de la varianza residual de cada serie.
+
+VENTAS = "Ventas Netas (USD)"
+DIMENSIONES = {
+    "Departamento": "Departamento - Clave",
+    "Familia": "Familia - Clave",
+    "Cliente": "Número de cliente",
+    "Vendedor": "Número de Vendedor",
+}
+HORIZONTE = 6
+NIVEL = 0.95
+MESES_ESTACIONALES = 24  # con menos de dos años de historia se ajusta solo la tendencia
+
+
+def matriz_series(cubo, columna=None):
+    # Una fila por miembro y una columna por mes; los meses sin ventas valen 0
+    periodo = cubo["Año"].to_numpy().astype(np.int64) * 12 + cubo["Mes"].to_numpy() - 1
+    periodos, columna_mes = np.unique(periodo, return_inverse=True)
+    if columna is None:
+        miembros = np.array(["Total"])
+        fila = np.zeros(len(cubo), dtype=np.int64)
+    else:
+        fila, miembros = pd.factorize(cubo[columna], sort=True)
+        miembros = np.asarray(miembros)
+    n = len(periodos)
+    Y = np.bincount(fila * n + columna_mes, weights=cubo[VENTAS].to_numpy(), minlength=len(miembros) * n)
+    return miembros, periodos, Y.reshape(len(miembros), n)
+
+
+def disenar(periodos, origen, estacional=True):
+    t = (periodos - origen).astype(float)
+    columnas = [np.ones(len(t)), t]
+    if estacional:
+        mes = periodos % 12
+        columnas += [(mes == m).astype(float) for m in range(1, 12)]
+    return np.column_stack(columnas)
+
+
+def _ajustar(X, Y):
+    # Todas las series usan la misma X: un solo lstsq con una columna por serie
+    coef, _, rango, _ = np.linalg.lstsq(X, Y.T, rcond=None)
+    residuos = Y - (X @ coef).T
+    grados = max(len(X) - rango, 1)
+    sigma = np.sqrt((residuos ** 2).sum(axis=1) / grados)
+    return coef.T, sigma
+
+
+def tendencia_lineal(valores):
+    # Recta de mínimos cuadrados sobre el número de mes (0, 1, 2, ...)
+    valores = np.asarray(valores, dtype=float)
+    X = disenar(np.arange(len(valores)), 0, estacional=False)
+    coef, _ = _ajustar(X, valores[None, :])
+    return X @ coef[0]
+
+
+class Modelo:
+
+    def __init__(self, miembros, periodos, Y, estacional=None):
+        inicio = time.perf_counter()
+        self.miembros = miembros
+        self.periodos = periodos
+        self.Y = Y
+        self.estacional = len(periodos) >= MESES_ESTACIONALES if estacional is None else estacional
+        self.X = disenar(periodos, periodos[0], self.estacional)
+        self.coef, self.sigma = _ajustar(self.X, Y)
+        self.XtX_inv = np.linalg.pinv(self.X.T @ self.X)
+        self.segundos_ajuste = time.perf_counter() - inicio
+
+    @property
+    def series_por_segundo(self):
+        return len(self.miembros) / self.segundos_ajuste if self.segundos_ajuste > 0 else float("inf")
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.miembros, self.periodos, self.Y, self.X, self.coef, self.sigma, self.XtX_inv))
+
+    def ajuste(self):
+        return self.coef @ self.X.T
+
+    def pronosticar(self, horizonte=HORIZONTE, nivel=NIVEL):
+        # Medias e intervalos de predicción de todas las series: matrices (series x horizonte)
+        futuros = self.periodos[-1] + np.arange(1, horizonte + 1)
+        Xf = disenar(futuros, self.periodos[0], self.estacional)
+        media = self.coef @ Xf.T
+        z = NormalDist().inv_cdf(0.5 + nivel / 2)
+        apalancamiento = np.einsum("hi,ij,hj->h", Xf, self.XtX_inv, Xf)
+        ancho = z * self.sigma[:, None] * np.sqrt(1 + apalancamiento)[None, :]
+        return futuros, media, media - ancho, media + ancho
+
+    def posicion(self, miembro):
+        posiciones = np.flatnonzero(self.miembros == miembro)
+        if len(posiciones) == 0:
+            raise KeyError(miembro)
+        return posiciones[0]
+
+    def serie(self, miembro, horizonte=HORIZONTE, nivel=NIVEL):
+        # Historia, ajuste y pronóstico de un miembro en una sola tabla por mes
+        i = self.posicion(miembro)
+        futuros, media, inferior, superior = self.pronosticar(horizonte, nivel)
+        historia = pd.DataFrame({"Periodo": self.periodos, VENTAS: self.Y[i], "Ajuste": self.ajuste()[i]})
+        futuro = pd.DataFrame({"Periodo": futuros, "Pronóstico": media[i], "Inferior": inferior[i], "Superior": superior[i]})
+        tabla = pd.concat([historia, futuro], ignore_index=True)
+        tabla["Fecha"] = pd.to_datetime({"year": tabla["Periodo"] // 12, "month": tabla["Periodo"] % 12 + 1, "day": 1})
+        return tabla
+
+
+def backtest(miembros, periodos, Y, horizonte=3, pliegues=3, estacional=None):
+    # Origen móvil: se ajusta con la historia hasta cada corte y se pronostican los
+    # siguientes meses; el error se acumula por serie sobre todos los cortes
+    estacional = len(periodos) >= MESES_ESTACIONALES if estacional is None else estacional
+    error_abs = np.zeros(len(miembros))
+    real_abs = np.zeros(len(miembros))
+    puntos = 0
+    for pliegue in range(pliegues, 0, -1):
+        corte = len(periodos) - horizonte * pliegue
+        X = disenar(periodos[:corte], periodos[0], estacional)
+        if corte <= X.shape[1]:
+            continue
+        coef, _ = _ajustar(X, Y[:, :corte])
+        prueba = periodos[corte:corte + horizonte]
+        pronostico = coef @ disenar(prueba, periodos[0], estacional).T
+        real = Y[:, corte:corte + horizonte]
+        error_abs += np.abs(real - pronostico).sum(axis=1)
+        real_abs += np.abs(real).sum(axis=1)
+        puntos += len(prueba)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wape = np.where(real_abs > 0, error_abs / real_abs * 100, np.nan)
+    return pd.DataFrame(
+        {"MAE": error_abs / puntos if puntos else np.nan, "WAPE (%)": wape},
+        index=pd.Index(miembros, name="Miembro"),
+    )
+
+
+# Formas compatibles con CuboIncremental.consultar: el modelo queda en caché por versión del dataset
+
+def ajustar(cubo, anio=None, dimension=None):
+    return Modelo(*matriz_series(cubo, DIMENSIONES.get(dimension)))
+
+
+def evaluar(cubo, anio=None, dimension=None, horizonte=3, pliegues=3):
+    return backtest(*matriz_series(cubo, DIMENSIONES.get(dimension)), horizonte=horizonte, pliegues=pliegues)
+
+
+if __name__ == "__main__":
+    import sys
+
+    import almacen
+    import cubo as cb
+
+    cubo_base = cb.construir_cubo(almacen.cargar(cb.COLUMNAS_ORIGEN))
+    nombres = sys.argv[1:] or [None] + list(DIMENSIONES)
+    for nombre in nombres:
+        modelo = ajustar(cubo_base, dimension=nombre)
+        errores = evaluar(cubo_base, dimension=nombre)
+        print(
+            f"{nombre or 'Total'}: {len(modelo.miembros):,} series en {modelo.segundos_ajuste * 1000:.1f} ms "
+            f"({modelo.series_por_segundo:,.0f} series/s), WAPE mediano {errores['WAPE (%)'].median():.1f}%"
+        )
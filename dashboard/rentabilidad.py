@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# ============================
+# Analítica de rentabilidad por cliente
+# ============================
+# Una sola agrupación por (cliente, año, mes) alimenta todo: márgenes por
+# cliente y año, cuartiles de rentabilidad por año y la serie mensual de cada
+# cliente. Las series se guardan en formato CSR (cliente -> rango de meses con
+# ventas), así que el detalle de un cliente cuesta O(meses) y no un recorrido
+# de todas las filas.
+
+VENTAS = "Ventas Netas (USD)"
+COSTO = "Costo (USD)"
+CLIENTE = "Número de cliente"
+CUARTILES = (0.25, 0.5, 0.75)
+
+
+class Rentabilidad:
+
+    def __init__(self, cubo):
+        mensual = cubo.groupby([CLIENTE, "Año", "Mes"]).agg({VENTAS: "sum", COSTO: "sum"})
+        cliente = mensual.index.get_level_values(0).to_numpy()
+        anio = mensual.index.get_level_values(1).to_numpy().astype(np.int64)
+        periodo = anio * 12 + mensual.index.get_level_values(2).to_numpy() - 1
+
+        # Eje de meses común a todos los clientes
+        self.periodos = np.unique(periodo)
+        self.meses = pd.DataFrame({"Año": self.periodos // 12, "Mes": self.periodos % 12 + 1})
+        self.meses["Mes_str"] = self.meses["Año"].astype(str) + "-" + self.meses["Mes"].astype(str).str.zfill(2)
+        self.mes_fila = np.searchsorted(self.periodos, periodo).astype(np.int32)
+        self.anio_fila = anio.astype(np.int32)
+        self.ventas = mensual[VENTAS].to_numpy()
+
+        # CSR: las filas de cada cliente quedan contiguas porque el groupby ordena por cliente
+        self.clientes, inicios = np.unique(cliente, return_index=True)
+        self.punteros = np.r_[inicios, len(cliente)]
+        self.cliente_fila = np.repeat(np.arange(len(self.clientes)), np.diff(self.punteros))
+
+        # Margen por cliente y año a partir de los meses ya agrupados
+        anual = mensual.groupby(level=[0, 1]).sum()
+        anual = anual[anual[COSTO] > 0]
+        anual["Rentabilidad"] = ((anual[VENTAS] - anual[COSTO]) / anual[COSTO]) * 100
+        self.anual = anual
+
+        # Cuartiles y totales mensuales por cuartil para cada año y para todo el periodo
+        self._cuartiles = {}
+        self._totales = {}
+        for clave in [None] + sorted(set(self.anio_fila.tolist())):
+            self._preparar(clave)
+
+    def _preparar(self, anio):
+        anual = self.anual if anio is None else self.anual[self.anual.index.get_level_values(1) == anio]
+        cortes = anual["Rentabilidad"].quantile(list(CUARTILES)).to_numpy() if len(anual) else np.array([])
+        # side="left": una rentabilidad igual al corte cae en el cuartil de abajo (<= q1 es Q1)
+        cuartil = pd.Series(np.searchsorted(cortes, anual["Rentabilidad"].to_numpy(), side="left"), index=anual.index)
+        self._cuartiles[anio] = (anual.assign(Cuartil=cuartil.to_numpy() + 1), cortes)
+
+        # Cuartil de cada fila mensual (0 = sin costo, fuera de los cuartiles)
+        en_anio = np.ones(len(self.ventas), dtype=bool) if anio is None else self.anio_fila == anio
+        codigo_fila = np.zeros(len(self.ventas), dtype=np.int64)
+        llaves = pd.MultiIndex.from_arrays([self.clientes[self.cliente_fila], self.anio_fila])
+        posicion = cuartil.reindex(llaves).to_numpy()
+        valido = en_anio & ~np.isnan(posicion)
+        codigo_fila[valido] = posicion[valido].astype(np.int64) + 1
+        n = len(self.periodos)
+        grupos = np.where(en_anio, codigo_fila, -1)
+        usar = grupos >= 0
+        indice = grupos[usar] * n + self.mes_fila[usar]
+        ventas = np.bincount(indice, weights=self.ventas[usar], minlength=5 * n).reshape(5, n)
+        filas = np.bincount(indice, minlength=5 * n).reshape(5, n)
+        self._totales[anio] = (ventas, filas)
+
+    def _clave(self, anio):
+        # Con filtros activos puede pedirse un año sin filas: se prepara vacío
+        clave = None if anio is None else int(anio)
+        if clave not in self._cuartiles:
+            self._preparar(clave)
+        return clave
+
+    @property
+    def nbytes(self):
+        arreglos = [self.periodos, self.mes_fila, self.anio_fila, self.ventas, self.clientes, self.punteros, self.cliente_fila]
+        tablas = sum(int(t.memory_usage(deep=True).sum()) for t, _ in self._cuartiles.values())
+        totales = sum(v.nbytes + f.nbytes for v, f in self._totales.values())
+        return sum(a.nbytes for a in arreglos) + tablas + totales
+
+    def rentabilidad_clientes(self, anio=None):
+        # Índice (cliente, año) con ventas, costo, rentabilidad y cuartil (1 = menos rentable)
+        return self._cuartiles[self._clave(anio)][0]
+
+    def peor_cliente(self, anio=None):
+        tabla = self.rentabilidad_clientes(anio)
+        if tabla.empty:
+            return None
+        cliente, anio_peor = tabla["Rentabilidad"].idxmin()
+        return cliente, anio_peor, tabla.loc[(cliente, anio_peor), "Rentabilidad"]
+
+    def serie_cliente(self, cliente, anio=None):
+        # Ventas mensuales de un cliente sobre el eje completo de meses: O(meses del cliente)
+        serie = np.zeros(len(self.periodos))
+        posicion = np.searchsorted(self.clientes, cliente)
+        if posicion < len(self.clientes) and self.clientes[posicion] == cliente:
+            inicio, fin = self.punteros[posicion], self.punteros[posicion + 1]
+            filas = slice(inicio, fin)
+            if anio is None:
+                np.add.at(serie, self.mes_fila[filas], self.ventas[filas])
+            else:
+                propio = self.anio_fila[filas] == int(anio)
+                np.add.at(serie, self.mes_fila[filas][propio], self.ventas[filas][propio])
+        return serie
+
+    def comparativo(self, cliente, anio=None, cuartil=None):
+        # Ventas mensuales del grupo (todos o un cuartil) contra las del cliente,
+        # solo en los meses en que el grupo tuvo ventas
+        anio = self._clave(anio)
+        ventas, filas = self._totales[anio]
+        if cuartil is None:
+            total, conteo = ventas.sum(axis=0), filas.sum(axis=0)
+        else:
+            total, conteo = ventas[cuartil], filas[cuartil]
+        meses = conteo > 0
+        tabla = self.meses[meses].reset_index(drop=True)
+        tabla[VENTAS] = total[meses]
+        tabla[VENTAS + "_cliente"] = self.serie_cliente(cliente, anio)[meses]
+        return tabla
+
+
+def construir(cubo, anio=None):
+    # Forma compatible con CuboIncremental.consultar; la estructura cubre todos los años
+    return Rentabilidad(cubo)
@@ -0,0 +1,406 @@
+import html
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+import almacen
+import cubo as cb
+import distintos
+import graficas
+import paralelo
+import pareto
+import rentabilidad
+
+# ============================
+# Reportes estáticos por vendedor y por cliente
+# ============================
+# Las mismas cifras del dashboard (clase del Pareto, ventas mensuales,
+# rentabilidad por trimestre y comparación contra los clientes del primer
+# cuartil de rentabilidad) como una página HTML por vendedor y por cliente.
+#
+# Todo lo que comparten los reportes se calcula una sola vez en el proceso
+# principal: el cubo del año, los Pareto de vendedores y clientes, la estructura
+# de rentabilidad, los bitmaps de clientes distintos y las tablas mensuales por
+# vendedor y por cliente, ordenadas por miembro para que cada reporte lea solo
+# su rango de filas. Los trabajadores reciben esos agregados una vez (con fork
+# los heredan sin copiarlos) y solo arman figuras y escriben archivos. Las
+# figuras se arman como dict y se serializan sin validar: con miles de reportes
+# la validación de go.Figure costaba más que todo lo demás.
+#
+# Cada reporte se escribe a un temporal y se renombra, así que una corrida
+# interrumpida se retoma sin rehacer los terminados. Si el cubo cambió desde la
+# corrida anterior (otra firma) se borran los reportes existentes antes de
+# guardar la firma nueva: una corrida interrumpida después de un cambio de datos
+# nunca deja páginas viejas que parezcan vigentes.
+
+VENDEDOR = "Número de Vendedor"
+CLIENTE = "Número de cliente"
+TIPOS = {"vendedores": VENDEDOR, "clientes": CLIENTE}
+DIRECTORIO_REPORTES = os.path.join(almacen.DIRECTORIO_DATOS, "reportes")
+TRABAJADORES = paralelo.TRABAJADORES  # mismo tope que el cubo en paralelo (LCG_TRABAJADORES)
+TAMANO_LOTE = 50  # reportes por tarea del pool
+TOP_CLIENTES = 10
+MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre",
+         "Noviembre", "Diciembre"]
+
+_AGREGADOS = None  # agregados compartidos con los trabajadores
+
+
+def _por_miembro(tabla, columna):
+    # Tabla ordenada por miembro y punteros a su rango de filas (como el CSR de rentabilidad.py)
+    tabla = tabla.sort_values(columna, kind="stable").reset_index(drop=True)
+    miembros, inicios = np.unique(tabla[columna].to_numpy(), return_index=True)
+    return tabla, miembros, np.r_[inicios, len(tabla)]
+
+
+def _clases(tabla_pareto, columna):
+    return pd.Series(tabla_pareto["Clasificación"].to_numpy(), index=tabla_pareto[columna].to_numpy())
+
+
+def rentabilidad_trimestral_por(mensual, columna):
+    # cb.rentabilidad_trimestral de todos los miembros en un solo groupby
+    trimestre = (mensual["Mes"] - 1) // 3 + 1
+    trimestres = mensual.groupby([columna, "Año", trimestre.rename("Q")], as_index=False)[[cb.VENTAS, cb.COSTO]].sum()
+    trimestres = trimestres[trimestres[cb.COSTO] > 0]
+    trimestres["Trimestre"] = trimestres["Año"].astype(str) + "Q" + trimestres["Q"].astype(str)
+    trimestres["Rentabilidad (%)"] = ((trimestres[cb.VENTAS] - trimestres[cb.COSTO]) / trimestres[cb.COSTO]) * 100
+    return trimestres.drop(columns="Q")
+
+
+def firma(cubo):
+    # Cambia con cualquier cambio del cubo; se guarda junto a los reportes
+    return f"{int(pd.util.hash_pandas_object(cubo, index=False).sum()):016x}"
+
+
+class Agregados:
+
+    def __init__(self, cubo, anio):
+        inicio = time.perf_counter()
+        self.anio = int(anio)
+        datos = cb.filtrar_anio(cubo, self.anio)
+        self.firma = firma(datos)
+        self.ventas_totales = datos[cb.VENTAS].sum()
+
+        self.pareto = {}
+        self.clases = {}
+        self.mensual = {}
+        self.trimestres = {}
+        for tipo, columna in TIPOS.items():
+            self.pareto[tipo] = pareto.pareto(cb.ventas_por(datos, columna))
+            self.clases[tipo] = _clases(self.pareto[tipo], columna)
+            # Ventas y costo por miembro × mes: de aquí salen la serie mensual y los trimestres
+            mensual = datos.groupby([columna, "Año", "Mes"], as_index=False)[[cb.VENTAS, cb.COSTO]].sum()
+            self.mensual[tipo] = _por_miembro(mensual, columna)
+            self.trimestres[tipo] = _por_miembro(rentabilidad_trimestral_por(mensual, columna), columna)
+
+        # Clientes de cada vendedor, con su clase de cliente
+        cartera = datos.groupby([VENDEDOR, CLIENTE], as_index=False)[cb.VENTAS].sum()
+        cartera = cartera.sort_values([VENDEDOR, cb.VENTAS], ascending=[True, False], kind="stable")
+        cartera["Clasificación"] = self.clases["clientes"].reindex(cartera[CLIENTE].to_numpy()).to_numpy()
+        self.cartera = _por_miembro(cartera, VENDEDOR)
+
+        # Clientes distintos por vendedor en el año y por mes, con los bitmaps del dashboard
+        conteo = distintos.conteo_clientes(datos, self.anio)
+        self.clientes_anio = conteo.contar([VENDEDOR], self.anio)
+        self.clientes_mes = conteo.contar([VENDEDOR, "Mes"], self.anio)
+
+        # Márgenes, cuartiles y totales mensuales por cuartil de todos los clientes
+        self.rentabilidad = rentabilidad.construir(datos)
+        self.rentabilidad_clientes = self.rentabilidad.rentabilidad_clientes(self.anio).droplevel(1)
+        self.trimestres_total = cb.rentabilidad_trimestral(datos, self.anio).reset_index()
+        self.segundos_construccion = time.perf_counter() - inicio
+
+    def miembros(self, tipo):
+        return self.mensual[tipo][1]
+
+    def filas(self, tabla, miembro):
+        tabla, miembros, punteros = tabla
+        posicion = np.searchsorted(miembros, miembro)
+        if posicion >= len(miembros) or miembros[posicion] != miembro:
+            return tabla.iloc[:0]
+        return tabla.iloc[punteros[posicion]:punteros[posicion + 1]]
+
+
+# ============================
+# Figuras y páginas
+# ============================
+
+def _layout(titulo, eje_x, eje_y, **opciones):
+    return {
+        "title": {"text": titulo}, "xaxis": {"title": {"text": eje_x}}, "yaxis": {"title": {"text": eje_y}},
+        "height": 380, **opciones,
+    }
+
+
+def figura_mensual(mensual, titulo):
+    # Máximo en verde y mínimo en rojo, como en "Ventas mensuales destacadas"
+    ventas = mensual[cb.VENTAS].to_numpy()
+    return {
+        "data": [{
+            "type": "bar", "x": [MESES[m - 1] for m in mensual["Mes"]], "y": ventas,
+            "marker": {"color": graficas.colores_extremos(ventas)},
+        }],
+        "layout": _layout(titulo, "Mes", cb.VENTAS),
+    }
+
+
+def figura_trimestral(trimestres, referencia):
+    return {
+        "data": [
+            {"type": "bar", "x": list(trimestres["Trimestre"]), "y": trimestres["Rentabilidad (%)"].to_numpy(),
+             "name": "Reporte", "marker": {"color": graficas.VERDE}},
+            {"type": "scatter", "x": list(referencia["Trimestre"]), "y": referencia["Rentabilidad (%)"].to_numpy(),
+             "name": "Toda la empresa", "mode": "lines+markers", "line": {"color": graficas.GRIS}},
+        ],
+        "layout": _layout("Rentabilidad por trimestre", "Trimestre", "Rentabilidad (%)"),
+    }
+
+
+def figura_comparativo(comparativo, titulo, grupo):
+    # Ventas del grupo de fondo y las del cliente encima, como en "Cliente menos rentable"
+    x = list(comparativo["Mes_str"])
+    return {
+        "data": [
+            {"type": "bar", "x": x, "y": comparativo[cb.VENTAS].to_numpy(), "name": grupo,
+             "marker": {"color": graficas.GRIS}, "opacity": 0.85},
+            {"type": "bar", "x": x, "y": comparativo[cb.VENTAS + "_cliente"].to_numpy(), "name": "Cliente",
+             "marker": {"color": graficas.ROJO}, "opacity": 0.85},
+        ],
+        "layout": _layout(titulo, "Mes", cb.VENTAS, barmode="overlay"),
+    }
+
+
+def _grafica(figura, numero):
+    # Plotly.newPlot con el JSON de la figura; plotly.min.js se carga una vez por página
+    return (
+        f"<div id='g{numero}' style='height:{figura['layout']['height']}px'></div>"
+        f"<script>Plotly.newPlot('g{numero}', {pio.to_json(figura, validate=False)})</script>"
+    )
+
+
+def _dato(nombre, valor):
+    return f"<tr><th>{html.escape(nombre)}</th><td>{html.escape(valor)}</td></tr>"
+
+
+def pagina(titulo, datos, figuras, tablas=()):
+    # Plotly.js se carga una vez desde la raíz del año en lugar de incrustarlo en cada reporte
+    partes = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>{html.escape(titulo)}</title><script src='../plotly.min.js'></script>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}"
+        "th,td{padding:4px 10px;border-bottom:1px solid #ddd;text-align:right}th{text-align:left}</style>",
+        f"</head><body><h1>{html.escape(titulo)}</h1><table>",
+        *[_dato(nombre, valor) for nombre, valor in datos],
+        "</table>",
+    ]
+    partes += [_grafica(figura, i) for i, figura in enumerate(figuras)]
+    for subtitulo, tabla in tablas:
+        partes += [f"<h2>{html.escape(subtitulo)}</h2>", tabla.to_html(index=False, float_format="{:,.2f}".format)]
+    partes.append("</body></html>")
+    return "".join(partes)
+
+
+def reporte_vendedor(agregados, vendedor):
+    mensual = agregados.filas(agregados.mensual["vendedores"], vendedor)
+    ventas = mensual[cb.VENTAS].sum()
+    clientes_mes = agregados.clientes_mes.get(vendedor)
+    datos = [
+        ("Año", str(agregados.anio)),
+        ("Clase (Pareto de vendedores)", str(agregados.clases["vendedores"].get(vendedor, "-"))),
+        ("Ventas Netas (USD)", f"${ventas:,.2f}"),
+        ("Participación", f"{ventas / agregados.ventas_totales * 100:.2f}%" if agregados.ventas_totales else "-"),
+        ("Clientes atendidos", f"{int(agregados.clientes_anio.get(vendedor, 0)):,}"),
+        ("Clientes por mes (máximo)", f"{int(clientes_mes.max()):,}" if clientes_mes is not None else "-"),
+    ]
+    cartera = agregados.filas(agregados.cartera, vendedor).head(TOP_CLIENTES)
+    figuras = [
+        figura_mensual(mensual, f"Ventas mensuales del vendedor {vendedor}"),
+        figura_trimestral(agregados.filas(agregados.trimestres["vendedores"], vendedor), agregados.trimestres_total),
+    ]
+    tablas = [(f"Sus {TOP_CLIENTES} clientes con más ventas", cartera[[CLIENTE, cb.VENTAS, "Clasificación"]])]
+    return pagina(f"Vendedor {vendedor} — {agregados.anio}", datos, figuras, tablas), figuras
+
+
+def reporte_cliente(agregados, cliente):
+    mensual = agregados.filas(agregados.mensual["clientes"], cliente)
+    ventas = mensual[cb.VENTAS].sum()
+    margen = agregados.rentabilidad_clientes.loc[cliente] if cliente in agregados.rentabilidad_clientes.index else None
+    datos = [
+        ("Año", str(agregados.anio)),
+        ("Clase (Pareto de clientes)", str(agregados.clases["clientes"].get(cliente, "-"))),
+        ("Ventas Netas (USD)", f"${ventas:,.2f}"),
+        ("Participación", f"{ventas / agregados.ventas_totales * 100:.2f}%" if agregados.ventas_totales else "-"),
+        ("Rentabilidad", f"{margen['Rentabilidad']:.2f}%" if margen is not None else "-"),
+        ("Cuartil de rentabilidad (1 = menos rentable)", str(int(margen["Cuartil"])) if margen is not None else "-"),
+    ]
+    analisis = agregados.rentabilidad
+    figuras = [
+        figura_mensual(mensual, f"Ventas mensuales del cliente {cliente}"),
+        figura_trimestral(agregados.filas(agregados.trimestres["clientes"], cliente), agregados.trimestres_total),
+        figura_comparativo(analisis.comparativo(cliente, agregados.anio), "Cliente vs ventas totales", "Ventas totales"),
+        figura_comparativo(
+            analisis.comparativo(cliente, agregados.anio, cuartil=1),
+            "Cliente vs clientes poco rentables (primer cuartil)", "Ventas totales Q1"
+        ),
+    ]
+    return pagina(f"Cliente {cliente} — {agregados.anio}", datos, figuras), figuras
+
+
+REPORTES = {"vendedores": reporte_vendedor, "clientes": reporte_cliente}
+
+
+def _escribir(ruta, contenido):
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+
+def ruta_reporte(directorio, tipo, miembro, extension="html"):
+    return os.path.join(directorio, tipo, f"{miembro}.{extension}")
+
+
+def _invalidar(directorio):
+    # Borra los reportes (y temporales) de todos los tipos, no solo de los que se piden
+    for tipo in TIPOS:
+        carpeta = os.path.join(directorio, tipo)
+        if not os.path.isdir(carpeta):
+            continue
+        for nombre in os.listdir(carpeta):
+            if nombre.endswith((".html", ".png", ".tmp")):
+                os.remove(os.path.join(carpeta, nombre))
+
+
+def _iniciar(agregados):
+    global _AGREGADOS
+    _AGREGADOS = agregados
+
+
+def _generar_lote(directorio, tipo, miembros, png):
+    # Tarea de un trabajador: escribe los reportes de un lote de miembros
+    inicio = time.perf_counter()
+    for miembro in miembros:
+        contenido, figuras = REPORTES[tipo](_AGREGADOS, miembro)
+        if png:
+            for i, figura in enumerate(figuras, 1):
+                pio.write_image(figura, ruta_reporte(directorio, tipo, f"{miembro}_{i}", "png"), validate=False)
+        _escribir(ruta_reporte(directorio, tipo, miembro), contenido)
+    return tipo, len(miembros), time.perf_counter() - inicio
+
+
+def indice(agregados, directorio, tipos):
+    # Página de entrada con un enlace por reporte y la clase de cada miembro
+    partes = [f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Reportes {agregados.anio}</title></head><body>"]
+    for tipo in tipos:
+        enlaces = [
+            f"<li><a href='{tipo}/{miembro}.html'>{miembro}</a> ({agregados.clases[tipo].get(miembro, '-')})</li>"
+            for miembro in agregados.miembros(tipo)
+        ]
+        partes.append(f"<h2>{tipo.capitalize()}</h2><ul>{''.join(enlaces)}</ul>")
+    partes.append("</body></html>")
+    _escribir(os.path.join(directorio, "index.html"), "".join(partes))
+
+
+def generar(cubo, anio, directorio=DIRECTORIO_REPORTES, tipos=tuple(TIPOS), trabajadores=TRABAJADORES,
+            png=False, forzar=False, tamano_lote=TAMANO_LOTE, progreso=print):
+    # Reportes de todos los vendedores y clientes del año; devuelve las cifras de la corrida
+    if png:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            raise ImportError("Los reportes en PNG necesitan el paquete kaleido: pip install kaleido")
+    inicio = time.perf_counter()
+    agregados = Agregados(cubo, anio)
+    directorio = os.path.join(directorio, str(agregados.anio))
+    for tipo in tipos:
+        os.makedirs(os.path.join(directorio, tipo), exist_ok=True)
+    ruta_firma = os.path.join(directorio, "firma.txt")
+    anterior = None
+    if os.path.exists(ruta_firma):
+        with open(ruta_firma, encoding="utf-8") as archivo:
+            anterior = archivo.read().strip()
+    if forzar or anterior != agregados.firma:
+        # Primero se borran las páginas y después se guarda la firma nueva
+        _invalidar(directorio)
+        _escribir(ruta_firma, agregados.firma)
+    if not os.path.exists(os.path.join(directorio, "plotly.min.js")):
+        _escribir(os.path.join(directorio, "plotly.min.js"), get_plotlyjs())
+
+    # Solo los reportes que faltan (todos si el cubo cambió, porque se acaban de borrar)
+    pendientes = {}
+    for tipo in tipos:
+        miembros = agregados.miembros(tipo)
+        pendientes[tipo] = [m for m in miembros if not os.path.exists(ruta_reporte(directorio, tipo, m))]
+    total = sum(len(m) for m in pendientes.values())
+    existentes = sum(len(agregados.miembros(tipo)) for tipo in tipos) - total
+    tareas = [
+        (tipo, miembros[i:i + tamano_lote])
+        for tipo, miembros in pendientes.items() for i in range(0, len(miembros), tamano_lote)
+    ]
+
+    # Con fork los trabajadores heredan los agregados; sin fork los reciben una vez cada uno
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context("fork" if "fork" in metodos else None)
+    inicio_pool = time.perf_counter()
+    hechos = {tipo: 0 for tipo in tipos}
+    segundos = {tipo: 0.0 for tipo in tipos}
+    if tareas:
+        with ProcessPoolExecutor(trabajadores, mp_context=contexto, initializer=_iniciar, initargs=(agregados,)) as pool:
+            futuros = [pool.submit(_generar_lote, directorio, tipo, miembros, png) for tipo, miembros in tareas]
+            for futuro in as_completed(futuros):
+                tipo, n, tiempo_lote = futuro.result()
+                hechos[tipo] += n
+                segundos[tipo] += tiempo_lote
+                generados = sum(hechos.values())
+                transcurrido = time.perf_counter() - inicio_pool
+                progreso(f"{generados:,}/{total:,} reportes, {generados / transcurrido:,.1f} reportes/s")
+    indice(agregados, directorio, tipos)
+    return {
+        "directorio": directorio,
+        "agregados_s": agregados.segundos_construccion,
+        "generados": hechos,
+        "omitidos": existentes,
+        "segundos_pool": time.perf_counter() - inicio_pool,
+        "segundos_trabajador": segundos,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import generador
+    import motores
+
+    parser = argparse.ArgumentParser(description="Reportes HTML (y PNG) por vendedor y por cliente en paralelo")
+    parser.add_argument("--anio", type=int, help="Año de los reportes (por defecto el último)")
+    parser.add_argument("--tipos", nargs="+", choices=list(TIPOS), default=list(TIPOS))
+    parser.add_argument("--salida", default=DIRECTORIO_REPORTES)
+    parser.add_argument("--trabajadores", type=int, default=TRABAJADORES)
+    parser.add_argument("--png", action="store_true", help="También una imagen por gráfica (necesita kaleido)")
+    parser.add_argument("--forzar", action="store_true", help="Rehacer los reportes que ya existen")
+    parser.add_argument("--escala", type=float, help="Datos sintéticos: múltiplo de las filas de BD.csv")
+    args = parser.parse_args()
+
+    if args.escala:
+        cubo_base = cb.construir_cubo(generador.generar(args.escala)[cb.COLUMNAS_ORIGEN])
+    else:
+        cubo_base = motores.obtener().cubo()
+    anio = args.anio if args.anio is not None else int(cubo_base["Año"].max())
+    resultado = generar(cubo_base, anio, args.salida, args.tipos, args.trabajadores, args.png, args.forzar)
+    generados = sum(resultado["generados"].values())
+    print(f"Agregados compartidos en {resultado['agregados_s']:.2f} s")
+    for tipo, n in resultado["generados"].items():
+        por_reporte = resultado["segundos_trabajador"][tipo] / n * 1000 if n else 0
+        print(f"{tipo}: {n:,} reportes, {por_reporte:.1f} ms por reporte en cada trabajador")
+    print(
+        f"{generados:,} reportes en {resultado['segundos_pool']:.1f} s con {args.trabajadores} trabajadores "
+        f"({generados / resultado['segundos_pool'] if resultado['segundos_pool'] else 0:,.1f} reportes/s), "
+        f"{resultado['omitidos']:,} ya existían; total {resultado['segundos']:.1f} s en {resultado['directorio']}"
+    )
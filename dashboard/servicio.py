@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import almacen
+import analitica
+from cache import CacheCompartido
+import cubo as cb
+import filtros
+import ingesta
+
+# ============================
+# Servicio HTTP de métricas
+# ============================
+# Expone las funciones de analitica.py sobre HTTP para otras herramientas. El
+# cubo se carga una sola vez; el bucle de asyncio solo parsea y responde, y las
+# consultas que usan CPU corren en un pool de hilos que comparte el mismo cubo
+# (pandas y NumPy sueltan el GIL en la mayor parte del trabajo). Las respuestas
+# ya serializadas se guardan por ruta, parámetros y versión del dataset.
+#
+#   GET /abc?dimension=cliente&anio=2016
+#   GET /top-clientes?n=10&vendedor=1,3
+#   GET /clientes-distintos?por=vendedor,departamento&desde=2015-03&hasta=2015-08
+#   GET /rentabilidad/clientes?anio=2015&formato=arrow
+
+PUERTO = 8502
+TRABAJADORES = os.cpu_count() or 4
+PRESUPUESTO_RESPUESTAS_MB = 64
+REFRESCO_S = 5  # cada cuánto se revisan particiones nuevas
+TIPO_JSON = "application/json"
+TIPO_ARROW = "application/vnd.apache.arrow.stream"
+
+# ruta -> (función, parámetros propios con su tipo)
+RUTAS = {
+    "/abc": (analitica.resumen_abc, {"dimension": str}),
+    "/top-clientes": (analitica.top_clientes, {"n": int}),
+    "/vendedor-mas-clientes": (analitica.vendedor_con_mas_clientes, {}),
+    "/clientes-distintos": (analitica.clientes_distintos, {"por": str, "desde": str, "hasta": str}),
+    "/mes-extremo": (analitica.mes_extremo, {"extremo": str}),
+    "/rentabilidad/trimestral": (cb.rentabilidad_trimestral, {}),
+    "/rentabilidad/peor-trimestre": (analitica.peor_trimestre, {}),
+    "/rentabilidad/clientes": (analitica.rentabilidad_clientes, {}),
+    "/rentabilidad/cliente-menos-rentable": (analitica.cliente_menos_rentable, {}),
+}
+
+
+def _nativo(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"No se puede serializar {type(valor).__name__}")
+
+
+def serializar(valor, formato="json"):
+    if isinstance(valor, pd.Series):
+        valor = valor.to_frame()
+    if isinstance(valor, pd.DataFrame) and not isinstance(valor.index, pd.RangeIndex):
+        valor = valor.reset_index()
+    if formato == "arrow":
+        if not isinstance(valor, pd.DataFrame):
+            raise ValueError("formato=arrow solo aplica a respuestas tabulares")
+        tabla = pa.Table.from_pandas(valor, preserve_index=False)
+        salida = pa.BufferOutputStream()
+        with pa.ipc.new_stream(salida, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+        return salida.getvalue().to_pybytes(), TIPO_ARROW
+    if isinstance(valor, pd.DataFrame):
+        # orient="split": nombres de columnas una vez y filas como listas
+        return valor.to_json(orient="split", index=False).encode(), TIPO_JSON
+    return json.dumps(valor, default=_nativo, separators=(",", ":")).encode(), TIPO_JSON
+
+
+def leer_parametros(consulta, propios):
+    anio = consulta.get("anio")
+    anio = int(anio) if anio else None
+    activos = {
+        nombre: [int(v) for v in consulta[nombre].split(",") if v]
+        for nombre in filtros.DIMENSIONES if consulta.get(nombre)
+    }
+    parametros = {nombre: tipo(consulta[nombre]) for nombre, tipo in propios.items() if nombre in consulta}
+    return anio, activos, parametros
+
+
+class Servicio:
+
+    def __init__(self, datos, trabajadores=TRABAJADORES):
+        self.datos = datos
+        self.pool = ThreadPoolExecutor(trabajadores, thread_name_prefix="consulta")
+        self.respuestas = CacheCompartido(PRESUPUESTO_RESPUESTAS_MB * 1024 * 1024)
+        self.atendidas = 0
+
+    def calcular(self, ruta, consulta):
+        funcion, propios = RUTAS[ruta]
+        anio, activos, parametros = leer_parametros(consulta, propios)
+        valor = self.datos.consultar(funcion, anio, filtros=activos, **parametros)
+        return serializar(valor, consulta.get("formato", "json"))
+
+    async def responder(self, metodo, destino):
+        try:
+            return await self.resolver(metodo, destino)
+        except (ValueError, KeyError) as error:
+            return "400 Bad Request", {"error": str(error)}
+        except Exception as error:
+            # Un fallo inesperado se responde como 500 y la conexión sigue atendiendo
+            return "500 Internal Server Error", {"error": f"{type(error).__name__}: {error}"}
+
+    async def resolver(self, metodo, destino):
+        if metodo != "GET":
+            return "405 Method Not Allowed", {"error": "Solo GET"}
+        partes = urlsplit(destino)
+        ruta = partes.path.rstrip("/") or "/"
+        consulta = dict(parse_qsl(partes.query))
+        if ruta == "/salud":
+            return "200 OK", serializar({"filas": self.datos.filas(), "version": self.datos.version()})
+        if ruta == "/estadisticas":
+            return "200 OK", serializar({
+                "atendidas": self.atendidas,
+                "consultas": self.datos.cache.estadisticas(),
+                "respuestas": self.respuestas.estadisticas(),
+            })
+        if ruta not in RUTAS:
+            return "404 Not Found", {"error": f"Ruta desconocida: {ruta}", "rutas": sorted(RUTAS)}
+
+        clave = (ruta, tuple(sorted(consulta.items())), self.datos.version())
+        respuesta = self.respuestas.buscar(clave)
+        if respuesta is None:
+            respuesta = await asyncio.get_running_loop().run_in_executor(self.pool, self.calcular, ruta, consulta)
+            self.respuestas.guardar(clave, respuesta)
+        return "200 OK", respuesta
+
+    async def atender(self, lector, escritor):
+        # HTTP/1.1 mínimo con keep-alive; el cuerpo de la petición se ignora
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                encabezados = {}
+                while True:
+                    encabezado = await lector.readline()
+                    if encabezado in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = encabezado.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+                partes = linea.decode("latin-1").split()
+                if len(partes) != 3:
+                    estado, respuesta, mantener = "400 Bad Request", {"error": "Petición inválida"}, False
+                else:
+                    metodo, destino, version = partes
+                    estado, respuesta = await self.responder(metodo, destino)
+                    mantener = version == "HTTP/1.1" and encabezados.get("connection", "").lower() != "close"
+                await self.escribir(escritor, estado, respuesta, mantener)
+                self.atendidas += 1
+                if not mantener:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as error:
+            # Lo que falle fuera de responder() también le llega al cliente como 500
+            try:
+                await self.escribir(escritor, "500 Internal Server Error", {"error": f"{type(error).__name__}: {error}"}, False)
+            except ConnectionError:
+                pass
+        finally:
+            escritor.close()
+
+    async def escribir(self, escritor, estado, respuesta, mantener):
+        cuerpo, tipo = respuesta if isinstance(respuesta, tuple) else serializar(respuesta)
+        escritor.write(
+            f"HTTP/1.1 {estado}\r\nContent-Type: {tipo}\r\nContent-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode() + cuerpo
+        )
+        await escritor.drain()
+
+    async def refrescar(self):
+        # Las particiones nuevas se suman fuera del bucle para no frenar las respuestas
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(REFRESCO_S)
+            await loop.run_in_executor(self.pool, self.datos.actualizar)
+
+
+async def servir(datos, host="127.0.0.1", puerto=PUERTO, trabajadores=TRABAJADORES):
+    servicio = Servicio(datos, trabajadores)
+    servidor = await asyncio.start_server(servicio.atender, host, puerto)
+    refresco = asyncio.create_task(servicio.refrescar())
+    print(f"Servicio de métricas en http://{host}:{puerto} ({trabajadores} trabajadores)", flush=True)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        refresco.cancel()
+        servicio.pool.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP con las métricas del dashboard")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--trabajadores", type=int, default=TRABAJADORES)
+    parser.add_argument("--almacen", default=almacen.RUTA_ALMACEN, help="Archivo .arrow con los datos")
+    args = parser.parse_args()
+
+    base = almacen.cargar(cb.COLUMNAS_ORIGEN, ruta_csv="", ruta_almacen=args.almacen)
+    datos = ingesta.CuboIncremental(cb.construir_cubo(base))
+    del base
+    try:
+        asyncio.run(servir(datos, args.host, args.puerto, args.trabajadores))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del dashboard se importan por nombre, como en la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cubo as cb  # noqa: E402
+import generador  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def transacciones():
+    # Datos sintéticos pequeños: dos años, decenas de clientes y familias
+    return generador.generar(0.2, semilla=1)
+
+
+@pytest.fixture(scope="session")
+def cubo(transacciones):
+    return cb.construir_cubo(transacciones[cb.COLUMNAS_ORIGEN])
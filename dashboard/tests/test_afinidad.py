@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+import afinidad
+
+CLIENTE, FAMILIA, VENTAS = afinidad.CLIENTE, afinidad.FAMILIA, "Ventas Netas (USD)"
+
+
+def _coseno(matriz):
+    # Coseno denso entre filas de un DataFrame
+    valores = matriz.to_numpy(dtype=float)
+    normas = np.linalg.norm(valores, axis=1, keepdims=True)
+    unitarios = np.divide(valores, normas, out=np.zeros_like(valores), where=normas > 0)
+    return pd.DataFrame(unitarios @ unitarios.T, index=matriz.index, columns=matriz.index)
+
+
+def test_similares_igual_que_coseno_denso(transacciones, cubo, monkeypatch):
+    # Bloques chicos para que la búsqueda de parecidos cruce varios
+    monkeypatch.setattr(afinidad, "BLOQUE_CLIENTES", 7)
+    analisis = afinidad.Afinidad(cubo)
+    ventas = transacciones.pivot_table(index=CLIENTE, columns=FAMILIA, values=VENTAS, aggfunc="sum", fill_value=0)
+    coseno = _coseno(ventas.clip(lower=0))
+
+    cliente = analisis.clientes[0]
+    similares = analisis.similares(cliente, k=5)
+    esperado = coseno[cliente].drop(cliente)
+    esperado = esperado[esperado > 0].sort_values(ascending=False, kind="stable").head(5)
+    assert np.allclose(similares["Similitud"], esperado.to_numpy())
+    assert np.allclose(coseno.loc[similares["Cliente"], cliente], similares["Similitud"])
+
+    # Contra varias semillas: la similitud es la de la semilla más parecida
+    semillas = analisis.clientes[:3]
+    parecidos = analisis.parecidos_a(semillas, k=5)
+    maxima = coseno[semillas].max(axis=1).drop(semillas)
+    assert np.allclose(parecidos["Similitud"], maxima.sort_values(ascending=False, kind="stable").head(5).to_numpy())
+    for fila in parecidos.itertuples(index=False):
+        assert np.isclose(coseno.loc[fila.Cliente, fila[2]], fila.Similitud)
+
+    # La versión para la caché compartida da lo mismo que la matriz completa
+    pd.testing.assert_frame_equal(
+        afinidad.parecidos_clase_a(cubo), analisis.parecidos_a(afinidad.clientes_clase_a(cubo))
+    )
+
+
+def test_coocurrencia_y_similitud_de_familias(transacciones, cubo):
+    # Sin poda: todas las familias afines quedan en la matriz
+    analisis = afinidad.Afinidad(cubo, k_familias=cubo[FAMILIA].nunique())
+    presencia = (transacciones.groupby([CLIENTE, FAMILIA]).size().unstack(fill_value=0) > 0).astype(int)
+    comunes = presencia.T @ presencia
+    familia = analisis.familias[0]
+
+    afines = analisis.familias_afines(familia, k=len(analisis.familias))
+    esperado = comunes[familia].drop(familia)
+    esperado = esperado[esperado > 0]
+    assert sorted(afines["Familia"]) == sorted(esperado.index)
+    propios = esperado.loc[afines["Familia"]]
+    assert (afines["Clientes en común"].to_numpy() == propios.to_numpy()).all()
+    coseno = propios / np.sqrt(comunes.loc[familia, familia] * np.diag(comunes.loc[propios.index, propios.index]))
+    assert np.allclose(afines["Similitud"], coseno.to_numpy())
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+import analitica
+import distintos
+
+VENDEDOR, CLIENTE, DEPARTAMENTO = distintos.VENDEDOR, distintos.CLIENTE, "Departamento - Clave"
+
+
+def test_bitmaps_igual_que_nunique(transacciones, cubo):
+    conteo = distintos.ConteoDistinto(cubo, (VENDEDOR, DEPARTAMENTO))
+    esperado = transacciones.groupby(VENDEDOR)[CLIENTE].nunique()
+    pd.testing.assert_series_equal(conteo.contar([VENDEDOR]), esperado, check_dtype=False, check_names=False)
+
+    anio = transacciones[transacciones["Año"] == 2016]
+    esperado = anio.groupby([DEPARTAMENTO, "Mes"])[CLIENTE].nunique()
+    obtenido = conteo.contar([DEPARTAMENTO, "Mes"], anio=2016)
+    pd.testing.assert_series_equal(obtenido, esperado, check_dtype=False, check_names=False, check_index_type=False)
+
+    vendedores = transacciones[VENDEDOR].drop_duplicates().to_numpy()[:2]
+    tramo = transacciones[
+        (transacciones["Fecha"] >= "2015-03-01") & (transacciones["Fecha"] < "2015-09-01")
+        & transacciones[VENDEDOR].isin(vendedores)
+    ]
+    total = conteo.contar(desde="2015-03", hasta="2015-08", miembros={VENDEDOR: vendedores})
+    assert total == tramo[CLIENTE].nunique()
+
+
+def test_vendedor_con_mas_clientes(transacciones, cubo):
+    esperado = transacciones[transacciones["Año"] == 2015].groupby(VENDEDOR)[CLIENTE].nunique()
+    vendedor, clientes = analitica.vendedor_con_mas_clientes(cubo, 2015)
+    assert clientes == esperado.max()
+    assert vendedor in esperado[esperado == esperado.max()].index
+    # El conteo de todos los años (el de la caché) da lo mismo filtrando el año al contar
+    assert analitica.mas_clientes(distintos.conteo_clientes(cubo), 2015) == (vendedor, clientes)
+
+
+def test_popcount_por_tabla():
+    palabras = np.random.default_rng(0).integers(0, 2**63, size=(5, 7), dtype=np.uint64) | np.uint64(1 << 63)
+    esperado = [[bin(int(p)).count("1") for p in fila] for fila in palabras]
+    assert distintos._popcount_tabla(palabras).tolist() == esperado
+
+
+def test_hll_dentro_del_error(transacciones, cubo):
+    conteo = distintos.ConteoDistinto(cubo, modo="hll")
+    esperado = transacciones.groupby(VENDEDOR)[CLIENTE].nunique().to_numpy()
+    obtenido = conteo.contar([VENDEDOR]).to_numpy()
+    assert np.all(np.abs(obtenido - esperado) <= np.maximum(0.1 * esperado, 2))
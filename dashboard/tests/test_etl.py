@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import almacen
+import etl
+import generador
+
+
+def _lote(transacciones, familias, inicio, filas):
+    # Filas del generador con `familias` nombres de familia distintos
+    lote = transacciones.iloc[inicio:inicio + filas].copy()
+    lote["Familia"] = [f"Familia {i % familias}" for i in range(filas)]
+    return lote[etl.COLUMNAS_SALIDA]
+
+
+def test_lote_posterior_con_mas_de_127_categorias(transacciones, tmp_path):
+    ruta = str(tmp_path / "ventas.arrow")
+    lotes = [_lote(transacciones, 10, 0, 300), _lote(transacciones, 300, 300, 600)]
+    escritor = etl.EscritorArrow(ruta)
+    for lote in lotes:
+        escritor.escribir(lote.copy())
+    escritor.cerrar()
+
+    with pa.memory_map(ruta) as fuente:
+        leido = pa.ipc.open_file(fuente).read_all().to_pandas()
+    esperado = almacen.preparar_columnas(pd.concat(lotes, ignore_index=True))
+    assert len(leido) == len(esperado)
+    assert leido["Familia"].astype(str).tolist() == esperado["Familia"].astype(str).tolist()
+    assert np.allclose(leido["Ventas Netas (USD)"], esperado["Ventas Netas (USD)"])
+
+
+def test_generador_escribe_lo_mismo_por_lotes(tmp_path):
+    ruta = str(tmp_path / "sintetico.arrow")
+    # Lotes de 100 filas: las primeras traen pocas familias y las siguientes pasan de 127
+    generador.escribir(ruta, escala=0.2, semilla=3, tamano_lote=100)
+    leido = almacen.cargar(ruta_csv="", ruta_almacen=ruta)
+    parametros = generador.parametros_escala(0.2)
+    filas = parametros.pop("filas")
+    lotes = generador.Generador(semilla=3, **parametros).lotes(filas, 100)
+    esperado = almacen.preparar_columnas(pd.concat(lotes, ignore_index=True))
+    assert len(leido) == len(esperado)
+    assert np.isclose(leido["Ventas Netas (USD)"].sum(), esperado["Ventas Netas (USD)"].sum())
+    for columna in almacen.COLUMNAS_CATEGORICAS:
+        assert leido[columna].astype(str).tolist() == esperado[columna].astype(str).tolist()
+
+
+def test_llave_vacia_se_descarta_y_se_cuenta(transacciones, tmp_path):
+    # Como llega de limpiar_lote: textos sin categorizar y llaves en float con huecos
+    lote = transacciones.iloc[:50][etl.COLUMNAS_SALIDA].copy()
+    lote = lote.astype({columna: str for columna in almacen.COLUMNAS_CATEGORICAS if columna in lote})
+    lote["Número de cliente"] = lote["Número de cliente"].astype("float64")
+    lote.iloc[[3, 10], lote.columns.get_loc("Número de cliente")] = np.nan
+    lote.iloc[20, lote.columns.get_loc("Número de Vendedor")] = np.nan
+
+    conteo = {}
+    preparado = almacen.preparar_columnas(lote.copy(), conteo)
+    assert conteo["descartadas"] == 3
+    assert len(preparado) == 47
+    assert preparado["Número de cliente"].dtype == "int32"
+
+    escritor = etl.EscritorArrow(str(tmp_path / "ventas.arrow"))
+    escritor.escribir(lote.copy())
+    escritor.cerrar()
+    assert escritor.conteo["descartadas"] == 3
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+import filtros
+
+
+def _con_pandas(df, anio=None, mes=None, trimestre=None, **dimensiones):
+    mascara = pd.Series(True, index=df.index)
+    if anio is not None:
+        mascara &= df["Año"].isin(anio)
+    if mes is not None:
+        mascara &= df["Mes"].isin(mes)
+    if trimestre is not None:
+        mascara &= ((df["Mes"] - 1) // 3 + 1).isin(trimestre)
+    for nombre, valores in dimensiones.items():
+        mascara &= df[filtros.DIMENSIONES[nombre]].isin(valores)
+    return df[mascara]
+
+
+def _ordenar(df):
+    return df.sort_values(list(df.columns), ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def miembros(cubo):
+    return {nombre: cubo[columna].drop_duplicates().sort_values().to_numpy() for nombre, columna in filtros.DIMENSIONES.items()}
+
+
+CASOS = [
+    {},
+    {"anio": [2016]},
+    {"anio": [2015], "mes": [2, 3, 11]},
+    {"trimestre": [1, 4]},
+    {"vendedor": slice(0, 2)},
+    {"anio": [2016], "cliente": slice(0, 5), "familia": slice(0, 10)},
+    {"trimestre": [2], "departamento": slice(1, 3), "vendedor": slice(0, 3)},
+]
+
+
+@pytest.mark.parametrize("caso", CASOS)
+def test_seleccion_igual_que_mascaras(cubo, miembros, caso):
+    caso = {nombre: miembros[nombre][valor] if isinstance(valor, slice) else valor for nombre, valor in caso.items()}
+    indice = filtros.IndiceFiltros(cubo)
+    obtenido = indice.seleccionar(**caso)
+    esperado = _con_pandas(cubo, **caso)
+    assert len(obtenido) == len(esperado)
+    pd.testing.assert_frame_equal(_ordenar(obtenido), _ordenar(esperado))
+
+
+def test_miembro_inexistente_y_filtro_desconocido(cubo):
+    indice = filtros.IndiceFiltros(cubo)
+    assert len(indice.seleccionar(cliente=[-1])) == 0
+    assert list(indice.miembros("vendedor")) == sorted(cubo["Número de Vendedor"].unique())
+    with pytest.raises(ValueError):
+        indice.filas(region=[1])
+
+
+def test_normalizar_es_estable():
+    assert filtros.normalizar({"vendedor": [3, 1], "cliente": [], "anio": "Sin agrupar"}) == (("vendedor", (1, 3)),)
+    assert filtros.normalizar({"familia": 5, "vendedor": [1]}) == filtros.normalizar({"vendedor": (1,), "familia": [5]})
@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+import cache
+import graficas
+
+
+def test_peso_en_cache_es_el_de_la_figura():
+    tabla = pd.DataFrame({"x": np.arange(5_000), "y": np.random.default_rng(0).random(5_000)})
+    grafica = graficas.Grafica(px.line(tabla, x="x", y="y"))
+    datos = grafica.figura.data[0]
+    # Al menos los arreglos de la traza, y más que el JSON enviado
+    assert grafica.nbytes >= np.asarray(datos.x).nbytes + np.asarray(datos.y).nbytes
+    assert grafica.nbytes > grafica.bytes
+    assert cache.tamano_bytes(grafica) == grafica.nbytes
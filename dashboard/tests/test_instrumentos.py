@@ -0,0 +1,36 @@
+import threading
+import tracemalloc
+
+import instrumentos
+
+MB = 1024 * 1024
+
+
+def test_mediciones_encimadas_no_se_borran_el_pico():
+    registros = []
+    primera_asigno = threading.Event()
+    segunda_entro = threading.Event()
+
+    def primera():
+        with instrumentos.medir("primera", registros, memoria=True):
+            bloque = bytearray(20 * MB)
+            del bloque
+            primera_asigno.set()
+            # Si la segunda pudiera reiniciar el pico aquí, este se perdería
+            segunda_entro.wait(0.5)
+
+    def segunda():
+        primera_asigno.wait()
+        with instrumentos.medir("segunda", registros, memoria=True):
+            segunda_entro.set()
+
+    hilos = [threading.Thread(target=primera), threading.Thread(target=segunda)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    picos = {registro["seccion"]: registro["pico_kb"] for registro in registros}
+    assert picos["primera"] >= 20 * 1024
+    assert picos["segunda"] < 20 * 1024
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,112 @@
+import ast
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import almacen
+import analitica
+import cubo as cb
+import ingesta
+import motores
+import servicio
+import tiempo
+
+CASOS = [
+    (cb.ventas_por, {"dimension": "Número de cliente"}),
+    (cb.ventas_mensuales, {}),
+    (cb.rentabilidad_trimestral, {}),
+    (analitica.resumen_abc, {"dimension": "familia"}),
+    (analitica.mes_extremo, {"extremo": "min"}),
+    (analitica.clientes_distintos, {"por": "vendedor,mes"}),
+]
+
+
+def _igual(a, b):
+    if isinstance(a, pd.DataFrame):
+        pd.testing.assert_frame_equal(
+            a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False, check_categorical=False
+        )
+    elif isinstance(a, pd.Series):
+        pd.testing.assert_series_equal(a, b, check_dtype=False, check_index_type=False)
+    else:
+        assert a[0] == b[0] and np.isclose(a[1], b[1])
+
+
+@pytest.mark.parametrize("nombre", ["sqlite", "duckdb"])
+def test_paneles_en_sql_igual_que_pandas(transacciones, cubo, tmp_path, nombre):
+    if nombre == "duckdb":
+        pytest.importorskip("duckdb")
+    origen = str(tmp_path / "ventas.arrow")
+    almacen.escribir_almacen(transacciones, origen)
+    clase = motores.MotorSQLite if nombre == "sqlite" else motores.MotorDuckDB
+    sql = motores.CuboSQL(clase(str(tmp_path / f"BD.{nombre}"), origen=origen), directorio=str(tmp_path))
+    base = ingesta.CuboIncremental(cubo, directorio=str(tmp_path))
+
+    filtros = {"vendedor": [1, 2], "familia": list(base.indice.miembros("familia")[:5])}
+    for anio in [None, 2016]:
+        for filtro in [None, filtros]:
+            for funcion, parametros in CASOS:
+                _igual(base.consultar(funcion, anio, filtro, **parametros), sql.consultar(funcion, anio, filtro, **parametros))
+    for dimensiones in [(), ("Cliente",)]:
+        a = base.consultar(tiempo.indice_mensual, 2016, filtros, dimensiones=dimensiones)
+        b = sql.consultar(tiempo.indice_mensual, 2016, filtros, dimensiones=dimensiones)
+        dimension = dimensiones[0] if dimensiones else None
+        _igual(a.comparar("2016-01", "2016-06-30", dimension), b.comparar("2016-01", "2016-06-30", dimension))
+
+    assert list(sql.indice.miembros("cliente")) == list(base.indice.miembros("cliente"))
+    assert sql.indice.miembros("cliente") is sql.indice.miembros("cliente")
+    # Una sola conexión de lectura por hilo entre consultas
+    assert sql.motor.lectura() is sql.motor.lectura()
+    sql.motor.cerrar_lecturas()
+
+
+def _funciones_consultadas(ruta):
+    # Funciones `modulo.funcion` que el archivo pasa como primer argumento a consultar()
+    arbol = ast.parse(open(ruta, encoding="utf-8").read())
+    alias = {
+        nombre.asname or nombre.name: nombre.name
+        for nodo in ast.walk(arbol) if isinstance(nodo, ast.Import) for nombre in nodo.names
+    }
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.Call) and getattr(nodo.func, "id", getattr(nodo.func, "attr", None)) == "consultar":
+            funcion = nodo.args[0]
+            assert isinstance(funcion, ast.Attribute), f"línea {nodo.lineno}: consultar() sin modulo.funcion"
+            modulo = importlib.import_module(alias[funcion.value.id])
+            yield nodo.lineno, getattr(modulo, funcion.attr)
+
+
+def test_cada_consulta_del_dashboard_tiene_columnas():
+    # Una función sin entrada recibiría el cubo completo desde SQL
+    ruta = os.path.join(os.path.dirname(motores.__file__), "dashboard.py")
+    faltan = [(linea, f.__name__) for linea, f in _funciones_consultadas(ruta) if f not in motores.COLUMNAS_CONSULTA]
+    faltan += [(ruta, f.__name__) for ruta, (f, _) in servicio.RUTAS.items() if f not in motores.COLUMNAS_CONSULTA]
+    assert not faltan
+
+
+def _consulta_fija(valor, modulo):
+    def total(cubo, anio=None):
+        return valor
+    total.__module__ = modulo
+    return total
+
+
+def test_consultas_homonimas_no_comparten_clave(cubo, tmp_path):
+    # Mismo __name__ y __qualname__ en módulos distintos
+    base = ingesta.CuboIncremental(cubo, directorio=str(tmp_path))
+    assert base.consultar(_consulta_fija(1, "ventas")) == 1
+    assert base.consultar(_consulta_fija(2, "costos")) == 2
+
+
+def test_lotes_origen_cuenta_filas_sin_llave(transacciones, tmp_path):
+    ruta = str(tmp_path / "ventas.csv")
+    filas = transacciones[cb.COLUMNAS_ORIGEN].head(500).copy()
+    filas.loc[filas.index[:7], "Número de cliente"] = np.nan
+    filas.to_csv(ruta, index=False)
+
+    conteo = {}
+    leidas = sum(len(lote) for lote in motores.lotes_origen(ruta, tamano_lote=100, conteo=conteo))
+    assert conteo["descartadas"] == 7
+    assert leidas == 500 - 7
@@ -0,0 +1,17 @@
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+import cubo as cb
+import paralelo
+
+
+@pytest.mark.parametrize("ejecutor,inicio", [("hilos", paralelo.INICIO), ("procesos", "fork"), ("procesos", paralelo.INICIO)])
+def test_cubo_en_paralelo_igual_y_sin_columnas_retenidas(transacciones, cubo, monkeypatch, ejecutor, inicio):
+    if inicio not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{inicio} no disponible")
+    monkeypatch.setattr(paralelo, "FILAS_MINIMAS", 0)
+    obtenido = paralelo.construir_cubo(transacciones[cb.COLUMNAS_ORIGEN], 2, ejecutor, inicio)
+    pd.testing.assert_frame_equal(obtenido, cubo, check_exact=True)
+    assert paralelo._COLUMNAS is None
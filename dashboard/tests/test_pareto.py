@@ -0,0 +1,14 @@
+import numpy as np
+
+import pareto
+
+
+def test_pareto_por_anios_igual_que_un_pareto_por_anio(transacciones):
+    tabla = pareto.pareto_por_anios(transacciones, "cliente")
+    for anio, propia in tabla.groupby("Año", sort=True):
+        esperado = pareto.pareto_dimension(transacciones[transacciones["Año"] == anio], "cliente")
+        assert propia["Número de cliente"].tolist() == esperado["Número de cliente"].tolist()
+        assert np.allclose(propia["Ventas"], esperado["Ventas"])
+        assert np.allclose(propia["Porcentaje Acumulado"], esperado["Porcentaje Acumulado"])
+        assert propia["Clasificación"].astype(str).tolist() == esperado["Clasificación"].tolist()
+    assert np.isclose(tabla.groupby("Año")["Porcentaje Acumulado"].max(), 1).all()
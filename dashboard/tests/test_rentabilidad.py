@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import rentabilidad
+
+VENTAS, COSTO, CLIENTE = rentabilidad.VENTAS, rentabilidad.COSTO, rentabilidad.CLIENTE
+
+
+def _por_cliente(transacciones, anio):
+    filas = transacciones[transacciones["Año"] == anio]
+    clientes = filas.groupby(CLIENTE)[[VENTAS, COSTO]].sum()
+    clientes = clientes[clientes[COSTO] > 0]
+    return filas, (clientes[VENTAS] - clientes[COSTO]) / clientes[COSTO] * 100
+
+
+@pytest.mark.parametrize("anio", [2015, 2016])
+def test_cuartil_1_igual_que_regla_menor_o_igual_q1(transacciones, cubo, anio):
+    analisis = rentabilidad.Rentabilidad(cubo)
+    filas, margen = _por_cliente(transacciones, anio)
+    q1 = margen.quantile(0.25)
+    esperados = set(margen[margen <= q1].index)
+
+    tabla = analisis.rentabilidad_clientes(anio)
+    assert set(tabla[tabla["Cuartil"] == 1].index.get_level_values(0)) == esperados
+    assert np.allclose(tabla["Rentabilidad"].droplevel(1).sort_index(), margen.sort_index())
+
+    # Ventas mensuales del cuartil 1 y del peor cliente, como en la gráfica del dashboard
+    peor, _, _ = analisis.peor_cliente(anio)
+    comparativo = analisis.comparativo(peor, anio, cuartil=1)
+    grupo = filas[filas[CLIENTE].isin(esperados)]
+    mensual = grupo.groupby("Mes")[VENTAS].sum()
+    propio = grupo[grupo[CLIENTE] == peor].groupby("Mes")[VENTAS].sum().reindex(mensual.index, fill_value=0)
+    assert comparativo["Mes"].tolist() == mensual.index.tolist()
+    assert np.allclose(comparativo[VENTAS], mensual)
+    assert np.allclose(comparativo[VENTAS + "_cliente"], propio)
+
+
+def test_serie_cliente_csr(transacciones, cubo):
+    analisis = rentabilidad.Rentabilidad(cubo)
+    cliente = transacciones[CLIENTE].iloc[0]
+    propias = transacciones[transacciones[CLIENTE] == cliente]
+    esperado = propias.groupby(["Año", "Mes"])[VENTAS].sum()
+    meses = pd.MultiIndex.from_frame(analisis.meses[["Año", "Mes"]])
+    assert np.allclose(analisis.serie_cliente(cliente), esperado.reindex(meses, fill_value=0))
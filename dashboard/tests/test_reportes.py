@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import cubo as cb
+import reportes
+
+
+def _generar(cubo, directorio, **opciones):
+    return reportes.generar(cubo, 2016, str(directorio), trabajadores=1, progreso=lambda texto: None, **opciones)
+
+
+def _ventas_en_pagina(directorio, cliente):
+    with open(reportes.ruta_reporte(os.path.join(directorio, "2016"), "clientes", cliente), encoding="utf-8") as archivo:
+        return archivo.read()
+
+
+def test_reanuda_sin_rehacer(cubo, tmp_path):
+    primera = _generar(cubo, tmp_path)
+    datos = cb.filtrar_anio(cubo, 2016)
+    total = sum(primera["generados"].values())
+    assert total == datos["Número de Vendedor"].nunique() + datos["Número de cliente"].nunique()
+    segunda = _generar(cubo, tmp_path)
+    assert sum(segunda["generados"].values()) == 0
+    assert segunda["omitidos"] == total
+
+
+def test_cambio_de_datos_interrumpido_no_deja_paginas_viejas(cubo, tmp_path, monkeypatch):
+    _generar(cubo, tmp_path)
+    duplicado = cubo.assign(**{cb.VENTAS: cubo[cb.VENTAS] * 2})
+
+    class Interrumpido:
+        def __init__(self, *args, **kwargs):
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(reportes, "ProcessPoolExecutor", Interrumpido)
+    with pytest.raises(KeyboardInterrupt):
+        _generar(duplicado, tmp_path)
+    monkeypatch.undo()
+
+    resultado = _generar(duplicado, tmp_path)
+    datos = cb.filtrar_anio(duplicado, 2016)
+    esperados = datos["Número de Vendedor"].nunique() + datos["Número de cliente"].nunique()
+    assert sum(resultado["generados"].values()) == esperados
+    assert resultado["omitidos"] == 0
+    cliente = datos["Número de cliente"].iloc[0]
+    ventas = datos.loc[datos["Número de cliente"] == cliente, cb.VENTAS].sum()
+    assert f"${ventas:,.2f}" in _ventas_en_pagina(tmp_path, cliente)
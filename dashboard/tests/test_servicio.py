@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import numpy as np
+
+import almacen
+import ingesta
+import motores
+import servicio
+
+
+def _servicio(cubo, tmp_path):
+    return servicio.Servicio(ingesta.CuboIncremental(cubo.copy(), directorio=str(tmp_path)), trabajadores=2)
+
+
+def _pedir(servicio_, destino, metodo="GET"):
+    estado, respuesta = asyncio.run(servicio_.responder(metodo, destino))
+    cuerpo, _ = respuesta if isinstance(respuesta, tuple) else servicio.serializar(respuesta)
+    return estado, json.loads(cuerpo)
+
+
+def test_top_clientes_igual_que_pandas(transacciones, cubo, tmp_path):
+    estado, cuerpo = _pedir(_servicio(cubo, tmp_path), "/top-clientes?n=3&anio=2016&vendedor=1,2")
+    assert estado == "200 OK"
+
+    filas = transacciones[(transacciones["Año"] == 2016) & transacciones["Número de Vendedor"].isin([1, 2])]
+    ventas = filas.groupby("Número de cliente")["Ventas Netas (USD)"].sum().sort_values(ascending=False)
+    assert [fila[0] for fila in cuerpo["data"]] == ventas.index[:3].tolist()
+    assert np.allclose([fila[1] for fila in cuerpo["data"]], ventas.values[:3])
+
+
+def test_codigos_de_estado(cubo, tmp_path):
+    servicio_ = _servicio(cubo, tmp_path)
+    assert _pedir(servicio_, "/salud")[0] == "200 OK"
+    assert _pedir(servicio_, "/abc", metodo="POST")[0] == "405 Method Not Allowed"
+    assert _pedir(servicio_, "/no-existe")[0] == "404 Not Found"
+    assert _pedir(servicio_, "/top-clientes?anio=dos")[0] == "400 Bad Request"
+    assert _pedir(servicio_, "/mes-extremo?extremo=foo")[0] == "400 Bad Request"
+    assert _pedir(servicio_, "/mes-extremo?extremo=min")[0] == "200 OK"
+
+
+def test_salud_con_cubo_y_con_sql(transacciones, cubo, tmp_path):
+    estado, cuerpo = _pedir(_servicio(cubo, tmp_path), "/salud")
+    assert estado == "200 OK" and cuerpo["filas"] == len(cubo)
+
+    origen = str(tmp_path / "ventas.arrow")
+    almacen.escribir_almacen(transacciones, origen)
+    sql = motores.CuboSQL(motores.MotorSQLite(str(tmp_path / "BD.sqlite"), origen=origen), directorio=str(tmp_path))
+    estado, cuerpo = _pedir(servicio.Servicio(sql, trabajadores=1), "/salud")
+    assert estado == "200 OK" and cuerpo["filas"] == len(transacciones)
+    sql.motor.cerrar_lecturas()
+
+
+def test_error_inesperado_responde_500(cubo, tmp_path):
+    servicio_ = _servicio(cubo, tmp_path)
+
+    def fallar(ruta, consulta):
+        raise RuntimeError("cubo corrupto")
+
+    servicio_.calcular = fallar
+    estado, cuerpo = _pedir(servicio_, "/top-clientes")
+    assert estado == "500 Internal Server Error"
+    assert "cubo corrupto" in cuerpo["error"]
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+import tiempo
+
+
+def test_indice_diario_solo_miembros_pedidos(transacciones):
+    clientes = transacciones["Número de cliente"].drop_duplicates().to_numpy()[:3]
+    indice = tiempo.indice_diario(transacciones, {"Cliente": clientes})
+    assert sorted(indice.miembros["Cliente"]) == sorted(clientes)
+    assert indice.acumulados["Cliente"].shape == (3, indice.n + 1)
+
+    desde, hasta = "2016-02-10", "2016-05-20"
+    dentro = transacciones[(transacciones["Fecha"] >= desde) & (transacciones["Fecha"] <= hasta)]
+    esperado = dentro.groupby("Número de cliente")[tiempo.VENTAS].sum().reindex(indice.miembros["Cliente"], fill_value=0)
+    assert np.allclose(indice.rango(desde, hasta, "Cliente").to_numpy(), esperado.to_numpy())
+    assert np.isclose(indice.rango(desde, hasta).iloc[0], dentro[tiempo.VENTAS].sum())
+
+
+def _mensual(cubo, columnas=()):
+    # Ventas por mes (y por miembro) con groupby, sobre el eje completo de meses
+    meses = pd.period_range("2015-01", "2016-12", freq="M")
+    fecha = pd.PeriodIndex.from_fields(year=cubo["Año"], month=cubo["Mes"], freq="M")
+    return cubo.groupby([fecha, *[cubo[c] for c in columnas]])[tiempo.VENTAS].sum(), meses
+
+
+def _sin_julio(cubo):
+    # Un mes sin ventas en medio del eje
+    return cubo[~((cubo["Año"] == 2015) & (cubo["Mes"] == 7))]
+
+
+def test_comparar_mensual_contra_groupby(cubo):
+    cubo = _sin_julio(cubo)
+    indice = tiempo.indice_mensual(cubo)
+    columna = tiempo.DIMENSIONES["Cliente"]
+    ventas, meses = _mensual(cubo, [columna])
+    por_mes = ventas.unstack(0).reindex(columns=meses, fill_value=0).fillna(0)
+    por_mes = por_mes.reindex(indice.miembros["Cliente"], fill_value=0)
+
+    casos = [
+        # Tramo con el mes vacío contra los cuatro meses de antes
+        ("2015-06-01", "2015-09-30", "periodo", "2015-02", "2015-05"),
+        # Año contra año: el anterior incluye el mes vacío
+        ("2016-01-01", "2016-08-31", "anio", "2015-01", "2015-08"),
+        # Primer mes del eje: el año anterior cae fuera y suma cero
+        ("2015-01-01", "2015-01-31", "anio", None, None),
+    ]
+    for desde, hasta, referencia, previo_desde, previo_hasta in casos:
+        tabla = indice.comparar(desde, hasta, "Cliente", referencia)
+        actual = por_mes.loc[:, pd.Period(desde, "M"):pd.Period(hasta, "M")].sum(axis=1)
+        if previo_desde is None:
+            previo = actual * 0
+        else:
+            previo = por_mes.loc[:, pd.Period(previo_desde, "M"):pd.Period(previo_hasta, "M")].sum(axis=1)
+        assert np.allclose(tabla["Actual"].to_numpy(), actual.to_numpy())
+        assert np.allclose(tabla["Anterior"].to_numpy(), previo.to_numpy())
+        esperado = np.where(previo != 0, (actual - previo) / previo.where(previo != 0) * 100, np.nan)
+        assert np.allclose(tabla["Variación (%)"].to_numpy(), esperado, equal_nan=True)
+
+    total = indice.comparar("2015-06-01", "2015-09-30", referencia="periodo")
+    assert np.isclose(total["Actual"].iloc[0], por_mes.loc[:, "2015-06":"2015-09"].to_numpy().sum())
+
+
+def test_anterior_mensual():
+    indice = tiempo.IndiceTiempo([2015 * 12], {}, [1.0])
+    assert indice.anterior("2015-06-01", "2015-09-30", "periodo") == (pd.Timestamp("2015-02-01"), pd.Timestamp("2015-05-31"))
+    assert indice.anterior("2016-03-01", "2016-03-31", "periodo") == (pd.Timestamp("2016-02-01"), pd.Timestamp("2016-02-29"))
+    assert indice.anterior("2016-01-01", "2016-02-29", "anio") == (pd.Timestamp("2015-01-01"), pd.Timestamp("2015-02-28"))
+
+
+def test_moviles_mensuales_contra_rolling(cubo):
+    cubo = _sin_julio(cubo)
+    indice = tiempo.indice_mensual(cubo)
+    ventas, meses = _mensual(cubo)
+    serie = ventas.reindex(meses, fill_value=0)
+    moviles = indice.moviles()
+    assert list(moviles.index) == list(meses.to_timestamp())
+    for ventana in tiempo.VENTANAS:
+        # El primer mes solo tiene su propia venta; julio aporta cero
+        esperado = serie.rolling(ventana, min_periods=1).sum()
+        assert np.allclose(moviles[f"Móvil {ventana}"].to_numpy(), esperado.to_numpy())
+
+    columna = tiempo.DIMENSIONES["Familia"]
+    familia = cubo[columna].iloc[0]
+    del_miembro = _mensual(cubo[cubo[columna] == familia])[0].reindex(meses, fill_value=0)
+    esperado = del_miembro.rolling(3, min_periods=1).sum()
+    assert np.allclose(indice.movil(3, "Familia", familia).to_numpy(), esperado.to_numpy())
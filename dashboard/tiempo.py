@@ -0,0 +1,197 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# ============================
+# Índice de tiempo por sumas acumuladas
+# ============================
+# Para cada miembro de cada dimensión se guarda la suma acumulada de ventas a lo
+# largo del eje de tiempo (por mes o por día), con un cero al inicio. El total de
+# cualquier rango es A[fin] - A[inicio]: dos lecturas por miembro, sin volver a
+# recorrer el cubo ni las transacciones. Las ventanas móviles y las comparaciones
+# contra el año o el periodo anterior son restas de esas mismas columnas, para
+# todos los miembros a la vez.
+#
+# La matriz es densa (miembros × periodos). Por mes son pocas columnas; por día
+# crece con miembros × días, así que el índice diario solo guarda los miembros
+# que se le piden y el total.
+
+VENTAS = "Ventas Netas (USD)"
+DIMENSIONES = {
+    "Departamento": "Departamento - Clave",
+    "Familia": "Familia - Clave",
+    "Cliente": "Número de cliente",
+    "Vendedor": "Número de Vendedor",
+}
+VENTANAS = [3, 6, 12]
+REFERENCIAS = ["anio", "periodo"]  # mismo rango del año anterior o el rango inmediato anterior
+
+
+def _matriz_acumulada(fila, columna, valores, miembros, n):
+    # Suma por (miembro, periodo) y acumulado a lo largo del tiempo, con A[:, 0] = 0
+    suma = np.bincount(fila * n + columna, weights=valores, minlength=miembros * n).reshape(miembros, n)
+    acumulado = np.zeros((miembros, n + 1))
+    np.cumsum(suma, axis=1, out=acumulado[:, 1:])
+    return acumulado
+
+
+class IndiceTiempo:
+
+    def __init__(self, periodo, columnas, valores, granularidad="M", seleccion=None):
+        # periodo: meses desde el año 0 (granularidad "M") o días desde 1970 ("D");
+        # seleccion: {dimensión: miembros} para guardar solo esas filas de la matriz
+        inicio = time.perf_counter()
+        self.granularidad = granularidad
+        periodo = np.asarray(periodo, dtype=np.int64)
+        valores = np.asarray(valores, dtype=float)
+        self.origen = int(periodo.min()) if len(periodo) else 0
+        self.n = int(periodo.max()) - self.origen + 1 if len(periodo) else 0
+        columna = periodo - self.origen
+        self.total = _matriz_acumulada(np.zeros(len(columna), dtype=np.int64), columna, valores, 1, self.n)[0]
+        self.miembros = {}
+        self.acumulados = {}
+        for nombre, codigos in columnas.items():
+            codigos, columna_dim, valores_dim = np.asarray(codigos), columna, valores
+            if seleccion is not None and nombre in seleccion:
+                dentro = np.isin(codigos, np.asarray(seleccion[nombre]))
+                codigos, columna_dim, valores_dim = codigos[dentro], columna[dentro], valores[dentro]
+            fila, miembros = pd.factorize(codigos, sort=True)
+            self.miembros[nombre] = np.asarray(miembros)
+            self.acumulados[nombre] = _matriz_acumulada(fila, columna_dim, valores_dim, len(miembros), self.n)
+        self.segundos_construccion = time.perf_counter() - inicio
+
+    @property
+    def nbytes(self):
+        return self.total.nbytes + sum(a.nbytes for a in self.acumulados.values())
+
+    def fechas(self):
+        # Fecha de inicio de cada periodo del eje
+        if self.granularidad == "D":
+            return pd.to_datetime(np.arange(self.origen, self.origen + self.n), unit="D")
+        meses = np.arange(self.origen, self.origen + self.n)
+        return pd.DatetimeIndex(pd.to_datetime(pd.DataFrame({"year": meses // 12, "month": meses % 12 + 1, "day": 1})))
+
+    def posicion(self, fecha):
+        # Periodo de una fecha relativo al origen (puede caer fuera del eje)
+        fecha = pd.Timestamp(fecha)
+        if self.granularidad == "D":
+            return (fecha.normalize() - pd.Timestamp(0)).days - self.origen
+        return fecha.year * 12 + fecha.month - 1 - self.origen
+
+    def _limites(self, desde, hasta):
+        # Rango cerrado [desde, hasta] como columnas del acumulado, recortado al eje
+        inicio = min(max(self.posicion(desde), 0), self.n)
+        fin = min(max(self.posicion(hasta) + 1, 0), self.n)
+        return inicio, max(fin, inicio)
+
+    def _acumulado(self, dimension):
+        if dimension is None:
+            return self.total[None, :], np.array(["Total"])
+        return self.acumulados[dimension], self.miembros[dimension]
+
+    def rango(self, desde, hasta, dimension=None):
+        # Ventas de cada miembro entre dos fechas (inclusive)
+        acumulado, miembros = self._acumulado(dimension)
+        inicio, fin = self._limites(desde, hasta)
+        return pd.Series(acumulado[:, fin] - acumulado[:, inicio], index=miembros, name=VENTAS)
+
+    def anterior(self, desde, hasta, referencia="anio"):
+        # El rango contra el que se compara: un año antes o el tramo de igual longitud justo antes
+        desde, hasta = pd.Timestamp(desde), pd.Timestamp(hasta)
+        if referencia == "anio":
+            return desde - pd.DateOffset(years=1), hasta - pd.DateOffset(years=1)
+        if referencia != "periodo":
+            raise ValueError(f"Referencia desconocida: {referencia} ({', '.join(REFERENCIAS)})")
+        if self.granularidad == "D":
+            largo = hasta.normalize() - desde.normalize() + pd.Timedelta(days=1)
+            return desde - largo, hasta - largo
+        meses = (hasta.year - desde.year) * 12 + hasta.month - desde.month + 1
+        hasta_previo = hasta - pd.DateOffset(months=meses)
+        if hasta.is_month_end:
+            hasta_previo += pd.offsets.MonthEnd(0)
+        return desde - pd.DateOffset(months=meses), hasta_previo
+
+    def comparar(self, desde, hasta, dimension=None, referencia="anio"):
+        # Ventas del rango, del rango de referencia y la variación, por miembro
+        acumulado, miembros = self._acumulado(dimension)
+        inicio, fin = self._limites(desde, hasta)
+        inicio_previo, fin_previo = self._limites(*self.anterior(desde, hasta, referencia))
+        actual = acumulado[:, fin] - acumulado[:, inicio]
+        previo = acumulado[:, fin_previo] - acumulado[:, inicio_previo]
+        diferencia = actual - previo
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variacion = np.where(previo != 0, diferencia / previo * 100, np.nan)
+        return pd.DataFrame(
+            {"Actual": actual, "Anterior": previo, "Diferencia": diferencia, "Variación (%)": variacion},
+            index=miembros,
+        )
+
+    def movil(self, ventana, dimension=None, miembro=None):
+        # Suma de los últimos `ventana` periodos en cada periodo (los primeros con historia incompleta)
+        acumulado, miembros = self._acumulado(dimension)
+        if miembro is not None:
+            acumulado = acumulado[np.flatnonzero(miembros == miembro)]
+        fin = np.arange(1, self.n + 1)
+        sumas = acumulado[:, fin] - acumulado[:, np.maximum(fin - ventana, 0)]
+        return pd.Series(sumas.sum(axis=0), index=self.fechas(), name=f"Móvil {ventana}")
+
+    def moviles(self, ventanas=VENTANAS, dimension=None, miembro=None):
+        return pd.concat([self.movil(v, dimension, miembro) for v in ventanas], axis=1)
+
+    def crecimiento_anual(self):
+        # Variación de cada año completo contra el anterior: {(año_anterior, año): %}
+        fechas = self.fechas()
+        if self.n == 0:
+            return {}
+        anios = range(fechas[0].year, fechas[-1].year + 1)
+        ventas = {anio: self.rango(f"{anio}-01-01", f"{anio}-12-31").iloc[0] for anio in anios}
+        return {
+            (anio - 1, anio): (ventas[anio] - ventas[anio - 1]) / ventas[anio - 1] * 100
+            for anio in anios if anio - 1 in ventas and ventas[anio - 1]
+        }
+
+
+def indice_mensual(cubo, anio=None, dimensiones=tuple(DIMENSIONES)):
+    # Desde el cubo (tiene la forma de CuboIncremental.consultar); solo se desglosan
+    # las `dimensiones` pedidas, y con dimensiones=() queda solo el total
+    periodo = cubo["Año"].to_numpy().astype(np.int64) * 12 + cubo["Mes"].to_numpy() - 1
+    columnas = {nombre: cubo[DIMENSIONES[nombre]].to_numpy() for nombre in dimensiones}
+    return IndiceTiempo(periodo, columnas, cubo[VENTAS].to_numpy(), "M")
+
+
+def indice_diario(df, miembros=None):
+    # Desde las transacciones con su columna Fecha; el cubo no guarda el día. Solo
+    # se desglosan las dimensiones de `miembros` ({dimensión: miembros}) y solo
+    # para esos miembros: la matriz queda en seleccionados × días, no en todos × días
+    periodo = (df["Fecha"].to_numpy().astype("datetime64[D]")).astype(np.int64)
+    miembros = miembros or {}
+    columnas = {nombre: df[DIMENSIONES[nombre]].to_numpy() for nombre in miembros}
+    return IndiceTiempo(periodo, columnas, df[VENTAS].to_numpy(), "D", seleccion=miembros)
+
+
+if __name__ == "__main__":
+    import sys
+
+    import almacen
+
+    # Construcción y latencia de consultas sobre el almacén (o el .arrow indicado)
+    ruta = sys.argv[1] if len(sys.argv) > 1 else almacen.RUTA_ALMACEN
+    df = almacen.cargar(["Fecha", VENTAS] + list(DIMENSIONES.values()), ruta_csv="", ruta_almacen=ruta)
+    # Por día, solo los 100 clientes con más ventas
+    principales = df.groupby(DIMENSIONES["Cliente"])[VENTAS].sum().nlargest(100).index
+    for nombre, indice in [("mensual", indice_mensual(df.assign(Año=df["Fecha"].dt.year, Mes=df["Fecha"].dt.month))),
+                           ("diario", indice_diario(df, {"Cliente": principales}))]:
+        fechas = indice.fechas()
+        repeticiones = 1000
+        latencias = {}
+        for consulta in ["rango", "comparar"]:
+            inicio = time.perf_counter()
+            for i in range(repeticiones):
+                getattr(indice, consulta)(fechas[i % len(fechas)], fechas[-1], "Cliente")
+            latencias[consulta] = (time.perf_counter() - inicio) / repeticiones * 1000
+        print(
+            f"{nombre}: {indice.n:,} periodos, construido en {indice.segundos_construccion * 1000:.1f} ms, "
+            f"{indice.nbytes / 1e6:.1f} MB; por cliente: rango {latencias['rango']:.3f} ms, "
+            f"comparativo {latencias['comparar']:.3f} ms"
+        )